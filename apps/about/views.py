@@ -14,7 +14,7 @@ def index(request):
 
 
 def us(request):
-    positions = [p for p in Position.objects.all() if p.active]
+    positions = Position.objects.active().select_related('member__user')
     return render(
         request,
         'about/index.html',
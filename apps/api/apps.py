@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'apps.api'
+
+    def ready(self):
+        from . import versions  # noqa: F401 (connects the signals)
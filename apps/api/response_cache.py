@@ -0,0 +1,55 @@
+"""Cache of the JSON bodies of the API responses.
+
+The version of the resource (See `apps.api.versions`) is part of the key,
+so when any model the resource depends on changes, the next request is a
+miss and the stale entries are just left to expire. The same happens
+every day with the resources that depend on the date (See
+`versions.DAILY`), so their bodies are never older than the day.
+"""
+
+from django.core.cache import cache
+
+RESPONSE_CACHE_TIMEOUT = 86400  # 1 día
+
+COUNTERS = ('hits', 'misses')
+
+
+def response_key(view_name, version, pretty, args, kwargs):
+    parts = [str(arg) for arg in args]
+    parts += [f'{name}={value}' for name, value in sorted(kwargs.items())]
+    style = 'pretty' if pretty else 'compact'
+    return f"api.response.{view_name}.{version}.{style}.{'/'.join(parts)}"
+
+
+def counter_key(counter):
+    return f'api.response.{counter}'
+
+
+def count(counter):
+    key = counter_key(counter)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr: the counter starts over
+        cache.set(key, 1, timeout=None)
+
+
+def get_response(key):
+    """Return the cached JSON bytes for `key`, or None."""
+    content = cache.get(key)
+    count('misses' if content is None else 'hits')
+    return content
+
+
+def set_response(key, content):
+    cache.set(key, content, timeout=RESPONSE_CACHE_TIMEOUT)
+
+
+def stats():
+    values = cache.get_many([counter_key(c) for c in COUNTERS])
+    return {c: values.get(counter_key(c), 0) for c in COUNTERS}
+
+
+def reset_stats():
+    cache.delete_many([counter_key(c) for c in COUNTERS])
@@ -0,0 +1,286 @@
+import datetime
+import json
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.events.models import Event
+from apps.locations.models import Location, Venue
+from apps.organizations.models import (
+    Membership,
+    Organization,
+    OrganizationCategory,
+    OrganizationRole,
+)
+from apps.quotes.models import Author, Quote
+from apps.schedule.models import Schedule, Slot, SlotCategory, SlotTag, Track
+from apps.speakers.models import Contact, Social, Speaker
+
+from . import response_cache, versions
+
+# Maximum number of queries for every endpoint, whatever the size of the
+# event. If you need to raise one of these numbers, you are probably
+# reading something that has not been prefetched.
+QUERY_BUDGET = {
+    'api:status': 0,
+    'api:list_staff_members': 1,
+    'api:list_venues': 1,
+    'api:detail_venue': 1,
+    'api:all_events': 1,
+    'api:active_events': 1,
+    'api:random_quote': 1,
+    'api:detail_event': 1,
+    'api:list_speakers': 7,
+    'api:list_talks': 5,
+    'api:list_tracks': 6,
+    'api:list_sponsors': 2,
+    'api:list_tags': 0,
+}
+
+EVENT_ENDPOINTS = {
+    'api:detail_event',
+    'api:list_speakers',
+    'api:list_talks',
+    'api:list_tracks',
+    'api:list_sponsors',
+    'api:list_tags',
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The versions are discarded on commit, and tests never commit
+    cache.clear()
+
+
+def create_event(size):
+    """Event with `size` tracks, talks per track, speakers per talk, ..."""
+    venue = Venue.objects.create(name='Venue', slug='venue')
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+        venue=venue,
+        active=True,
+    )
+    location = Location.objects.create(venue=venue, name='Room')
+    talk = SlotCategory.objects.create(pk=1, code='talk', name='Talk')
+    twitter = Social.objects.create(
+        name='Twitter', code='twitter', base_url='https://twitter.com/'
+    )
+    github = Social.objects.create(
+        name='GitHub', code='github', base_url='https://github.com/'
+    )
+    tags = [
+        SlotTag.objects.create(name=f'Tag {i}', slug=f'tag-{i}')
+        for i in range(size)
+    ]
+    role = OrganizationRole.objects.create(name='Sponsor', code='sponsor')
+    category = OrganizationCategory.objects.create(
+        name='Gold', code='gold', role=role
+    )
+    start = timezone.make_aware(datetime.datetime(2030, 11, 16, 9, 0))
+    for t in range(size):
+        track = Track.objects.create(name=f'Track {t}')
+        for n in range(size):
+            slot = Slot.objects.create(name=f'Talk {t}.{n}', category=talk)
+            slot.tags.set(tags)
+            item = Schedule.objects.create(
+                event=event,
+                location=location,
+                track=track,
+                slot=slot,
+                start=start + datetime.timedelta(hours=n),
+                end=start + datetime.timedelta(hours=n, minutes=50),
+            )
+            for s in range(size):
+                speaker = Speaker.objects.create(
+                    name='Speaker',
+                    surname=f'{t}.{n}.{s}',
+                    slug=f'speaker-{t}-{n}-{s}',
+                    bio='',
+                )
+                Contact.objects.create(
+                    social=twitter, speaker=speaker, identifier='speaker'
+                )
+                Contact.objects.create(
+                    social=github, speaker=speaker, identifier='speaker'
+                )
+                item.speakers.add(speaker)
+        Membership.objects.create(
+            event=event,
+            organization=Organization.objects.create(name=f'Sponsor {t}'),
+            category=category,
+        )
+    author = Author.objects.create(name='Guido', surname='van Rossum')
+    Quote.objects.create(text='Now is better than never.', author=author)
+    return event
+
+
+def url_for(name, event):
+    if name in EVENT_ENDPOINTS:
+        return reverse(name, args=[event.slug])
+    if name == 'api:detail_venue':
+        return reverse(name, args=[event.venue.slug])
+    return reverse(name)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('size', [1, 4])
+def test_api_query_budget(client, size):
+    event = create_event(size)
+    for name, budget in QUERY_BUDGET.items():
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url_for(name, event))
+        assert len(queries) <= budget, f'{name}: {len(queries)} queries'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(EVENT_ENDPOINTS))
+def test_api_event_endpoints(client, name):
+    event = create_event(2)
+    response = client.get(url_for(name, event))
+    assert json.loads(response.content)['status'] == 'ok'
+
+
+@pytest.mark.django_db
+def test_api_list_speakers(client):
+    event = create_event(2)
+    response = client.get(reverse('api:list_speakers', args=[event.slug]))
+    speakers = json.loads(response.content)['result']
+    assert len(speakers) == 8
+    speaker = speakers[0]
+    assert speaker['social'] == {
+        'github': 'https://github.com/speaker',
+        'twitter': 'https://twitter.com/speaker',
+    }
+    assert [t['name'] for t in speaker['talks']] == ['Talk 0.0']
+    assert speaker['talks'][0]['tags'] == ['tag-0', 'tag-1']
+
+
+@pytest.mark.django_db
+def test_api_not_modified(client):
+    event = create_event(1)
+    url = reverse('api:list_talks', args=[event.slug])
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert len(queries) == 0
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_api_modified_after_changes(
+    client, django_capture_on_commit_callbacks
+):
+    event = create_event(1)
+    url = reverse('api:list_talks', args=[event.slug])
+    etag = client.get(url)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        slot = Slot.objects.first()
+        slot.name = 'Another name'
+        slot.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_api_etag_without_resource(client):
+    url = reverse('api:status')
+    etag = client.get(url)['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+
+@pytest.mark.django_db
+def test_api_pretty(client):
+    url = reverse('api:status')
+    compact = client.get(url)
+    pretty = client.get(url, {'pretty': 1})
+    assert b'\n' not in compact.content
+    assert b'\n    "status": "ok"' in pretty.content
+    assert compact['ETag'] != pretty['ETag']
+
+
+@pytest.mark.django_db
+def test_api_errors_have_no_etag(client):
+    response = client.get(reverse('api:detail_event', args=['nope']))
+    assert json.loads(response.content)['status'] == 'error'
+    assert not response.has_header('ETag')
+
+
+@pytest.mark.django_db
+def test_api_daily_resources_change_every_day(client, monkeypatch):
+    url = reverse('api:list_staff_members')
+    etag = client.get(url)['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    monkeypatch.setattr(
+        versions,
+        'datetime',
+        SimpleNamespace(date=SimpleNamespace(today=lambda: tomorrow)),
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_api_response_cache(client, django_capture_on_commit_callbacks):
+    event = create_event(1)
+    url = reverse('api:list_talks', args=[event.slug])
+    response_cache.reset_stats()
+    response = client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(url)
+    assert len(queries) == 0
+    assert cached.content == response.content
+    assert cached['ETag'] == response['ETag']
+    assert cached['Content-Type'] == 'application/json'
+    assert response_cache.stats() == {'hits': 1, 'misses': 1}
+    with django_capture_on_commit_callbacks(execute=True):
+        slot = Slot.objects.first()
+        slot.name = 'Another name'
+        slot.save()
+    response = client.get(url)
+    assert json.loads(response.content)['result'][0]['name'] == 'Another name'
+    assert response_cache.stats() == {'hits': 1, 'misses': 2}
+
+
+@pytest.mark.django_db
+def test_api_response_cache_renews_daily(client, monkeypatch):
+    url = reverse('api:list_staff_members')
+    response_cache.reset_stats()
+    client.get(url)
+    client.get(url)
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    monkeypatch.setattr(
+        versions,
+        'datetime',
+        SimpleNamespace(date=SimpleNamespace(today=lambda: tomorrow)),
+    )
+    client.get(url)
+    assert response_cache.stats() == {'hits': 1, 'misses': 2}
+
+
+@pytest.mark.django_db
+def test_api_response_cache_keeps_args_apart(client):
+    event = create_event(1)
+    client.get(reverse('api:list_talks', args=[event.slug]))
+    response = client.get(reverse('api:list_talks', args=['nope']))
+    assert json.loads(response.content)['status'] == 'error'
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,101 @@
+"""Versions of the resources served by the API.
+
+Every group of resources has a version: an opaque token and the moment it
+was generated. The version is discarded each time any of the models the
+group depends on changes, so it can be used to answer conditional
+requests (ETag / Last-Modified) without running the view. Resources
+that also depend on the date have a new version every day.
+"""
+
+import datetime
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from apps.events.models import Event
+from apps.locations.models import Location, Venue
+from apps.members.models import Member, Position
+from apps.organizations.models import (
+    Membership,
+    Organization,
+    OrganizationCategory,
+    OrganizationRole,
+)
+from apps.quotes.models import Author, Quote
+from apps.schedule.models import Schedule, Slot, SlotLevel, SlotTag, Track
+from apps.speakers.models import Contact, Social, Speaker
+
+DEPENDENCIES = {
+    'events': {
+        Event,
+        Venue,
+        Location,
+        Schedule,
+        Schedule.speakers.through,
+        Slot,
+        Slot.tags.through,
+        SlotLevel,
+        SlotTag,
+        Track,
+        Speaker,
+        Contact,
+        Social,
+        Membership,
+        Organization,
+        OrganizationCategory,
+        OrganizationRole,
+    },
+    'venues': {Venue},
+    'staff': {Position, Member, User},
+    'quotes': {Quote, Author},
+}
+
+# Resources with content that changes with the date, like the positions
+# of the staff, active until some day
+DAILY = {'staff'}
+
+# Enough for the versions of old days to expire
+DAILY_VERSION_TIMEOUT = 2 * 86400
+
+
+def version_key(resource):
+    if resource in DAILY:
+        return f'api.{resource}.version.{datetime.date.today().isoformat()}'
+    return f'api.{resource}.version'
+
+
+def get_version(resource):
+    """Return a tuple (token, timestamp) with the version of a resource."""
+    return cache.get_or_set(
+        version_key(resource),
+        lambda: (uuid.uuid4().hex, int(time.time())),
+        timeout=DAILY_VERSION_TIMEOUT if resource in DAILY else None,
+    )
+
+
+def clear_versions(sender, **kwargs):
+    """Discard the versions of the resources that depend on `sender`,
+    when the transaction commits, so no request can cache the old data
+    under the new version.
+    """
+    resources = [
+        resource
+        for resource, models in DEPENDENCIES.items()
+        if sender in models
+    ]
+    transaction.on_commit(
+        lambda: cache.delete_many([version_key(r) for r in resources])
+    )
+
+
+for model in set.union(*DEPENDENCIES.values()):
+    for signal in (post_save, post_delete, m2m_changed):
+        signal.connect(
+            clear_versions,
+            sender=model,
+            dispatch_uid=f'api.clear_versions.{model._meta.label}',
+        )
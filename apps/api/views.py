@@ -2,27 +2,76 @@
 # -*- coding: utf-8 -*-
 
 import functools
+import hashlib
 import traceback
 
 from django.conf import settings
-from django.http import JsonResponse
+from django.db.models import Prefetch
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
 from apps.events.models import Event
 from apps.locations.models import Venue
 from apps.members.models import Position
 from apps.quotes.models import Quote
+from apps.schedule.models import SlotTag
+from apps.speakers.models import Contact, Speaker
+
+from . import response_cache, versions
 
 # API decorator
 
 
-def api(func):
+def api(func=None, *, resource=None, cached=False):
+    """Run the view and return its result as a JSON response.
+
+    The response is compact JSON unless the request includes `?pretty=1`.
+    Successful responses include an ETag and, when `resource` is given, a
+    Last-Modified header with the version of that resource (See
+    `apps.api.versions`), so conditional requests from clients that
+    already have the content get a 304 without running the view at all.
+    Without `resource`, the ETag is computed from the body.
+
+    With `cached=True` (only for views with a `resource`) the body of
+    successful responses is kept in the cache under the version of the
+    resource, so the view only runs again after something changes (See
+    `apps.api.response_cache`).
+    """
+    if func is None:
+        return functools.partial(api, resource=resource, cached=cached)
+    assert resource or not cached, 'Only views with a resource can be cached'
 
     @functools.wraps(func)
-    def wrapper(*args, **kwargs):
+    def wrapper(request, *args, **kwargs):
+        pretty = request.GET.get('pretty') == '1'
+        etag = last_modified = cache_key = None
+        if resource:
+            token, last_modified = versions.get_version(resource)
+            etag = quote_etag(f'{token}-pretty' if pretty else token)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified:
+                not_modified['ETag'] = etag
+                not_modified['Last-Modified'] = http_date(last_modified)
+                return not_modified
+            if cached:
+                cache_key = response_cache.response_key(
+                    func.__name__, token, pretty, args, kwargs
+                )
+                content = response_cache.get_response(cache_key)
+                if content is not None:
+                    json_response = HttpResponse(
+                        content, content_type='application/json'
+                    )
+                    json_response['ETag'] = etag
+                    json_response['Last-Modified'] = http_date(last_modified)
+                    return json_response
         response = {'status': 'ok'}
         try:
-            result = func(*args, **kwargs)
+            result = func(request, *args, **kwargs)
             try:
                 length = len(result)
                 response['length'] = length
@@ -33,11 +82,59 @@ def api(func):
             response['status'] = 'error'
             response['message'] = str(err)
             response['traceback'] = traceback.format_exc()
-        return JsonResponse(response, json_dumps_params={'indent': 4})
+        json_dumps_params = {'indent': 4} if pretty else {'separators': (',', ':')}
+        json_response = JsonResponse(response, json_dumps_params=json_dumps_params)
+        if response['status'] != 'ok':
+            return json_response
+        if cache_key:
+            response_cache.set_response(cache_key, json_response.content)
+        if etag is None:
+            etag = quote_etag(hashlib.md5(json_response.content).hexdigest())
+        json_response['ETag'] = etag
+        if last_modified:
+            json_response['Last-Modified'] = http_date(last_modified)
+        return get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+            response=json_response,
+        )
 
     return wrapper
 
 
+# Querysets
+#
+# The serializers below only read data already loaded by these querysets,
+# so the number of queries of every endpoint does not depend on the size
+# of the event.
+
+
+def contacts_prefetch():
+    return Prefetch(
+        'contacts',
+        queryset=Contact.objects.select_related('social').order_by(
+            'social__name'
+        ),
+    )
+
+
+def speakers_queryset():
+    return Speaker.objects.order_by('surname', 'name').prefetch_related(
+        contacts_prefetch()
+    )
+
+
+def talks_queryset(event):
+    return event.schedule.select_related(
+        'slot__level',
+        'track',
+    ).prefetch_related(
+        Prefetch('slot__tags', queryset=SlotTag.objects.order_by('slug')),
+        Prefetch('speakers', queryset=speakers_queryset()),
+    )
+
+
 # Serializars
 
 
@@ -93,15 +190,32 @@ def serialize_event(event):
     }
 
 
-def serialize_speaker(event, speaker):
+def serialize_socials(speaker):
+    """Same as `Speaker.socials`, from the prefetched contacts."""
+    return {c.social.code: c.href for c in speaker.contacts.all()}
+
+
+def serialize_talk_speaker(speaker):
+    """Same as every item of `Schedule.get_speakers`."""
     return {
         'speaker_id': speaker.pk,
         'name': speaker.name,
         'surname': speaker.surname,
         'bio': speaker.bio,
         'photo': speaker.photo_url,
-        'social': speaker.socials(),
-        'talks': [serialize_talk(talk) for talk in speaker.talks(event)],
+        'social': serialize_socials(speaker),
+    }
+
+
+def serialize_speaker(speaker):
+    return {
+        'speaker_id': speaker.pk,
+        'name': speaker.name,
+        'surname': speaker.surname,
+        'bio': speaker.bio,
+        'photo': speaker.photo_url,
+        'social': serialize_socials(speaker),
+        'talks': [serialize_talk(talk) for talk in speaker.event_talks],
     }
 
 
@@ -111,12 +225,26 @@ def serialize_talk(talk):
         'name': talk.slot.name,
         'description': talk.slot.description,
         'repo': talk.slot.repo,
-        'tags': talk.slot.get_tags(),
+        'tags': [tag.slug for tag in talk.slot.tags.all()],
         'track': talk.track_name(),
         'start': talk.start.strftime('%H:%M'),
         'end': talk.end.strftime('%H:%M'),
         'level': talk.slot.get_level(),
-        'speakers': talk.get_speakers(),
+        'speakers': [serialize_talk_speaker(s) for s in talk.speakers.all()],
+    }
+
+
+def serialize_track_talk(talk):
+    """Same as every item of `Track.get_talks`."""
+    return {
+        'talk_id': talk.slot.pk,
+        'name': talk.slot.name,
+        'start': talk.start.strftime('%H:%M'),
+        'end': talk.end.strftime('%H:%M'),
+        'description': talk.slot.description,
+        'tags': [tag.slug for tag in talk.slot.tags.all()],
+        'language': talk.language,
+        'speakers': [serialize_talk_speaker(s) for s in talk.speakers.all()],
     }
 
 
@@ -159,36 +287,37 @@ def status(request):
             reverse('api:list_venues'),
             reverse('api:active_events'),
             reverse('api:all_events'),
-        ]
+        ],
+        "cache": response_cache.stats(),
     }
 
 
-@api
+@api(resource='staff', cached=True)
 def list_staff_members(request):
     """List of active staff members."""
     return [
         serializer_staff(staff_member)
         for staff_member
         in Position.objects
-                   .filter(active=True)
+                   .active()
                    .select_related('member__user')
     ]
 
 
-@api
+@api(resource='venues', cached=True)
 def list_venues(request):
     """List of all venues.
     """
     return [serialize_venue_short(venue) for venue in Venue.objects.all()]
 
 
-@api
+@api(resource='venues', cached=True)
 def detail_venue(request, slug):
     venue = Venue.objects.get(slug=slug)
     return serialize_venue(venue)
 
 
-@api
+@api(resource='events', cached=True)
 def all_events(request):
     """Return a list with some data of all events, past, present or future'
     """
@@ -196,7 +325,7 @@ def all_events(request):
     return [serialize_event_short(event) for event in events]
 
 
-@api
+@api(resource='events', cached=True)
 def active_events(request):
     """Return a list with some data of active events (present or future)'
     """
@@ -204,51 +333,66 @@ def active_events(request):
     return [serialize_event_short(event) for event in events]
 
 
-@api
+@api(resource='events', cached=True)
 def detail_event(request, slug):
     """Details from event indicated, with URL pointing to more resources.
     """
-    event = Event.get_by_slug(slug)
+    event = Event.objects.select_related('venue').get(hashtag__iexact=slug)
     return serialize_event(event)
 
 
-@api
+@api(resource='events', cached=True)
 def list_speakers(request, slug):
     event = Event.get_by_slug(slug)
-    speakers = event.speakers()
-    return [serialize_speaker(event, speaker) for speaker in speakers]
+    speakers = event.speakers().prefetch_related(
+        contacts_prefetch(),
+        Prefetch(
+            'schedule',
+            queryset=talks_queryset(event).order_by('slot__name'),
+            to_attr='event_talks',
+        ),
+    )
+    return [serialize_speaker(speaker) for speaker in speakers]
 
 
-@api
+@api(resource='events', cached=True)
 def list_talks(request, slug):
     event = Event.get_by_slug(slug)
     talks = (
         s
         for s
-        in event.schedule
-                .select_related('slot')
-                .order_by('slot__name')
+        in talks_queryset(event).order_by('slot__name')
         if s.slot.is_talk()
     )
     return [serialize_talk(talk) for talk in talks]
 
 
-@api
+@api(resource='events', cached=True)
 def list_tracks(request, slug):
     event = Event.get_by_slug(slug)
-    tracks = event.tracks()
+    talks_by_track = {}
+    for talk in talks_queryset(event).order_by('start'):
+        talks_by_track.setdefault(talk.track_id, []).append(talk)
     return [{
         'name': track.name,
-        'schedule': track.get_talks(event)
-    } for track in tracks]
+        'schedule': [
+            serialize_track_talk(talk)
+            for talk in talks_by_track.get(track.pk, [])
+        ],
+    } for track in event.tracks()]
 
 
-@api
+@api(resource='events', cached=True)
 def list_sponsors(request, slug):
     event = Event.get_by_slug(slug)
-    sponsors = event.memberships.all().order_by('category__role__order')
+    sponsors = (
+        event.memberships
+             .select_related('organization', 'category__role')
+             .order_by('category__role__order')
+    )
     return [serializer_sponsor(sponsor) for sponsor in sponsors]
 
+
 @api
 def random_quote(request):
     """Return random quote
@@ -257,6 +401,6 @@ def random_quote(request):
     return serialize_quote(quote)
 
 # TODO
-@api
+@api(resource='events')
 def list_tags(request, slug):
     return []
@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand
+
+from apps.certificates.services.bulk_certificates import (
+    MERGE_FORMATS,
+    create_certificates,
+)
+from apps.certificates.tasks import (
+    event_certificates,
+    generate_event_certificates,
+    get_event_output_dir,
+)
+from apps.certificates.utils import get_template_full_name
+from apps.events.models import Event
+from utils.console import as_table, cyan, green, red
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Genera los certificados de todos los asistentes de un evento.'
+        ' Si se interrumpe, la siguiente ejecución continúa donde se quedó'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('event', help='Hashtag del evento')
+        parser.add_argument(
+            '--template',
+            default='attendance',
+            help='Plantilla SVG del certificado (por defecto, attendance)',
+        )
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=int,
+            default=None,
+            help='Número de procesos (por defecto, uno por CPU)',
+        )
+        parser.add_argument(
+            '--chunk_size',
+            type=int,
+            default=20,
+            help='Certificados que se envían a cada proceso de una vez',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Generar también los certificados ya generados',
+        )
+        parser.add_argument(
+            '--merge',
+            choices=MERGE_FORMATS,
+            default=None,
+            help='Juntar todos los certificados en un único PDF o en un zip',
+        )
+        parser.add_argument(
+            '--rq',
+            action='store_true',
+            help='Encolar la generación como una tarea RQ',
+        )
+
+    def handle(self, *args, **options):
+        event = Event.get_by_slug(options['event'])
+        if options['rq']:
+            rq_job = generate_event_certificates.delay(
+                event,
+                template=options['template'],
+                workers=options['workers'],
+                force=options['force'],
+                merge=options['merge'],
+            )
+            print(cyan(f'Encolada la tarea {rq_job.id}'))
+            return
+        report = create_certificates(
+            get_template_full_name(f"{options['template']}.svg"),
+            event_certificates(event),
+            get_event_output_dir(event),
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            force=options['force'],
+            merge=options['merge'],
+        )
+        if options['verbosity'] > 1:
+            for output_name, seconds in report.timings.items():
+                print(f'{output_name}: {seconds * 1000:.1f} ms')
+        for output_name, error in report.failed.items():
+            print(red(f'ERROR: Certificate {output_name}'))
+            print(error)
+        print(green(f'Rendered: {len(report.rendered)}'))
+        print(cyan(f'Skipped (already done): {len(report.skipped)}'))
+        if report.failed:
+            print(red(f'Failed: {len(report.failed)}'))
+        stats = report.timing_stats()
+        if stats:
+            print(as_table(
+                ['Min (ms)', 'Mean (ms)', 'P95 (ms)', 'Max (ms)'],
+                [[f'{seconds * 1000:.1f}' for seconds in stats]],
+            ))
+            print(
+                f'{report.elapsed:.2f}s, '
+                f'{report.speed:.1f} certificates/s'
+            )
+        if report.merged:
+            print(green(f'Merged: {report.merged}'))
@@ -0,0 +1,203 @@
+"""Create the certificates of all the attendees of an event.
+
+The certificates are rendered in parallel by a pool of processes, every
+one with the template compiled once. The run can be interrupted at any
+time: a checkpoint file in the output directory records every
+certificate created, with a digest of its content, and the next run only
+creates the missing or changed ones. Every PDF is written atomically, so
+an interrupted run never leaves a partial file.
+"""
+
+import hashlib
+import json
+import os
+import statistics
+import time
+import traceback
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from apps.commons.db import close_connections_before_fork
+from apps.commons.files import atomic_output
+from apps.commons.iterables import chunks
+
+from .certificate_maker import CertificateDocument, get_template
+
+CHECKPOINT_FILENAME = 'checkpoint.json'
+MERGED_PDF_FILENAME = 'certificates.pdf'
+MERGED_ZIP_FILENAME = 'certificates.zip'
+
+MERGE_FORMATS = ('pdf', 'zip')
+
+
+def certificate_digest(template_filename, fields):
+    """Changes if the template or the values of the certificate change."""
+    content = json.dumps(
+        [os.path.getmtime(template_filename), fields], sort_keys=True
+    )
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+class Checkpoint:
+    """Certificates already created in a directory, as a mapping from the
+    output name to the digest of their content.
+    """
+
+    def __init__(self, output_dir):
+        self.full_name = os.path.join(output_dir, CHECKPOINT_FILENAME)
+        self.done = {}
+        if os.path.exists(self.full_name):
+            with open(self.full_name, encoding='utf-8') as f:
+                self.done = json.load(f)
+
+    def is_done(self, output_name, digest, full_name):
+        return self.done.get(output_name) == digest and os.path.exists(full_name)
+
+    def add(self, output_name, digest):
+        self.done[output_name] = digest
+
+    def save(self):
+        with atomic_output(self.full_name) as tmp_name:
+            with open(tmp_name, 'w', encoding='utf-8') as f:
+                json.dump(self.done, f, sort_keys=True)
+
+
+def render_chunk(template_filename, certificates):
+    """Render a chunk of certificates, given as tuples (output name, full
+    name of the PDF, fields).
+
+    Returns a list of tuples (output name, seconds, error), where error
+    is None if the PDF was created.
+    """
+    template = get_template(template_filename)
+    results = []
+    for output_name, full_name, fields in certificates:
+        start = time.perf_counter()
+        try:
+            with atomic_output(full_name) as tmp_name:
+                document = CertificateDocument(template, tmp_name)
+                document.add(**fields)
+                document.save()
+            error = None
+        except Exception:
+            error = traceback.format_exc()
+        results.append((output_name, time.perf_counter() - start, error))
+    return results
+
+
+class BulkCertificatesReport:
+
+    def __init__(self):
+        self.rendered = []
+        self.skipped = []
+        self.failed = {}
+        # Seconds taken by every certificate rendered
+        self.timings = {}
+        self.elapsed = 0.0
+        self.merged = None
+
+    @property
+    def speed(self):
+        return len(self.rendered) / self.elapsed if self.elapsed else 0.0
+
+    def timing_stats(self):
+        """Minimum, mean, 95th percentile and maximum seconds per
+        certificate, or None if none was rendered.
+        """
+        timings = sorted(self.timings.values())
+        if not timings:
+            return None
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        return timings[0], statistics.mean(timings), p95, timings[-1]
+
+
+def create_certificates(
+    template_filename, certificates, output_dir,
+    workers=None, chunk_size=20, force=False, merge=None, progress=None,
+):
+    """Create the PDF of `certificates`, pairs (output name, fields), in
+    `output_dir`, with a pool of `workers` processes.
+
+    Certificates created by a previous run, with the same content, are
+    skipped unless `force` is True. With `merge` ('pdf' or 'zip') all of
+    them are also put together in a single file. `progress`, if given,
+    is called with the number of certificates done and the total.
+    """
+    if merge not in (None, *MERGE_FORMATS):
+        raise ValueError(f'Unknown merge format: {merge}')
+    os.makedirs(output_dir, exist_ok=True)
+    report = BulkCertificatesReport()
+    checkpoint = Checkpoint(output_dir)
+    total = len(certificates)
+    digests = {}
+    pending = []
+    for output_name, fields in certificates:
+        full_name = os.path.join(output_dir, f'{output_name}.pdf')
+        digests[output_name] = certificate_digest(template_filename, fields)
+        if not force and checkpoint.is_done(
+            output_name, digests[output_name], full_name
+        ):
+            report.skipped.append(output_name)
+        else:
+            pending.append((output_name, full_name, fields))
+    start = time.perf_counter()
+    if pending:
+        close_connections_before_fork()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=get_template,
+            initargs=(template_filename,),
+        ) as pool:
+            futures = [
+                pool.submit(render_chunk, template_filename, chunk)
+                for chunk in chunks(pending, chunk_size)
+            ]
+            for future in as_completed(futures):
+                for output_name, seconds, error in future.result():
+                    if error:
+                        report.failed[output_name] = error
+                        continue
+                    report.rendered.append(output_name)
+                    report.timings[output_name] = seconds
+                    checkpoint.add(output_name, digests[output_name])
+                checkpoint.save()
+                if progress:
+                    done = (
+                        len(report.skipped)
+                        + len(report.rendered)
+                        + len(report.failed)
+                    )
+                    progress(done, total)
+    report.elapsed = time.perf_counter() - start
+    if merge:
+        merged = [c for c in certificates if c[0] not in report.failed]
+        if merge == 'pdf':
+            report.merged = merge_pdf(template_filename, merged, output_dir)
+        else:
+            report.merged = merge_zip(merged, output_dir)
+    return report
+
+
+def merge_pdf(template_filename, certificates, output_dir):
+    """A single PDF with all the certificates, one per page.
+
+    It is rendered again, instead of joining the PDF files, because then
+    the artwork is stored only once for all the pages.
+    """
+    full_name = os.path.join(output_dir, MERGED_PDF_FILENAME)
+    with atomic_output(full_name) as tmp_name:
+        document = CertificateDocument(get_template(template_filename), tmp_name)
+        for _, fields in certificates:
+            document.add(**fields)
+        document.save()
+    return full_name
+
+
+def merge_zip(certificates, output_dir):
+    full_name = os.path.join(output_dir, MERGED_ZIP_FILENAME)
+    with atomic_output(full_name) as tmp_name:
+        with zipfile.ZipFile(tmp_name, 'w') as zip_file:
+            for output_name, _ in certificates:
+                filename = f'{output_name}.pdf'
+                zip_file.write(os.path.join(output_dir, filename), filename)
+    return full_name
@@ -0,0 +1,333 @@
+"""Rendering of certificates from SVG templates, in process.
+
+A template is compiled only once (See `get_template`) into:
+
+- The static artwork, converted to a ReportLab drawing with svglib, and
+  drawn only once for every PDF, as a form that every page reuses (See
+  `pdf_forms`).
+- The texts: flowed texts (Inkscape `flowRoot`, which svglib ignores)
+  and texts with placeholders like `{{ name }}`, drawn on every page with
+  the values of the certificate.
+"""
+
+import functools
+import os
+import re
+from xml.sax.saxutils import escape
+
+from lxml import etree
+from reportlab.graphics import renderPDF
+from reportlab.lib.colors import Color, HexColor
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Paragraph
+from svglib.svglib import SvgRenderer
+
+from . import pdf_forms
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+TRANSFORM = re.compile(r'(matrix|translate|scale)\s*\(([^)]*)\)')
+
+ALIGNMENTS = {
+    'start': TA_LEFT,
+    'left': TA_LEFT,
+    'center': TA_CENTER,
+    'middle': TA_CENTER,
+    'end': TA_RIGHT,
+    'right': TA_RIGHT,
+    'justify': TA_JUSTIFY,
+}
+
+# Long values are drawn with smaller fonts, down to this fraction
+MIN_FONT_SCALE = 0.5
+
+BACKGROUND_FORM = 'certificate_background'
+
+
+def tag(name):
+    return f'{{{SVG_NS}}}{name}'
+
+
+def parse_style(element):
+    style = {}
+    for item in element.get('style', '').split(';'):
+        if ':' in item:
+            key, value = item.split(':', 1)
+            style[key.strip()] = value.strip()
+    return style
+
+
+def parse_length(value, default=0.0):
+    match = re.match(r'\s*(-?[\d.]+(?:e-?\d+)?)', value or '')
+    return float(match.group(1)) if match else default
+
+
+def multiply(m1, m2):
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+    )
+
+
+def parse_transform(value):
+    matrix = (1, 0, 0, 1, 0, 0)
+    for name, args in TRANSFORM.findall(value or ''):
+        numbers = [float(n) for n in re.split(r'[\s,]+', args.strip()) if n]
+        if name == 'matrix':
+            step = tuple(numbers)
+        elif name == 'translate':
+            step = (1, 0, 0, 1, numbers[0], numbers[1] if len(numbers) > 1 else 0)
+        else:
+            sx = numbers[0]
+            step = (sx, 0, 0, numbers[1] if len(numbers) > 1 else sx, 0, 0)
+        matrix = multiply(matrix, step)
+    return matrix
+
+
+def element_transform(element):
+    """Transformation from the coordinates of `element` to the ones of
+    the document (Only scale and translation are supported).
+    """
+    matrix = (1, 0, 0, 1, 0, 0)
+    for ancestor in reversed([element, *element.iterancestors()]):
+        matrix = multiply(matrix, parse_transform(ancestor.get('transform')))
+    return matrix
+
+
+def markup(element, bold=False):
+    """ReportLab paragraph markup of the text of `element`."""
+    if parse_style(element).get('font-weight') == 'bold':
+        bold = True
+    parts = [escape(element.text or '')]
+    for child in element:
+        parts.append(markup(child, bold))
+        parts.append(escape(child.tail or ''))
+    text = ''.join(parts)
+    return f'<b>{text}</b>' if bold and text.strip() else text
+
+
+class TextBox:
+    """A text of the template, drawn as a ReportLab paragraph in a box.
+
+    Positions are in points from the bottom-left corner of the page. Flowed
+    texts fill their box from the top; single line texts (`<text>`) are
+    drawn with their baseline at `top`, in as many points as the box is
+    wide.
+    """
+
+    def __init__(self, markup, x, top, width, height, style, single_line=False):
+        self.markup = markup
+        self.x = x
+        self.top = top
+        self.width = width
+        self.height = height
+        self.style = style
+        self.single_line = single_line
+
+    @property
+    def is_static(self):
+        return not PLACEHOLDER.search(self.markup)
+
+    def text(self, fields):
+        def value(match):
+            name = match.group(1)
+            return escape(str(fields.get(name, f'Value {name} not found')))
+
+        return PLACEHOLDER.sub(value, self.markup)
+
+    def fits(self, paragraph, height):
+        if self.single_line:
+            return len(paragraph.blPara.lines) == 1
+        return height <= self.height
+
+    def draw(self, pdf, fields):
+        text = self.text(fields)
+        style = self.style
+        while True:
+            paragraph = Paragraph(text, style)
+            _, height = paragraph.wrap(self.width, self.height)
+            if (
+                self.fits(paragraph, height)
+                or style.fontSize <= self.style.fontSize * MIN_FONT_SCALE
+            ):
+                break
+            font_size = style.fontSize * 0.9
+            style = ParagraphStyle(
+                'smaller',
+                parent=style,
+                fontSize=font_size,
+                leading=font_size * style.leading / style.fontSize,
+            )
+        if self.single_line:
+            paragraph.drawOn(
+                pdf, self.x, self.top - style.leading + style.fontSize
+            )
+        else:
+            paragraph.drawOn(pdf, self.x, self.top - height)
+
+
+def paragraph_style(styles, font_size):
+    fill = styles.get('fill', '#000000')
+    color = HexColor(fill if fill.startswith('#') else '#000000')
+    alpha = float(styles.get('fill-opacity', 1)) * float(styles.get('opacity', 1))
+    bold = styles.get('font-weight') == 'bold'
+    align = styles.get('text-align') or styles.get('text-anchor', 'start')
+    return ParagraphStyle(
+        'certificate',
+        fontName='Helvetica-Bold' if bold else 'Helvetica',
+        fontSize=font_size,
+        leading=font_size * parse_length(styles.get('line-height'), 1.25),
+        textColor=Color(color.red, color.green, color.blue, alpha),
+        alignment=ALIGNMENTS.get(align, TA_LEFT),
+    )
+
+
+class CertificateTemplate:
+    """An SVG template compiled to be drawn in ReportLab canvases."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        root = etree.parse(filename).getroot()
+        view_box = [
+            float(n)
+            for n in re.split(r'[\s,]+', root.get('viewBox', '').strip())
+            if n
+        ]
+        # Flowed texts, and the texts to be filled, are drawn by us, so
+        # they are taken out before converting the artwork
+        texts = [
+            (element, element_transform(element))
+            for element in root.iter(tag('flowRoot'), tag('text'))
+            if element.tag == tag('flowRoot')
+            or PLACEHOLDER.search(''.join(element.itertext()))
+        ]
+        for element, _ in texts:
+            element.getparent().remove(element)
+        self.drawing = SvgRenderer(filename).render(root)
+        self.width = self.drawing.width
+        self.height = self.drawing.height
+        self.units_width = view_box[2] if len(view_box) == 4 else self.width
+        self.scale = self.width / self.units_width
+        self.text_boxes = []
+        for element, matrix in texts:
+            if element.tag == tag('flowRoot'):
+                box = self.flow_root_box(element, matrix)
+            else:
+                box = self.text_box(element, matrix)
+            if box is not None:
+                self.text_boxes.append(box)
+
+    def to_page(self, matrix, x, y):
+        """Coordinates in points of the page of the point (x, y)."""
+        a, b, c, d, e, f = matrix
+        return (
+            (a * x + c * y + e) * self.scale,
+            self.height - (b * x + d * y + f) * self.scale,
+        )
+
+    def make_box(self, text, matrix, rect, styles, single_line=False):
+        x, y, width, height = rect
+        left, top = self.to_page(matrix, x, y)
+        right, bottom = self.to_page(matrix, x + width, y + height)
+        font_size = parse_length(styles.get('font-size'), 12)
+        return TextBox(
+            text,
+            left,
+            top,
+            right - left,
+            right - left if single_line else top - bottom,
+            paragraph_style(styles, font_size * matrix[0] * self.scale),
+            single_line,
+        )
+
+    def flow_root_box(self, flow_root, matrix):
+        rect = flow_root.find(f'{tag("flowRegion")}/{tag("rect")}')
+        paragraphs = flow_root.findall(tag('flowPara'))
+        text = '<br/>'.join(markup(p) for p in paragraphs)
+        if rect is None or not text.strip():
+            return None
+        styles = parse_style(flow_root)
+        for element in (paragraphs[0], *paragraphs[0]):
+            styles.update(parse_style(element))
+        rect = [parse_length(rect.get(n)) for n in ('x', 'y', 'width', 'height')]
+        return self.make_box(text, matrix, rect, styles)
+
+    def text_box(self, text, matrix):
+        styles = parse_style(text)
+        x, y = parse_length(text.get('x')), parse_length(text.get('y'))
+        for span in text.iter(tag('tspan')):
+            styles.update(parse_style(span))
+            x = parse_length(span.get('x'), x)
+            y = parse_length(span.get('y'), y)
+        anchor = styles.get('text-anchor', 'start')
+        styles['text-align'] = anchor
+        # As wide as possible without leaving the page
+        page_x = self.to_page(matrix, x, y)[0] / self.scale
+        width = {
+            'middle': 2 * min(page_x, self.units_width - page_x),
+            'end': page_x,
+        }.get(anchor, self.units_width - page_x) / matrix[0]
+        left = {'middle': x - width / 2, 'end': x - width}.get(anchor, x)
+        return self.make_box(
+            markup(text), matrix, [left, y, width, 0], styles, single_line=True
+        )
+
+    def draw_background(self, pdf):
+        renderPDF.draw(self.drawing, pdf, 0, 0)
+        for box in self.text_boxes:
+            if box.is_static:
+                box.draw(pdf, {})
+
+    def draw(self, pdf, fields):
+        for box in self.text_boxes:
+            if not box.is_static:
+                box.draw(pdf, fields)
+
+
+@functools.lru_cache(maxsize=None)
+def load_template(filename, mtime):
+    return CertificateTemplate(filename)
+
+
+def get_template(filename):
+    """The compiled template, compiled again if the file changes."""
+    return load_template(filename, os.path.getmtime(filename))
+
+
+class CertificateDocument:
+    """A PDF with one or more certificates, one per page."""
+
+    def __init__(self, template, pdf_file):
+        self.template = template
+        self.pdf = canvas.Canvas(
+            pdf_file, pagesize=(template.width, template.height)
+        )
+        self.num_pages = 0
+        # Draw the artwork as a form (See `pdf_forms.end_form`)
+        self.use_form = True
+
+    def add(self, **fields):
+        if self.num_pages == 0:
+            self.pdf.beginForm(BACKGROUND_FORM)
+            self.template.draw_background(self.pdf)
+            self.use_form = pdf_forms.end_form(self.pdf, BACKGROUND_FORM)
+        if self.use_form:
+            self.pdf.doForm(BACKGROUND_FORM)
+        else:
+            self.template.draw_background(self.pdf)
+        self.template.draw(self.pdf, fields)
+        self.pdf.showPage()
+        self.num_pages += 1
+
+    def save(self):
+        self.pdf.save()
@@ -0,0 +1,32 @@
+"""PDF forms (XObjects) with transparencies.
+
+ReportLab writes the graphic states with the transparencies set by
+`setFillAlpha`/`setStrokeAlpha` (ExtGState) only in the resources of the
+page, so a form drawn with them in one page loses them in the next
+ones. `end_form` adds them to the resources of the form, which needs
+the internals of the canvas: it is tested with the version of ReportLab
+pinned in the requirements, and reports when they are not there, so the
+caller can draw the content on every page instead.
+"""
+
+from reportlab.pdfbase import pdfdoc
+
+
+def end_form(pdf, name):
+    """`Canvas.endForm`, keeping the transparencies of the form in its
+    resources. Returns False, with the form ended without them, if this
+    version of ReportLab doesn't have the expected internals.
+    """
+    ext_g_state = getattr(pdf, '_extgstate', None)
+    pdf.endForm()
+    objects = getattr(getattr(pdf, '_doc', None), 'idToObject', None)
+    form = objects.get(pdfdoc.xObjectName(name)) if objects else None
+    if ext_g_state is None or not hasattr(form, 'XObjects'):
+        return False
+    resources = pdfdoc.PDFResourceDictionary()
+    resources.basicFonts()
+    resources.allProcs()
+    resources.XObject = form.XObjects or {}
+    resources.ExtGState = ext_g_state.getState() or {}
+    form.Resources = resources
+    return True
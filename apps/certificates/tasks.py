@@ -0,0 +1,89 @@
+from django_rq import get_connection, job
+from rq import get_current_job
+from rq.job import Job
+
+from .services.bulk_certificates import create_certificates
+from .utils import (
+    create_many_certificates,
+    get_output_full_name,
+    get_template_full_name,
+)
+
+# Save the progress in the job every this number of certificates
+PROGRESS_STEP = 10
+
+
+def ticket_certificates(tickets):
+    """Pairs (output name, fields) for the attendance certificates of
+    `tickets`, as expected by `generate_certificates`.
+    """
+    return [
+        (str(ticket.keycode), {'name': ticket.customer_full_name})
+        for ticket in tickets
+    ]
+
+
+def event_certificates(event):
+    """Certificates for the tickets of `event` that were not refunded."""
+    tickets = event.all_tickets().filter(refunded_at__isnull=True)
+    return ticket_certificates(tickets.order_by('number'))
+
+
+def get_event_output_dir(event):
+    return get_output_full_name(event.slug)
+
+
+def save_progress(current_job, done, total):
+    current_job.meta['progress'] = {'done': done, 'total': total}
+    current_job.save_meta()
+
+
+@job('low', timeout=3600)
+def generate_certificates(certificates, template='attendance'):
+    """Create the PDF of many certificates, all with the same template.
+
+    The progress is kept in the meta of the job, as `{'done': int,
+    'total': int}`, so it can be followed from the RQ dashboard or with
+    `get_progress`.
+    """
+    current_job = get_current_job()
+    total = len(certificates)
+    filenames = []
+    for filename in create_many_certificates(template, certificates):
+        filenames.append(filename)
+        if current_job and len(filenames) % PROGRESS_STEP == 0:
+            save_progress(current_job, len(filenames), total)
+    if current_job:
+        save_progress(current_job, total, total)
+    return filenames
+
+
+@job('low', timeout=3 * 3600)
+def generate_event_certificates(
+    event, template='attendance', workers=None, force=False, merge=None
+):
+    """Create the certificates of all the attendees of `event` (See
+    `bulk_certificates.create_certificates`), saving the progress in the
+    meta of the job.
+    """
+    current_job = get_current_job()
+
+    def progress(done, total):
+        if current_job:
+            save_progress(current_job, done, total)
+
+    return create_certificates(
+        get_template_full_name(f'{template}.svg'),
+        event_certificates(event),
+        get_event_output_dir(event),
+        workers=workers,
+        force=force,
+        merge=merge,
+        progress=progress,
+    )
+
+
+def get_progress(job_id):
+    """Status and progress of a `generate_certificates` job."""
+    current_job = Job.fetch(job_id, connection=get_connection('low'))
+    return current_job.get_status(), current_job.meta.get('progress')
@@ -0,0 +1,60 @@
+import os
+import re
+import zipfile
+
+import pytest
+
+from apps.certificates.services import bulk_certificates
+from apps.certificates.utils import get_template_full_name
+
+TEMPLATE = get_template_full_name('attendance.svg')
+
+CERTIFICATES = [
+    ('a', {'name': 'Ada'}),
+    ('b', {'name': 'Grace'}),
+    ('c', {'name': 'Margaret'}),
+]
+
+
+def create(output_dir, certificates=CERTIFICATES, **kwargs):
+    return bulk_certificates.create_certificates(
+        TEMPLATE, certificates, str(output_dir),
+        workers=1, chunk_size=2, **kwargs
+    )
+
+
+def test_create_certificates(tmp_path):
+    progress = []
+    report = create(tmp_path, progress=lambda *args: progress.append(args))
+    assert sorted(report.rendered) == ['a', 'b', 'c']
+    assert set(report.timings) == {'a', 'b', 'c'}
+    assert report.timing_stats()[0] > 0
+    assert progress[-1] == (3, 3)
+    for name in 'abc':
+        assert os.path.exists(tmp_path / f'{name}.pdf')
+
+
+def test_interrupted_run_is_resumed(tmp_path):
+    create(tmp_path)
+    os.remove(tmp_path / 'b.pdf')
+    changed = CERTIFICATES[:2] + [('c', {'name': 'Margaret H.'})]
+    report = create(tmp_path, changed)
+    assert sorted(report.rendered) == ['b', 'c']
+    assert report.skipped == ['a']
+    assert create(tmp_path, changed, force=True).skipped == []
+
+
+def test_merge_pdf(tmp_path):
+    report = create(tmp_path, merge='pdf')
+    with open(report.merged, 'rb') as f:
+        assert len(re.findall(rb'/Type /Page\b', f.read())) == 3
+
+
+def test_merge_zip(tmp_path):
+    report = create(tmp_path, merge='zip')
+    with zipfile.ZipFile(report.merged) as zip_file:
+        assert zip_file.namelist() == ['a.pdf', 'b.pdf', 'c.pdf']
+
+
+if __name__ == '__main__':
+    pytest.main()
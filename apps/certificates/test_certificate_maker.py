@@ -0,0 +1,106 @@
+import io
+import os
+import re
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from apps.certificates import tasks, utils
+from apps.certificates.services import pdf_forms
+from apps.certificates.services.certificate_maker import (
+    CertificateDocument,
+    get_template,
+)
+
+TEMPLATE = utils.get_template_full_name('attendance.svg')
+
+
+@pytest.fixture
+def output_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        utils,
+        'get_output_full_name',
+        lambda filename: os.path.join(tmp_path, filename),
+    )
+    return tmp_path
+
+
+def num_pages(pdf_file):
+    with open(pdf_file, 'rb') as f:
+        return len(re.findall(rb'/Type /Page\b', f.read()))
+
+
+def test_template_is_compiled_once():
+    assert get_template(TEMPLATE) is get_template(TEMPLATE)
+
+
+def test_placeholders_are_drawn_per_certificate():
+    template = get_template(TEMPLATE)
+    dynamic = [box for box in template.text_boxes if not box.is_static]
+    assert len(dynamic) == 1
+    assert dynamic[0].text({'name': 'Ada <Lovelace>'}) == 'Ada &lt;Lovelace&gt;'
+
+
+def test_document_with_many_certificates(tmp_path):
+    pdf_file = tmp_path / 'all.pdf'
+    document = CertificateDocument(get_template(TEMPLATE), str(pdf_file))
+    for i in range(3):
+        document.add(name=f'Attendee {i}')
+    document.save()
+    assert num_pages(pdf_file) == 3
+    # The artwork is stored only once, as a form used by every page
+    with open(pdf_file, 'rb') as f:
+        assert f.read().count(b'/Subtype /Form') == 1
+
+
+def test_forms_keep_their_transparencies():
+    # Fails if the internals of the ReportLab pinned in the requirements
+    # change (See `pdf_forms`)
+    output = io.BytesIO()
+    pdf = canvas.Canvas(output, pageCompression=0)
+    pdf.beginForm('background')
+    pdf.setFillAlpha(0.5)
+    pdf.rect(0, 0, 10, 10, fill=1)
+    assert pdf_forms.end_form(pdf, 'background')
+    pdf.doForm('background')
+    pdf.showPage()
+    pdf.save()
+    form = re.search(rb'<<\s*/BBox.*?/Subtype /Form', output.getvalue(), re.S)
+    assert b'/ExtGState' in form.group()
+    assert b'/ca .5' in form.group()
+
+
+def test_document_without_forms(tmp_path, monkeypatch):
+    # As with a ReportLab without the internals needed
+    def end_form(pdf, name):
+        pdf.endForm()
+        return False
+
+    monkeypatch.setattr(pdf_forms, 'end_form', end_form)
+    pdf_file = tmp_path / 'all.pdf'
+    document = CertificateDocument(get_template(TEMPLATE), str(pdf_file))
+    for i in range(2):
+        document.add(name=f'Attendee {i}')
+    document.save()
+    assert not document.use_form
+    assert num_pages(pdf_file) == 2
+
+
+def test_create_certificate(output_dir):
+    pdf_file = utils.create_certificate('attendance', 'abc', name='Ada')
+    assert pdf_file == os.path.join(output_dir, 'abc.pdf')
+    assert num_pages(pdf_file) == 1
+
+
+def test_generate_certificates(output_dir):
+    filenames = tasks.generate_certificates(
+        [('a', {'name': 'Ada'}), ('b', {'name': 'Grace'})]
+    )
+    assert filenames == [
+        os.path.join(output_dir, 'a.pdf'),
+        os.path.join(output_dir, 'b.pdf'),
+    ]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 
 import os
-import re
-import subprocess
 import sys
 import logging
 
+from apps.certificates.services.certificate_maker import (
+    CertificateDocument,
+    get_template,
+)
+
 
 current_module = sys.modules[__name__]
 base_dir = os.path.dirname(current_module.__file__)
@@ -28,31 +31,30 @@ def get_output_full_name(filename, base=base_dir):
     return os.path.join(output_dir, filename)
 
 
-def inkscape_export(source_filename, target_filename, tron=False):
-    commands = [
-        "inkscape",
-        "--export-pdf={}".format(target_filename),
-        source_filename,
-        ]
-    if tron:
-        logger.info(" ".join(commands))
-    subprocess.call(commands)
+def get_certificate_template(template):
+    return get_template(get_template_full_name('{}.svg'.format(template)))
 
 
 def create_certificate(template, output_name, **kwargs):
-
-    def extract_value(match):
-        name = match.group(1)[2:-2].strip()
-        return kwargs.get(name, 'Value {} not found'.format(name))
-
-    pat = re.compile(r'(\{\{.+\}\})')
-    full_input_name = get_template_full_name('{}.svg'.format(template))
-    full_output_name = get_output_full_name('{}.svg'.format(output_name))
-    with open(full_input_name, 'r') as fin:
-        with open(full_output_name, 'w') as fout:
-            template = fin.read()
-            output = pat.sub(extract_value, template)
-            fout.write(output)
     pdf_filename = get_output_full_name('{}.pdf'.format(output_name))
-    inkscape_export(full_output_name, pdf_filename)
+    document = CertificateDocument(
+        get_certificate_template(template), pdf_filename
+    )
+    document.add(**kwargs)
+    document.save()
     return pdf_filename
+
+
+def create_many_certificates(template, certificates):
+    """Create many certificates with the same template, compiled only
+    once. `certificates` are pairs (output name, values of the fields).
+
+    Yields the name of every PDF created.
+    """
+    compiled = get_certificate_template(template)
+    for output_name, fields in certificates:
+        pdf_filename = get_output_full_name('{}.pdf'.format(output_name))
+        document = CertificateDocument(compiled, pdf_filename)
+        document.add(**fields)
+        document.save()
+        yield pdf_filename
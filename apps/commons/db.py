@@ -0,0 +1,15 @@
+"""Helpers for the database connections."""
+
+from django.db import connections
+
+
+def close_connections_before_fork():
+    """Close the database connections before forking worker processes,
+    so they don't share the sockets with the parent process (Django opens
+    new connections in the parent when needed).
+
+    Connections inside a transaction are left open, as closing them would
+    lose it. The workers must never use them.
+    """
+    if not any(conn.in_atomic_block for conn in connections.all()):
+        connections.close_all()
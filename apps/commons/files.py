@@ -0,0 +1,22 @@
+"""Helpers for the files written by the application."""
+
+import contextlib
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def atomic_output(full_name):
+    """Give a temporary path to write to, that replaces `full_name` only
+    when the block finishes without errors, so nobody can read a
+    partially written file.
+    """
+    fd, tmp_name = tempfile.mkstemp(
+        dir=os.path.dirname(full_name), prefix='.', suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_name
+        os.replace(tmp_name, full_name)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
@@ -0,0 +1,13 @@
+"""Helpers to go through many items."""
+
+from itertools import islice
+
+
+def chunks(items, size):
+    """Lists of up to `size` items of any iterable, generators included."""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,114 @@
+"""Delivery of emails.
+
+Messages are built with the helpers of the SendGrid library (`Mail`) and
+delivered by a backend shared by every task in the process, selected with
+the `MAIL_DELIVERY_BACKEND` setting:
+
+- `SendGridBackend` posts the messages to the SendGrid API, reusing the
+  same HTTP session (and its open connections) for every message.
+- `LocalBackend` keeps the messages in memory, for tests and local
+  development.
+
+Tasks that deliver emails should use `RETRY` in their `@job` decorator,
+so temporary failures are retried with backoff (This needs the RQ
+worker to run with `--with-scheduler`). A rejected message is not going
+to be accepted later, so they should call `cancel_retries` before
+raising its `DeliveryError`.
+"""
+
+import json
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rq import Retry, get_current_job
+
+SENDGRID_URL = 'https://api.sendgrid.com/v3/mail/send'
+
+# Retry failed deliveries after 10 seconds, 1 minute and 5 minutes
+RETRY = Retry(max=3, interval=[10, 60, 300])
+
+
+class DeliveryError(Exception):
+    """The message was rejected."""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        super().__init__(f'STATUS CODE: {status_code}\nBODY: {body}')
+
+
+class TransientDeliveryError(DeliveryError):
+    """The message could not be delivered now, but may be later."""
+
+
+class DeliveryResult:
+
+    def __init__(self, status_code, body='', message_id=None):
+        self.status_code = status_code
+        self.body = body
+        # Id given by the provider, to match its delivery events (None if
+        # the backend doesn't report them)
+        self.message_id = message_id
+
+
+class SendGridBackend:
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {settings.SENDGRID_API_KEY}',
+            'Content-Type': 'application/json',
+        })
+
+    def send(self, payload):
+        try:
+            response = self.session.post(
+                SENDGRID_URL,
+                data=json.dumps(payload),
+                timeout=30,
+            )
+        except requests.RequestException as err:
+            raise TransientDeliveryError(None, str(err))
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientDeliveryError(response.status_code, response.text)
+        if response.status_code >= 400:
+            raise DeliveryError(response.status_code, response.text)
+        return DeliveryResult(
+            response.status_code,
+            response.text,
+            response.headers.get('X-Message-Id'),
+        )
+
+
+class LocalBackend:
+    """Keep the payloads sent in `LocalBackend.outbox`."""
+
+    outbox = []
+
+    def send(self, payload):
+        LocalBackend.outbox.append(payload)
+        return DeliveryResult(202)
+
+
+_backends = {}
+
+
+def get_backend():
+    """Backend set in `MAIL_DELIVERY_BACKEND`, one instance per process."""
+    path = settings.MAIL_DELIVERY_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def deliver(message):
+    """Deliver a `Mail`. Raises `DeliveryError` if it was rejected."""
+    return get_backend().send(message.get())
+
+
+def cancel_retries():
+    """Don't retry the running job (if any) when it fails."""
+    job = get_current_job()
+    if job is not None:
+        job.retries_left = 0
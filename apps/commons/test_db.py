@@ -0,0 +1,30 @@
+import pytest
+from django.db import transaction
+
+from . import db
+
+
+@pytest.fixture
+def closed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db.connections, 'close_all', lambda: calls.append(1))
+    return calls
+
+
+@pytest.mark.django_db
+def test_connections_in_a_transaction_are_kept(closed):
+    db.close_connections_before_fork()
+    assert closed == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connections_are_closed(closed):
+    db.close_connections_before_fork()
+    assert closed == [1]
+    with transaction.atomic():
+        db.close_connections_before_fork()
+    assert closed == [1]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,28 @@
+import pytest
+
+from .files import atomic_output
+
+
+def test_atomic_output(tmp_path):
+    full_name = tmp_path / 'out.txt'
+    with atomic_output(str(full_name)) as tmp_name:
+        with open(tmp_name, 'w') as f:
+            f.write('new')
+    assert full_name.read_text() == 'new'
+    assert [p.name for p in tmp_path.iterdir()] == ['out.txt']
+
+
+def test_atomic_output_keeps_the_file_on_errors(tmp_path):
+    full_name = tmp_path / 'out.txt'
+    full_name.write_text('old')
+    with pytest.raises(ValueError):
+        with atomic_output(str(full_name)) as tmp_name:
+            with open(tmp_name, 'w') as f:
+                f.write('partial')
+            raise ValueError()
+    assert full_name.read_text() == 'old'
+    assert [p.name for p in tmp_path.iterdir()] == ['out.txt']
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,16 @@
+import pytest
+
+from .iterables import chunks
+
+
+@pytest.mark.parametrize('items', [list(range(5)), iter(range(5))])
+def test_chunks(items):
+    assert list(chunks(items, 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_chunks_empty():
+    assert list(chunks([], 2)) == []
+
+
+if __name__ == '__main__':
+    pytest.main()
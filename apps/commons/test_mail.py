@@ -0,0 +1,63 @@
+from unittest.mock import Mock
+
+import pytest
+import requests
+from sendgrid.helpers.mail import Content, Email, Mail
+
+from . import mail
+
+
+def create_mail(to_email, body='Hello'):
+    return Mail(
+        from_email=Email('info@example.com', 'Python Canarias'),
+        subject='Subject',
+        to_email=Email(to_email),
+        content=Content('text/html', body),
+    )
+
+
+@pytest.fixture
+def outbox(settings):
+    settings.MAIL_DELIVERY_BACKEND = 'apps.commons.mail.LocalBackend'
+    mail.LocalBackend.outbox = []
+    return mail.LocalBackend.outbox
+
+
+def test_deliver(outbox):
+    mail.deliver(create_mail('a@example.com'))
+    assert outbox[0]['subject'] == 'Subject'
+
+
+@pytest.mark.parametrize('status_code, error', [
+    (400, mail.DeliveryError),
+    (429, mail.TransientDeliveryError),
+    (503, mail.TransientDeliveryError),
+])
+def test_sendgrid_backend_errors(status_code, error):
+    backend = mail.SendGridBackend()
+    backend.session.post = Mock(
+        return_value=Mock(status_code=status_code, text='Error')
+    )
+    with pytest.raises(error) as excinfo:
+        backend.send(create_mail('a@example.com').get())
+    assert excinfo.value.status_code == status_code
+
+
+def test_sendgrid_backend_message_id():
+    backend = mail.SendGridBackend()
+    backend.session.post = Mock(return_value=Mock(
+        status_code=202, text='', headers={'X-Message-Id': 'abc123'}
+    ))
+    result = backend.send(create_mail('a@example.com').get())
+    assert result.message_id == 'abc123'
+
+
+def test_sendgrid_backend_connection_error():
+    backend = mail.SendGridBackend()
+    backend.session.post = Mock(side_effect=requests.ConnectionError)
+    with pytest.raises(mail.TransientDeliveryError):
+        backend.send(create_mail('a@example.com').get())
+
+
+if __name__ == '__main__':
+    pytest.main()
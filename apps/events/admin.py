@@ -7,14 +7,18 @@ from .models import (
     Refund,
     WaitingList,
 )
+from .tasks import render_badges
 
 
 def render_event_badges(modeladmin, request, queryset):
     prints = []
     for event in queryset:
-        prints.append(request.get_host() + event.render_all_badges())
+        render_badges.delay(event)
+        prints.append(request.get_host() + event.badges_url())
     messages.add_message(
-        request, messages.INFO, f"Generated PDFs in -> {' '.join(prints)} "
+        request,
+        messages.INFO,
+        f"Generating PDFs in the background -> {' '.join(prints)} ",
     )
 
 
@@ -0,0 +1,109 @@
+"""Admission control for the sale of tickets.
+
+When the sales of an event with `admission_control` open, buyers don't
+go straight to the purchase form: they get a position in a queue kept in
+Redis, and a page telling them how many people are ahead. Buyers are
+admitted in order, as long as there are fewer than the available tickets
+(and `TICKETS_ADMISSION_MAX_BUYERS`) buying at the same time. Once
+admitted, a buyer has `TICKETS_ADMISSION_SLOT_TIME` seconds to complete
+the purchase; then the slot goes to the next one in the queue.
+
+The keys of an event are:
+
+- `last`: last position given.
+- `admitted`: last position admitted.
+- `active`: sorted set with the positions that can buy, scored by the
+  time their slot expires.
+"""
+
+import time
+
+import django_rq
+from django.conf import settings
+
+# Admit buyers in order while there is room, and return the number of
+# buyers ahead of the position, 0 if it can buy now, or -1 if its slot
+# has expired
+ADMIT_SCRIPT = """
+local active, admitted_key, last_key = KEYS[1], KEYS[2], KEYS[3]
+local now = tonumber(ARGV[1])
+local slot_time = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local position = tonumber(ARGV[4])
+redis.call('ZREMRANGEBYSCORE', active, '-inf', now)
+local admitted = tonumber(redis.call('GET', admitted_key) or '0')
+local last = tonumber(redis.call('GET', last_key) or '0')
+local free = capacity - redis.call('ZCARD', active)
+while free > 0 and admitted < last do
+    admitted = admitted + 1
+    redis.call('ZADD', active, now + slot_time, admitted)
+    free = free - 1
+end
+redis.call('SET', admitted_key, admitted)
+if position > admitted then
+    return position - admitted
+end
+if redis.call('ZSCORE', active, position) then
+    return 0
+end
+return -1
+"""
+
+
+class Admission:
+
+    def __init__(self, event, redis=None):
+        self.event = event
+        self.redis = redis or django_rq.get_connection('default')
+        prefix = f'{settings.REDIS_PREFIX}:events.admission.{event.pk}'
+        self.active_key = f'{prefix}.active'
+        self.admitted_key = f'{prefix}.admitted'
+        self.last_key = f'{prefix}.last'
+        self.session_key = f'events.admission.{event.pk}'
+
+    def capacity(self, active_articles=None):
+        """Maximum number of buyers at the same time.
+
+        `active_articles` are the articles of the event on sale, with the
+        sold tickets annotated, if they are already loaded.
+        """
+        if active_articles is None:
+            active_articles = [
+                article
+                for article in self.event.all_articles()
+                if article.is_active()
+            ]
+        available = sum(
+            article.num_available_tickets for article in active_articles
+        )
+        return max(0, min(settings.TICKETS_ADMISSION_MAX_BUYERS, available))
+
+    def join(self):
+        """Return a new position at the end of the queue."""
+        return self.redis.incr(self.last_key)
+
+    def check(self, position, capacity=None):
+        """Number of buyers ahead of `position`, 0 if it can buy now or
+        -1 if its slot has expired and it has to join the queue again.
+        `capacity` is computed if not given (See `capacity`).
+        """
+        if capacity is None:
+            capacity = self.capacity()
+        admit = self.redis.register_script(ADMIT_SCRIPT)
+        return admit(
+            keys=[self.active_key, self.admitted_key, self.last_key],
+            args=[
+                time.time(),
+                settings.TICKETS_ADMISSION_SLOT_TIME,
+                capacity,
+                position,
+            ],
+        )
+
+    def has_slot(self, position):
+        expires_at = self.redis.zscore(self.active_key, position)
+        return expires_at is not None and expires_at > time.time()
+
+    def release(self, position):
+        """Give the slot of `position` to the next buyer."""
+        self.redis.zrem(self.active_key, position)
@@ -0,0 +1,95 @@
+"""Local stand-in for the parts of the Stripe API we use.
+
+Set `STRIPE_API = 'apps.events.fake_stripe'` to buy tickets without
+connecting to Stripe (See `stripe_utils.get_stripe`). Every token is
+accepted, except `DECLINED_TOKEN`, which raises a `CardError`,
+`UNREACHABLE_TOKEN`, which raises an `APIConnectionError`, and
+`UNPAID_TOKEN`, which gives a charge not paid.
+"""
+
+import itertools
+import re
+
+import stripe
+
+error = stripe.error
+
+api_key = None
+
+DECLINED_TOKEN = 'tok_chargeDeclined'
+UNPAID_TOKEN = 'tok_unpaid'
+UNREACHABLE_TOKEN = 'tok_unreachable'
+
+_ids = itertools.count(1)
+
+
+class StripeObject:
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class Customer:
+
+    created = {}
+
+    @classmethod
+    def create(cls, email, source, description='', idempotency_key=None):
+        if idempotency_key in cls.created:
+            return cls.created[idempotency_key]
+        customer = StripeObject(
+            id=f'cus_fake{next(_ids)}',
+            email=email,
+            source=source,
+            description=description,
+        )
+        cls.created[idempotency_key or customer.id] = customer
+        return customer
+
+
+class Charge:
+
+    created = {}
+
+    @classmethod
+    def create(cls, customer, amount, currency, description='',
+               metadata=None, idempotency_key=None):
+        if idempotency_key in cls.created:
+            return cls.created[idempotency_key]
+        source = next(
+            c.source for c in Customer.created.values() if c.id == customer
+        )
+        if source == DECLINED_TOKEN:
+            raise error.CardError(
+                'Your card was declined.', None, 'card_declined'
+            )
+        if source == UNREACHABLE_TOKEN:
+            raise error.APIConnectionError('Could not connect to Stripe.')
+        charge = StripeObject(
+            id=f'ch_fake{next(_ids)}',
+            customer=customer,
+            amount=amount,
+            currency=currency,
+            description=description,
+            metadata=metadata or {},
+            paid=source != UNPAID_TOKEN,
+        )
+        cls.created[idempotency_key or charge.id] = charge
+        return charge
+
+    @classmethod
+    def search(cls, query):
+        """Only queries for a value of the metadata, such as
+        `metadata['key']:'value'`, are supported.
+        """
+        match = re.fullmatch(r"metadata\['(\w+)'\]:'(.*)'", query)
+        key, value = match.groups()
+        return StripeObject(data=[
+            charge for charge in cls.created.values()
+            if charge.metadata.get(key) == value
+        ])
+
+
+def reset():
+    Customer.created.clear()
+    Charge.created.clear()
@@ -15,6 +15,14 @@ def article_bought(id_article):
     return reverse('events:article_bought', kwargs={'id_article': id_article})
 
 
+def order_detail(keycode):
+    return reverse('events:order_detail', kwargs={'keycode': keycode})
+
+
+def order_status(keycode):
+    return reverse('events:order_status', kwargs={'keycode': keycode})
+
+
 def waiting_list_accepted(slug):
     return reverse('events:waiting_list_accepted', kwargs={
         'slug': slug,
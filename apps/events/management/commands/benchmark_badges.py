@@ -0,0 +1,71 @@
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.events.models import Event
+from apps.events.services import badge_engine
+from utils.console import as_table, cyan
+
+
+class Command(BaseCommand):
+
+    help = 'Compara la distribución de las acreditaciones en las hojas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event', help='Hashtag del evento')
+        parser.add_argument(
+            '-n',
+            '--num_badges',
+            type=int,
+            default=2000,
+            help='Número de acreditaciones (ficticias) a distribuir',
+        )
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=int,
+            default=None,
+            help='Número de procesos que dibujan las acreditaciones',
+        )
+        parser.add_argument(
+            '--plan_only',
+            action='store_true',
+            help='Calcular sólo el plan de las hojas, sin generar el PDF',
+        )
+
+    def handle(self, *args, **options):
+        event = Event.get_by_slug(options['event'])
+        badge = event.badge_set.first()
+        if badge is None:
+            print(cyan(f'El evento {event} no tiene acreditación'))
+            return
+        num_badges = options['num_badges']
+        spec = badge_engine.BadgeSpec(badge)
+        texts = [
+            spec.texts('Attendee', str(i), i, 'General')
+            for i in range(1, num_badges + 1)
+        ]
+        body = []
+        for name, layout_options in (
+            ('grid', {'rotate': False}),
+            ('packed', {}),
+        ):
+            start = time.perf_counter()
+            layout = spec.layout(**layout_options)
+            pages = layout.plan(num_badges)
+            planned = time.perf_counter() - start
+            row = [name, layout.per_page, len(pages), f'{planned * 1000:.1f}']
+            if not options['plan_only']:
+                with tempfile.TemporaryFile() as pdf:
+                    start = time.perf_counter()
+                    badge_engine.render_badges(
+                        spec, texts, pdf, options['workers'], layout
+                    )
+                    elapsed = time.perf_counter() - start
+                row += [f'{elapsed:.2f}', f'{num_badges / elapsed:.1f}']
+            body.append(row)
+        headers = ['Layout', 'Per sheet', 'Pages', 'Plan (ms)']
+        if not options['plan_only']:
+            headers += ['Seconds', 'Badges/s']
+        print(as_table(headers, body))
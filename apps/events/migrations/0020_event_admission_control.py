@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0019_auto_20220516_1802'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='admission_control',
+            field=models.BooleanField(default=False, help_text='Buyers wait in a queue when the ticket sales open'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0020_event_admission_control'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='badge',
+            name='back_image',
+            field=models.ImageField(blank=True, help_text='If set, the badges are printed on both sides', upload_to='events/badges/'),
+        ),
+        migrations.AddField(
+            model_name='badge',
+            name='cut_marks',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='badge',
+            name='print_gap',
+            field=models.PositiveIntegerField(default=0, verbose_name='Space between badges (mm)'),
+        ),
+        migrations.AddField(
+            model_name='badge',
+            name='print_margin',
+            field=models.PositiveIntegerField(default=5, verbose_name='Margin of the sheets (mm)'),
+        ),
+    ]
@@ -6,19 +6,37 @@ from functools import partial
 
 from colorfield.fields import ColorField
 from django.conf import settings
-from django.db import models
-from django.db.models import Max
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
 from django.utils import timezone
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageDraw
 
+from apps.commons.files import atomic_output
 from apps.events import links
 from apps.locations.models import Venue
-from apps.organizations.models import OrganizationRole
-from apps.schedule.models import Track
-from apps.speakers.models import Speaker
-from apps.tickets.models import Ticket
+from apps.organizations.models import (
+    Membership,
+    Organization,
+    OrganizationCategory,
+    OrganizationRole,
+)
+from apps.organizations.services.sponsor_tree import build_sponsor_tree
+from apps.schedule.models import Schedule, Slot, Track
+from apps.schedule.services.schedule_grid import ScheduleGrid
+from apps.speakers.models import Contact, Speaker
+from apps.tickets.models import Ticket, TicketCounter
 
 from . import time_utils
+from .services import badge_engine
+
+SPONSORS_CACHE_TIMEOUT = 86400  # 1 day
 
 
 class Event(models.Model):
@@ -31,6 +49,10 @@ class Event(models.Model):
         help_text="The current event is shown in the events page", default=False
     )
     opened_ticket_sales = models.BooleanField(default=False)
+    admission_control = models.BooleanField(
+        default=False,
+        help_text="Buyers wait in a queue when the ticket sales open",
+    )
     start_date = models.DateField()
     venue = models.ForeignKey(
         Venue, related_name="events", null=True, blank=True, on_delete=models.PROTECT
@@ -120,6 +142,19 @@ class Event(models.Model):
             links.event_detail(self.slug),
         )
 
+    def content_version(self):
+        """Version of the content shown in the page of the event.
+
+        A new version is generated every time the event, its schedule,
+        speakers or sponsors change (See `clear_event_content_cache`), so
+        it can be used as part of the key for caching the rendered page.
+        """
+        return cache.get_or_set(
+            content_version_key(self.pk),
+            lambda: uuid.uuid4().hex,
+            timeout=None,
+        )
+
     def get_long_start_date(self, to_locale=settings.LC_TIME_SPANISH_LOCALE):
         locale.setlocale(locale.LC_TIME, to_locale)
         return self.start_date.strftime("%A %d de %B de %Y").capitalize()
@@ -135,20 +170,17 @@ class Event(models.Model):
         )
 
     def memberships_for_display(self):
-        result = {}
-        for role in self.organization_roles():
-            r = {}
-            for cat in role.organization_categories.order_by("order", "name"):
-                orgs = cat.organizations(self)
-                # insert joint organizations next to its reference
-                for i, org in enumerate(orgs):
-                    for jorg in reversed(org.joint_organizations()):
-                        orgs.insert(i + 1, jorg)
-                if orgs:
-                    r[cat] = orgs
-            if r:
-                result[role] = r
-        return result
+        """Sponsors of the event as a dictionary role -> category -> orgs.
+
+        Built from one query (See `apps.organizations.services.sponsor_tree`)
+        and cached until the content version of the event changes.
+        """
+        key = f"events.event.{self.pk}.sponsors.{self.content_version()}"
+        return cache.get_or_set(
+            key,
+            partial(build_sponsor_tree, self),
+            timeout=SPONSORS_CACHE_TIMEOUT,
+        )
 
     def tracks(self):
         tracks_ids = self.schedule.values_list("track").distinct()
@@ -168,39 +200,12 @@ class Event(models.Model):
     def start_hour(self):
         return time_utils.as_hour(self.start_datetime())
 
-    def _scheduled_items_for_display(self, start=None, end=None):
-        result = {"type": "scheduled_items", "tracks": []}
-        exist_scheduled_item = False
-        for track in self.tracks():
-            scheduled_items = track.schedule_in_range(start, end, event=self)
-            if scheduled_items:
-                exist_scheduled_item = True
-            result["tracks"].append(
-                {"track": track, "scheduled_items": scheduled_items}
-            )
-        if not exist_scheduled_item:
-            result = None
-        return result
-
     def schedule_for_display(self):
-        tracks = self.tracks()
-        result = []
-        if tracks:
-            if len(tracks) > 1:
-                result.append({"type": "tracks", "tracks": tracks})
-            start, end = self.start_datetime(), None
-            for psi in list(self.plenary_scheduled_items()):
-                end = psi.start
-                scheduled_items = self._scheduled_items_for_display(start, end)
-                if scheduled_items:
-                    result.append(scheduled_items)
-                result.append({"type": "plenary_scheduled_item", "schedule": psi})
-                start, end = psi.end, None
-
-            scheduled_items = self._scheduled_items_for_display(start, end)
-            if scheduled_items:
-                result.append(scheduled_items)
-        return result
+        """Rows of tracks and plenary sessions used in `events/event.html`.
+
+        See `apps.schedule.services.schedule_grid.ScheduleGrid`.
+        """
+        return ScheduleGrid(self).rows()
 
     def get_non_org_speakers(self):
         speakers_ids = (
@@ -220,27 +225,40 @@ class Event(models.Model):
         qs = qs.filter(article__event=self)
         return qs
 
+    def tickets_for_rendering(self):
+        """Get all the tickets of the event, ordered by number, with
+        everything drawn on the PDF of the tickets preloaded.
+        """
+        qs = self.all_tickets().select_related(
+            "article__event__venue",
+            "article__category",
+        )
+        return qs.order_by("number")
+
     def all_articles(self):
         """Get all the articles we can sold for a particular event.
 
         Returns a queryset of articles, with select related
-        categorias preloaded, ordered by name.
+        categorias preloaded and the number of sold tickets annotated,
+        ordered by name.
         """
-        qs = self.articles.select_related("category")
+        qs = self.articles.select_related("category").with_sold_tickets()
         qs = qs.order_by("category__name")
         return qs
 
     def num_sold_tickets(self):
-        return sum([a.num_sold_tickets for a in self.articles.all()])
+        return self.all_tickets().filter(refunded_at__isnull=True).count()
 
     def num_available_tickets(self):
-        return sum([a.num_available_tickets for a in self.articles.all()])
+        articles = self.articles.with_sold_tickets()
+        return sum([a.num_available_tickets for a in articles])
 
     def next_ticket_number(self):
-        """Get the number for the next ticket within this event."""
-        data = self.all_tickets().aggregate(Max("number"))
-        current_number = data.get("number__max", 0) or 0
-        return current_number + 1
+        """Allocate the number for the next ticket within this event.
+
+        See `apps.tickets.models.TicketCounter`.
+        """
+        return TicketCounter.next_number(self)
 
     @property
     def qualified_hashtag(self):
@@ -250,82 +268,48 @@ class Event(models.Model):
     def twitter_hashtag_url(self):
         return f"https://twitter.com/hashtag/{self.slug}?f=live"
 
-    def render_all_badges(self, pdf_only=False, remove_badges=True):
+    def render_all_badges(self, processes=None):
         """
-        Render all Badges for this event as images, save them and make an
-        unique PDF with all
-        badges for printing.
-        :param pdf_only: If True, it won't render the intermediate badges,
-        only the final PDF with all the images in the folder.
-        :param remove_badges: If True, remove the intermediate badges to keep
-        the server clean.
-        :return:
+        Render the badges of all the tickets of this event in an unique
+        PDF for printing, using the first Badge of the event.
+        :param processes: Number of processes drawing the badges. Defaults
+        to the number of CPUs.
+        :return: The URL of the PDF, or None if there are no tickets.
         """
         badge = self.badge_set.first()
-        if not pdf_only:
-            for ticket in self.all_tickets():
-                badge.render(ticket)
-        image_dir = os.path.join(settings.MEDIA_ROOT, f"events/{self.slug}/")
-        image_list = os.listdir(image_dir)
-        badges = [
-            Image.open(os.path.join(image_dir, img)).convert("RGB")
-            for img in image_list
-            if img.split(".")[1] != "pdf"
+        if badge is None:
+            return
+        spec = badge_engine.BadgeSpec(badge)
+        texts = [
+            spec.texts(*row)
+            for row in self.all_tickets()
+            .order_by("number")
+            .values_list(
+                "customer_name",
+                "customer_surname",
+                "number",
+                "article__category__name",
+            )
         ]
-        if len(badges) == 0:
+        if not texts:
             return
-        # Calculate the size of the page (A4) depending on the base image dpi.
-        dpi = Image.open(badge.base_image.path).info.get("dpi")
-        if not dpi:
-            print(("There was an error getting the DPI from the badge. " "Aborting"))
-            raise KeyError
-        pdf_pages = []
-        offset_top = 50
-        offset_side = 10
-        x = offset_side
-        y = offset_top
-
-        a4_width = int(210 / 25.4 * dpi[0])
-        a4_height = int(297 / 25.4 * dpi[1])
-        # PDF blank page
-        current = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-        pdf_pages.append(current)
-        for img in badges:
-            width, height = img.size
-            if current is None or y + height >= a4_height:
-                # Create a new PDF page and reset x, y
-                if current not in pdf_pages:
-                    pdf_pages.append(current)
-                x = offset_side
-                y = offset_top
-                current = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-            current.paste(img, (x, y))
-            if x + (width * 2) >= a4_width:  # No more badges in the row
-                x = offset_side
-                y += height
-            else:
-                x += width
-        pdf = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-        pdf_output = os.path.join(image_dir, "print.pdf")
-        pdf.save(
-            pdf_output,
-            "PDF",
-            resolution=100.0,
-            save_all=True,
-            quality=100,
-            append_images=pdf_pages,
-        )
-        del badges
-        if remove_badges:
-            for img in image_list:
-                if img.split(".")[1] != "pdf":
-                    os.remove(os.path.join(image_dir, img))
+        pdf_dir = os.path.join(settings.MEDIA_ROOT, f"events/{self.slug}/")
+        os.makedirs(pdf_dir, exist_ok=True)
+        pdf_output = os.path.join(pdf_dir, "print.pdf")
+        # The PDF may be downloaded while the job renders a new one
+        with atomic_output(pdf_output) as tmp_name:
+            with open(tmp_name, "wb") as pdf:
+                badge_engine.render_badges(spec, texts, pdf, processes)
+        return self.badges_url()
+
+    def badges_url(self):
+        """URL of the PDF made by `render_all_badges`."""
         return f"{settings.MEDIA_URL}events/{self.slug}/print.pdf"
 
 
 class Badge(models.Model):
     event = models.ForeignKey("events.Event", on_delete=models.CASCADE)
-    base_image = models.ImageField(upload_to=f"events/badges/", blank=False)
+    base_image = models.ImageField(upload_to="events/badges/", blank=False)
     # Coordinates start from the top-left corner
     name_coordinates = models.CharField(
         max_length=255,
@@ -344,70 +328,60 @@ class Badge(models.Model):
     )
     category_font_size = models.PositiveIntegerField(default=24)
     category_color = ColorField(default="#FFFFFF")
+    # Printing
+    back_image = models.ImageField(
+        upload_to="events/badges/",
+        blank=True,
+        help_text="If set, the badges are printed on both sides",
+    )
+    print_margin = models.PositiveIntegerField(
+        default=5, verbose_name="Margin of the sheets (mm)"
+    )
+    print_gap = models.PositiveIntegerField(
+        default=0, verbose_name="Space between badges (mm)"
+    )
+    cut_marks = models.BooleanField(default=True)
 
     def __str__(self):
         return f"Badge for {self.event.name}"
 
     @staticmethod
     def coord_to_tuple(coord):
-        return tuple(int(i) for i in coord.split(","))
+        return badge_engine.coord_to_tuple(coord)
 
     @staticmethod
     def _parse_name(name: str, surname: str):
-        name_list = name.split()
-        if len(name_list) >= 2 and len(name_list[1]) > 2:
-            name = f"{name_list[0]} {name_list[1][:1]}."
-
-        return f"{name} \n{surname}"
+        return badge_engine.parse_name(name, surname)
 
     @staticmethod
     def _hex_to_rgb(color: str) -> tuple:
-        return tuple(int(color.lstrip("#")[i : i + 2], 16) for i in (0, 2, 4))
+        return badge_engine.hex_to_rgb(color)
 
     def add_field(
         self, image_draw: ImageDraw, text: str, coord: str, font_size: int, color: str
     ):
-        font = ImageFont.truetype("fonts/arial.ttf", size=font_size)
+        font = badge_engine.get_font(font_size)
         image_draw.text(
             self.coord_to_tuple(coord), text, fill=self._hex_to_rgb(color), font=font
         )
         return image_draw
 
     def render(self, ticket: Ticket):
-        img = Image.open(self.base_image.path)
-        image_draw = ImageDraw.Draw(img)
-        self.add_field(
-            image_draw,
-            self._parse_name(ticket.customer_name, ticket.customer_surname),
-            self.name_coordinates,
-            self.name_font_size,
-            self.name_color,
-        )
-        self.add_field(
-            image_draw,
-            str(ticket.number),
-            self.number_coordinates,
-            self.number_font_size,
-            self.number_color,
-        )
-        self.add_field(
-            image_draw,
+        """Render the badge of a single ticket and save it as PNG."""
+        spec = badge_engine.BadgeSpec(self)
+        base_image, _ = spec.load_base_image()
+        texts = spec.texts(
+            ticket.customer_name,
+            ticket.customer_surname,
+            ticket.number,
             ticket.article.category.name,
-            self.category_coordinates,
-            self.category_font_size,
-            self.category_color,
         )
-        # test
-        path = (
-            f"{settings.MEDIA_ROOT}/events/{self.event.slug}/"
-            "badge_{ticket.number}.png"
+        img = badge_engine.draw_badge(spec, base_image, texts)
+        path = os.path.join(
+            settings.MEDIA_ROOT, f"events/{self.event.slug}/badge_{ticket.number}.png"
         )
-        if not os.path.exists(os.path.dirname(path)):
-            try:
-                os.makedirs(os.path.dirname(path))
-            except OSError:
-                raise
-        img.save(path, quality=100)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        img.save(path)
         return img
 
 
@@ -544,3 +518,233 @@ class Proposal(models.Model):
 
     def __str__(self):
         return f"{self.title} por {self.name} {self.surname}"
+
+
+# Cache of the event page
+
+
+def content_version_key(event_id):
+    return f"events.event.{event_id}.content_version"
+
+
+def clear_event_content_cache(event_ids):
+    """Discard the content version of the pages of the given events.
+
+    The events are found now, but the version is discarded when the
+    transaction commits: before that, a request could render the page
+    again with the old data and keep it under the new version.
+
+    See `Event.content_version` and `events.views.detail_event`.
+    """
+    keys = [content_version_key(pk) for pk in event_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _events_in_schedule(*args, **kwargs):
+    return (
+        Schedule.objects.filter(*args, **kwargs)
+        .values_list("event_id", flat=True)
+        .distinct()
+    )
+
+
+def clear_event_cache_for_event(sender, instance, **kwargs):
+    # Every event page includes a list of the past events
+    clear_event_content_cache(Event.objects.values_list("pk", flat=True))
+
+
+def clear_event_cache_for_schedule(sender, instance, **kwargs):
+    clear_event_content_cache([instance.event_id])
+
+
+def clear_event_cache_for_schedule_speakers(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:  # instance is a speaker
+        event_ids = _events_in_schedule(Q(speakers=instance) | Q(pk__in=pk_set or []))
+    else:
+        event_ids = [instance.event_id]
+    clear_event_content_cache(event_ids)
+
+
+def clear_event_cache_for_slot(sender, instance, **kwargs):
+    clear_event_content_cache(_events_in_schedule(slot=instance))
+
+
+def clear_event_cache_for_slot_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:  # instance is a tag
+        event_ids = _events_in_schedule(
+            Q(slot__tags=instance) | Q(slot__in=pk_set or [])
+        )
+    else:
+        event_ids = _events_in_schedule(slot=instance)
+    clear_event_content_cache(event_ids)
+
+
+def clear_event_cache_for_speaker(sender, instance, **kwargs):
+    clear_event_content_cache(_events_in_schedule(speakers=instance))
+
+
+def clear_event_cache_for_contact(sender, instance, **kwargs):
+    clear_event_content_cache(_events_in_schedule(speakers=instance.speaker_id))
+
+
+def clear_event_cache_for_membership(sender, instance, **kwargs):
+    clear_event_content_cache([instance.event_id])
+
+
+def clear_event_cache_for_organization(sender, instance, **kwargs):
+    event_ids = (
+        Membership.objects.filter(
+            Q(organization=instance) | Q(joint_organization=instance)
+        )
+        .values_list("event_id", flat=True)
+        .distinct()
+    )
+    clear_event_content_cache(event_ids)
+
+
+def clear_event_cache_for_organization_category(sender, instance, **kwargs):
+    clear_event_content_cache(
+        instance.memberships.values_list("event_id", flat=True).distinct()
+    )
+
+
+def clear_event_cache_for_organization_role(sender, instance, **kwargs):
+    clear_event_content_cache(
+        Membership.objects.filter(category__role=instance)
+        .values_list("event_id", flat=True)
+        .distinct()
+    )
+
+
+def clear_event_cache_for_venue(sender, instance, **kwargs):
+    clear_event_content_cache(instance.events.values_list("pk", flat=True))
+
+
+post_save.connect(
+    clear_event_cache_for_event,
+    sender=Event,
+    dispatch_uid="clear_event_cache_for_event",
+)
+
+post_delete.connect(
+    clear_event_cache_for_event,
+    sender=Event,
+    dispatch_uid="clear_event_cache_for_event_on_delete",
+)
+
+post_save.connect(
+    clear_event_cache_for_schedule,
+    sender=Schedule,
+    dispatch_uid="clear_event_cache_for_schedule",
+)
+
+post_delete.connect(
+    clear_event_cache_for_schedule,
+    sender=Schedule,
+    dispatch_uid="clear_event_cache_for_schedule_on_delete",
+)
+
+m2m_changed.connect(
+    clear_event_cache_for_schedule_speakers,
+    sender=Schedule.speakers.through,
+    dispatch_uid="clear_event_cache_for_schedule_speakers",
+)
+
+post_save.connect(
+    clear_event_cache_for_slot,
+    sender=Slot,
+    dispatch_uid="clear_event_cache_for_slot",
+)
+
+m2m_changed.connect(
+    clear_event_cache_for_slot_tags,
+    sender=Slot.tags.through,
+    dispatch_uid="clear_event_cache_for_slot_tags",
+)
+
+post_save.connect(
+    clear_event_cache_for_speaker,
+    sender=Speaker,
+    dispatch_uid="clear_event_cache_for_speaker",
+)
+
+post_save.connect(
+    clear_event_cache_for_contact,
+    sender=Contact,
+    dispatch_uid="clear_event_cache_for_contact",
+)
+
+post_delete.connect(
+    clear_event_cache_for_contact,
+    sender=Contact,
+    dispatch_uid="clear_event_cache_for_contact_on_delete",
+)
+
+post_save.connect(
+    clear_event_cache_for_membership,
+    sender=Membership,
+    dispatch_uid="clear_event_cache_for_membership",
+)
+
+post_delete.connect(
+    clear_event_cache_for_membership,
+    sender=Membership,
+    dispatch_uid="clear_event_cache_for_membership_on_delete",
+)
+
+post_save.connect(
+    clear_event_cache_for_organization,
+    sender=Organization,
+    dispatch_uid="clear_event_cache_for_organization",
+)
+
+post_save.connect(
+    clear_event_cache_for_organization_category,
+    sender=OrganizationCategory,
+    dispatch_uid="clear_event_cache_for_organization_category",
+)
+
+post_save.connect(
+    clear_event_cache_for_organization_role,
+    sender=OrganizationRole,
+    dispatch_uid="clear_event_cache_for_organization_role",
+)
+
+post_save.connect(
+    clear_event_cache_for_venue,
+    sender=Venue,
+    dispatch_uid="clear_event_cache_for_venue",
+)
+
+# Deleted objects are looked for in the pages before they are deleted,
+# while they are still linked to the events
+
+pre_delete.connect(
+    clear_event_cache_for_slot,
+    sender=Slot,
+    dispatch_uid="clear_event_cache_for_slot_on_delete",
+)
+
+pre_delete.connect(
+    clear_event_cache_for_speaker,
+    sender=Speaker,
+    dispatch_uid="clear_event_cache_for_speaker_on_delete",
+)
+
+pre_delete.connect(
+    clear_event_cache_for_organization,
+    sender=Organization,
+    dispatch_uid="clear_event_cache_for_organization_on_delete",
+)
+
+pre_delete.connect(
+    clear_event_cache_for_venue,
+    sender=Venue,
+    dispatch_uid="clear_event_cache_for_venue_on_delete",
+)
@@ -0,0 +1,185 @@
+"""Rendering of the badges of an event for printing.
+
+The badges are drawn in parallel by a pool of processes, every one with
+the base image of the badge decoded only once and the fonts loaded once
+per size. The main process pastes them straight into the pages, as the
+page plan of the layout says (See `badge_layout`), and every page is
+written to the PDF as soon as it is complete (See
+`pdf_stream.JpegPdfWriter`), so the memory used doesn't depend on the
+number of attendees.
+"""
+
+import functools
+import io
+import multiprocessing
+import os
+
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+
+from apps.commons.db import close_connections_before_fork
+
+from .badge_layout import FRONT, BadgeLayout
+from .pdf_stream import POINTS_PER_INCH, JpegPdfWriter
+
+FONT_PATH = os.path.join(settings.BASE_DIR, 'fonts', 'arial.ttf')
+
+JPEG_QUALITY = 95
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(size):
+    return ImageFont.truetype(FONT_PATH, size=size)
+
+
+def hex_to_rgb(color):
+    return tuple(int(color.lstrip('#')[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def coord_to_tuple(coord):
+    return tuple(int(i) for i in coord.split(','))
+
+
+def parse_name(name, surname):
+    name_list = name.split()
+    if len(name_list) >= 2 and len(name_list[1]) > 2:
+        name = f'{name_list[0]} {name_list[1][:1]}.'
+    return f'{name} \n{surname}'
+
+
+class BadgeSpec:
+    """Everything needed to draw and print the badges of a `Badge`
+    design, without references to the database, so it can be sent to
+    other processes.
+    """
+
+    def __init__(self, badge):
+        self.base_image_path = badge.base_image.path
+        self.back_image_path = badge.back_image.path if badge.back_image else None
+        self.fields = [
+            (
+                coord_to_tuple(getattr(badge, f'{name}_coordinates')),
+                getattr(badge, f'{name}_font_size'),
+                hex_to_rgb(getattr(badge, f'{name}_color')),
+            )
+            for name in ('name', 'number', 'category')
+        ]
+        self.margin = badge.print_margin
+        self.gap = badge.print_gap
+        self.cut_marks = badge.cut_marks
+
+    @staticmethod
+    def texts(name, surname, number, category):
+        """Texts of the fields of a badge, in the order of `fields`."""
+        return (parse_name(name, surname), str(number), category)
+
+    def load_base_image(self):
+        with Image.open(self.base_image_path) as img:
+            dpi = img.info.get('dpi')
+            if not dpi:
+                raise ValueError(
+                    f'The base image of the badge has no DPI: '
+                    f'{self.base_image_path}'
+                )
+            return img.convert('RGB'), dpi
+
+    def load_back_image(self, size):
+        with Image.open(self.back_image_path) as img:
+            img = img.convert('RGB')
+        return img if img.size == size else img.resize(size)
+
+    def layout(self, **options):
+        """The `BadgeLayout` for the print options of the design, with
+        `options` overriding them.
+        """
+        base_image, dpi = self.load_base_image()
+        options = {
+            'margin': self.margin,
+            'gap': self.gap,
+            'cut_marks': self.cut_marks,
+            'duplex': self.back_image_path is not None,
+            **options,
+        }
+        dpi = tuple(round(d) for d in dpi)
+        return BadgeLayout(base_image.size, dpi, **options)
+
+
+def draw_badge(spec, base_image, texts):
+    img = base_image.copy()
+    image_draw = ImageDraw.Draw(img)
+    for (coord, font_size, color), text in zip(spec.fields, texts):
+        image_draw.text(coord, text, fill=color, font=get_font(font_size))
+    return img
+
+
+# Every worker of the pool keeps its own copy of the spec and base image
+_worker = {}
+
+
+def init_worker(spec):
+    _worker['spec'] = spec
+    _worker['base_image'], _ = spec.load_base_image()
+
+
+def draw_in_worker(texts):
+    return draw_badge(_worker['spec'], _worker['base_image'], texts)
+
+
+def render_badges(spec, texts, output, processes=None, layout=None):
+    """Render the badges with the `texts` (See `BadgeSpec.texts`) in the
+    PDF `output` (a file opened in binary mode), following the page plan
+    of `layout` (By default, the one of the design).
+
+    Returns the number of pages.
+    """
+    layout = layout or spec.layout()
+    pages = layout.plan(len(texts))
+    back_image = spec.load_back_image(layout.badge) if layout.duplex else None
+    writer = JpegPdfWriter(
+        output,
+        layout.page[0] / layout.dpi[0] * POINTS_PER_INCH,
+        layout.page[1] / layout.dpi[1] * POINTS_PER_INCH,
+    )
+    processes = processes or os.cpu_count() or 1
+    # Enough pages to keep all the processes busy, a few at most
+    batch_size = processes * (2 if layout.duplex else 1)
+    close_connections_before_fork()
+    with multiprocessing.Pool(
+        processes, initializer=init_worker, initargs=(spec,)
+    ) as pool:
+        for start in range(0, len(pages), batch_size):
+            batch = pages[start:start + batch_size]
+            indexes = [
+                index
+                for page in batch if page.side == FRONT
+                for index, _ in page.placements
+            ]
+            drawn = pool.map(
+                draw_in_worker, [texts[i] for i in indexes], chunksize=8
+            )
+            badges = dict(zip(indexes, drawn))
+            for page in batch:
+                write_page(writer, layout, page, badges, back_image)
+    writer.close()
+    return len(pages)
+
+
+def write_page(writer, layout, page, badges, back_image):
+    current = Image.new('RGB', layout.page, (255, 255, 255))
+    for index, slot in page.placements:
+        if page.side == FRONT:
+            img, turn = badges[index], Image.ROTATE_90
+        else:
+            # Mirrored, so the top of the back matches the top of the front
+            img, turn = back_image, Image.ROTATE_270
+        if slot.rotated:
+            img = img.transpose(turn)
+        current.paste(img, (slot.x, slot.y))
+    if page.marks:
+        image_draw = ImageDraw.Draw(current)
+        width = max(1, layout.dpi[0] // 150)
+        for mark in page.marks:
+            image_draw.line(mark, fill=(0, 0, 0), width=width)
+    buff = io.BytesIO()
+    current.save(buff, 'JPEG', quality=JPEG_QUALITY)
+    writer.add_page(buff.getvalue(), *layout.page)
@@ -0,0 +1,243 @@
+"""Layout of the badges in the sheets to print.
+
+`BadgeLayout` finds the arrangement that fits the most badges in a page:
+shelves (rows, or columns) of badges, every shelf with all its badges in
+the same orientation, so badges can be turned 90 degrees to use the space
+left by the others. Then `BadgeLayout.plan` assigns the badges to the
+slots of the pages. The plan depends only on the sizes and options, so
+the same badges always end up in the same places.
+
+All the positions and sizes are in pixels of the base image of the badge,
+with the origin at the top-left corner of the page.
+"""
+
+from typing import NamedTuple, Tuple
+
+A4_MM = (210, 297)
+MM_PER_INCH = 25.4
+
+# Cut marks: distance to the badge and length, in mm
+CUT_MARK_OFFSET = 1
+CUT_MARK_LENGTH = 3
+
+FRONT = 'front'
+BACK = 'back'
+
+
+class Slot(NamedTuple):
+    x: int
+    y: int
+    width: int
+    height: int
+    rotated: bool
+
+
+class PlannedPage(NamedTuple):
+    side: str
+    # Tuples (index of the badge, slot)
+    placements: Tuple[Tuple[int, Slot], ...]
+    # Line segments (x0, y0, x1, y1)
+    marks: Tuple[Tuple[int, int, int, int], ...]
+
+
+def mm_to_px(mm, dpi):
+    return round(mm / MM_PER_INCH * dpi)
+
+
+def fit(length, size, gap):
+    """How many items of `size` fit in `length`, with `gap` between them."""
+    if size > length:
+        return 0
+    return (length + gap) // (size + gap)
+
+
+def shelves(area, badge, gap, rotate):
+    """Best packing of `badge` (width, height) in `area` with horizontal
+    shelves: some rows in one orientation and the rest in the other.
+
+    Returns a list of (orientation is rotated, number of rows, badges
+    per row), in order from the top.
+    """
+    width, height = area
+    orientations = [(badge, False)]
+    if rotate and badge[0] != badge[1]:
+        orientations.append(((badge[1], badge[0]), True))
+    best, best_key = [], (0, 0)
+    for (first, first_rotated), (second, second_rotated) in (
+        (orientations[0], orientations[-1]),
+        (orientations[-1], orientations[0]),
+    ):
+        max_rows = fit(height, first[1], gap)
+        for rows in range(max_rows, -1, -1):
+            used = rows * (first[1] + gap)
+            rest = fit(height - used, second[1], gap)
+            per_row = fit(width, first[0], gap)
+            rest_per_row = fit(width, second[0], gap)
+            count = rows * per_row + rest * rest_per_row
+            rotated = (
+                rows * per_row * first_rotated
+                + rest * rest_per_row * second_rotated
+            )
+            # The most badges; with the same number, the fewest turned
+            key = (count, -rotated)
+            if key > best_key:
+                best_key = key
+                best = [
+                    s for s in (
+                        (first_rotated, rows, per_row),
+                        (second_rotated, rest, rest_per_row),
+                    ) if s[1] and s[2]
+                ]
+    return best
+
+
+def place_shelves(area, badge, gap, plan):
+    """Slots of a shelves `plan`, centered in `area`."""
+    shelf_sizes = [
+        (badge[1], badge[0]) if rotated else badge for rotated, _, _ in plan
+    ]
+    total_height = sum(
+        rows * (size[1] + gap) for (_, rows, _), size in zip(plan, shelf_sizes)
+    ) - gap
+    y = (area[1] - total_height) // 2
+    slots = []
+    for (rotated, rows, per_row), (width, height) in zip(plan, shelf_sizes):
+        row_width = per_row * (width + gap) - gap
+        for _ in range(rows):
+            x = (area[0] - row_width) // 2
+            for _ in range(per_row):
+                slots.append(Slot(x, y, width, height, rotated))
+                x += width + gap
+            y += height + gap
+    return slots
+
+
+class BadgeLayout:
+    """Arrangement of the badges of size `badge` (pixels) in pages of
+    `page_mm` at `dpi`.
+
+    :param margin: Margin of the pages, in mm.
+    :param gap: Space between badges, in mm.
+    :param cut_marks: Draw marks in the margins to guide the cuts.
+    :param duplex: Add a page with the backs of the badges after every
+    page, mirrored so they match when printed on both sides (flipping on
+    the long edge).
+    :param rotate: Allow turning the badges 90 degrees.
+    """
+
+    def __init__(
+        self, badge, dpi, page_mm=A4_MM, margin=5, gap=0,
+        cut_marks=True, duplex=False, rotate=True,
+    ):
+        self.badge = tuple(badge)
+        self.dpi = dpi
+        self.page = (
+            mm_to_px(page_mm[0], dpi[0]),
+            mm_to_px(page_mm[1], dpi[1]),
+        )
+        self.margin = (mm_to_px(margin, dpi[0]), mm_to_px(margin, dpi[1]))
+        self.gap = mm_to_px(gap, dpi[0])
+        self.cut_marks = cut_marks
+        self.duplex = duplex
+        # Turned badges would be distorted if the DPI is not the same in
+        # both axes
+        self.rotate = rotate and dpi[0] == dpi[1]
+        self.slots = self.compute_slots()
+        if not self.slots:
+            raise ValueError('The badge is bigger than the page')
+        self.marks = self.compute_marks() if cut_marks else ()
+
+    @property
+    def per_page(self):
+        return len(self.slots)
+
+    def compute_slots(self):
+        area = (
+            self.page[0] - 2 * self.margin[0],
+            self.page[1] - 2 * self.margin[1],
+        )
+        by_rows = shelves(area, self.badge, self.gap, self.rotate)
+        by_columns = shelves(
+            (area[1], area[0]),
+            (self.badge[1], self.badge[0]),
+            self.gap,
+            self.rotate,
+        )
+
+        def count(plan):
+            return sum(rows * per_row for _, rows, per_row in plan)
+
+        if count(by_columns) > count(by_rows):
+            slots = [
+                Slot(y, x, height, width, rotated)
+                for x, y, width, height, rotated in place_shelves(
+                    (area[1], area[0]),
+                    (self.badge[1], self.badge[0]),
+                    self.gap,
+                    by_columns,
+                )
+            ]
+        else:
+            slots = place_shelves(area, self.badge, self.gap, by_rows)
+        slots = [
+            s._replace(x=s.x + self.margin[0], y=s.y + self.margin[1])
+            for s in slots
+        ]
+        return sorted(slots, key=lambda s: (s.y, s.x))
+
+    def compute_marks(self):
+        """Cut marks for the edges of the slots that face an empty space,
+        so they never fall over a badge.
+        """
+        offset = mm_to_px(CUT_MARK_OFFSET, self.dpi[0])
+        length = mm_to_px(CUT_MARK_LENGTH, self.dpi[0])
+        page_width, page_height = self.page
+
+        def free(x0, y0, x1, y1):
+            return not any(
+                s.x < x1 and x0 < s.x + s.width and s.y < y1 and y0 < s.y + s.height
+                for s in self.slots
+            )
+
+        marks = set()
+        for s in self.slots:
+            right, bottom = s.x + s.width, s.y + s.height
+            if free(s.x, 0, right, s.y):
+                for x in (s.x, right - 1):
+                    marks.add((x, max(0, s.y - offset - length), x, s.y - offset))
+            if free(s.x, bottom, right, page_height):
+                for x in (s.x, right - 1):
+                    marks.add((
+                        x, bottom + offset,
+                        x, min(page_height - 1, bottom + offset + length),
+                    ))
+            if free(0, s.y, s.x, bottom):
+                for y in (s.y, bottom - 1):
+                    marks.add((max(0, s.x - offset - length), y, s.x - offset, y))
+            if free(right, s.y, page_width, bottom):
+                for y in (s.y, bottom - 1):
+                    marks.add((
+                        right + offset, y,
+                        min(page_width - 1, right + offset + length), y,
+                    ))
+        return tuple(sorted(m for m in marks if m[0] <= m[2] and m[1] <= m[3]))
+
+    def mirror(self, slot):
+        return slot._replace(x=self.page[0] - slot.x - slot.width)
+
+    def plan(self, num_badges):
+        """The pages to print `num_badges` badges, in order."""
+        pages = []
+        for start in range(0, num_badges, self.per_page):
+            placements = tuple(
+                (index, slot)
+                for index, slot in zip(range(start, num_badges), self.slots)
+            )
+            pages.append(PlannedPage(FRONT, placements, self.marks))
+            if self.duplex:
+                pages.append(PlannedPage(
+                    BACK,
+                    tuple((i, self.mirror(slot)) for i, slot in placements),
+                    (),
+                ))
+        return pages
@@ -0,0 +1,86 @@
+"""Minimal PDF writer for documents made of full page JPEG images.
+
+Every page is written to the file as soon as it is added, so the memory
+used doesn't grow with the number of pages (Pillow and ReportLab keep the
+whole document in memory until it is saved).
+"""
+
+POINTS_PER_INCH = 72
+
+
+class JpegPdfWriter:
+
+    def __init__(self, output, width, height):
+        """`output` is a file opened in binary mode; `width` and `height`
+        are the size of the pages in points.
+        """
+        self.output = output
+        self.width = width
+        self.height = height
+        self.offsets = {}
+        self.pages = []
+        # Objects 1 and 2 are the catalog and the page tree, written at
+        # the end, when all the pages are known
+        self.next_id = 3
+        self.position = 0
+        self.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def write(self, data):
+        self.output.write(data)
+        self.position += len(data)
+
+    def new_id(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def write_object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.position
+        self.write(f'{obj_id} 0 obj\n'.encode('ascii'))
+        self.write(body.encode('ascii'))
+        if stream is not None:
+            self.write(b'\nstream\n')
+            self.write(stream)
+            self.write(b'\nendstream')
+        self.write(b'\nendobj\n')
+
+    def add_page(self, jpeg, pixel_width, pixel_height):
+        """Add a page with the JPEG image `jpeg` (bytes) covering it."""
+        image_id, content_id, page_id = (
+            self.new_id(), self.new_id(), self.new_id()
+        )
+        self.write_object(
+            image_id,
+            f'<< /Type /XObject /Subtype /Image /Width {pixel_width} '
+            f'/Height {pixel_height} /ColorSpace /DeviceRGB '
+            f'/BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>',
+            jpeg,
+        )
+        content = (
+            f'q {self.width:.2f} 0 0 {self.height:.2f} 0 0 cm /Im0 Do Q'
+        ).encode('ascii')
+        self.write_object(content_id, f'<< /Length {len(content)} >>', content)
+        self.write_object(
+            page_id,
+            f'<< /Type /Page /Parent 2 0 R '
+            f'/MediaBox [0 0 {self.width:.2f} {self.height:.2f}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> >> '
+            f'/Contents {content_id} 0 R >>',
+        )
+        self.pages.append(page_id)
+
+    def close(self):
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.pages)
+        self.write_object(
+            2, f'<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>'
+        )
+        self.write_object(1, '<< /Type /Catalog /Pages 2 0 R >>')
+        xref_position = self.position
+        self.write(f'xref\n0 {self.next_id}\n'.encode('ascii'))
+        self.write(b'0000000000 65535 f \n')
+        for obj_id in range(1, self.next_id):
+            self.write(f'{self.offsets[obj_id]:010d} 00000 n \n'.encode('ascii'))
+        self.write(
+            f'trailer\n<< /Size {self.next_id} /Root 1 0 R >>\n'
+            f'startxref\n{xref_position}\n%%EOF\n'.encode('ascii')
+        )
@@ -1,4 +1,27 @@
+import importlib
+
 import stripe
+from django.conf import settings
+
+
+def get_stripe():
+    """Module with the Stripe API set in `STRIPE_API`: the `stripe`
+    package itself or a stand-in such as `apps.events.fake_stripe`.
+    """
+    api = importlib.import_module(settings.STRIPE_API)
+    api.api_key = settings.STRIPE_SECRET_KEY
+    return api
+
+
+def order_metadata(order):
+    """Metadata of the charge of `order`, to find it (See `find_charges`)."""
+    return {'order': str(order.keycode)}
+
+
+def find_charges(stripe, order):
+    """Charges made for `order` (by `tasks.charge_order`), in Stripe."""
+    query = "metadata['order']:'{}'".format(order.keycode)
+    return stripe.Charge.search(query=query).data
 
 
 def get_description_from_exception(exp):
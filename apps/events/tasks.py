@@ -1,15 +1,30 @@
 import base64
-import os
+import logging
 
-import sendgrid
-from django.conf import settings
 from django.template import loader
 from django.utils import timezone
 from django_rq import job
 from sendgrid.helpers.mail import Attachment, Content, Email, Mail
 
+from apps.commons.mail import (
+    RETRY,
+    DeliveryError,
+    TransientDeliveryError,
+    cancel_retries,
+    deliver,
+)
 from apps.commons.filters import as_markdown
 from apps.organizations.models import Organization
+from apps.tickets.models import Order, Ticket
+from apps.tickets.services import pdf_cache
+
+from .stripe_utils import (
+    get_description_from_exception,
+    get_stripe,
+    order_metadata,
+)
+
+logger = logging.getLogger(__name__)
 
 
 def create_ticket_message(ticket):
@@ -44,20 +59,107 @@ def create_ticket_message(ticket):
     return mail
 
 
-@job
+def deliver_in_job(msg):
+    """Deliver `msg` from a job retried with `RETRY`, but without retrying
+    it when the message is rejected.
+    """
+    try:
+        deliver(msg)
+    except TransientDeliveryError:
+        raise
+    except DeliveryError:
+        cancel_retries()
+        raise
+
+
+@job("default", retry=RETRY)
 def send_ticket(ticket, force=False):
     ticket.as_pdf(force)
     msg = create_ticket_message(ticket)
-    sg = sendgrid.SendGridAPIClient(apikey=settings.SENDGRID_API_KEY)
-    response = sg.client.mail.send.post(request_body=msg.get())
-    if response.status_code >= 400:
-        error_msg = []
-        error_msg.append("STATUS CODE: {}".format(response.status_code))
-        error_msg.append("RESPONSE HEADERS: {}".format(response.headers))
-        error_msg.append("RESPONSE BODY: {}".format(response.body))
-        raise Exception(os.linesep.join(error_msg))
+    deliver_in_job(msg)
     ticket.send_at = timezone.now()
-    ticket.save()
+    ticket.save(update_fields=["send_at"])
+
+
+@job("low", timeout=3600)
+def send_tickets(tickets, force=False):
+    """Send many tickets in a single job, so all of them share the
+    connection to the mail service. The tickets that can't be delivered
+    now are sent again in their own `send_ticket` job, which is retried;
+    any other error is logged, and the job goes on with the next ticket.
+    """
+    for ticket in tickets:
+        try:
+            send_ticket(ticket, force)
+        except TransientDeliveryError:
+            send_ticket.delay(ticket, force)
+        except Exception:
+            logger.exception("Can't send the ticket %s", ticket.pk)
+    pdf_cache.evict(Ticket.get_tickets_dir())
+
+
+@job("default", retry=RETRY)
+def charge_order(order):
+    """Charge the price of the ticket reserved by the order with Stripe.
+
+    If it is paid, the ticket is confirmed and sent; if the card or the
+    request is rejected, the order records why, and the ticket is
+    released. Any other error (A timeout, Stripe unavailable...) fails
+    the job, which is retried: the Stripe calls use the keycode of the
+    order as idempotency key, so running the job twice never charges
+    twice. If it never succeeds, the order expires (See
+    `Order.release_expired`).
+    """
+    order = Order.objects.select_related("ticket__article__event").get(
+        pk=order.pk
+    )
+    if not order.is_pending:
+        return
+    ticket = order.ticket
+    event = ticket.article.event
+    stripe = get_stripe()
+    try:
+        customer = stripe.Customer.create(
+            email=ticket.customer_email,
+            source=order.stripe_token,
+            description="{}, {}".format(
+                ticket.customer_surname, ticket.customer_name
+            ),
+            idempotency_key=f"{order.keycode}-customer",
+        )
+        charge = stripe.Charge.create(
+            customer=customer.id,
+            amount=ticket.article.price_in_cents,
+            currency="EUR",
+            description="{}/{}, {}".format(
+                event.hashtag,
+                ticket.customer_surname,
+                ticket.customer_name,
+            ),
+            metadata=order_metadata(order),
+            idempotency_key=f"{order.keycode}-charge",
+        )
+    except (stripe.error.CardError, stripe.error.InvalidRequestError) as err:
+        msg, extra_info = get_description_from_exception(err)
+        order.failed(Order.ERROR, f"{msg} {extra_info}".strip(), str(err))
+        return
+    if charge.paid:
+        order.paid(charge.id)
+        send_ticket.delay(ticket)
+    else:
+        order.failed(Order.DECLINED, "Pago rechazado", payment_id=charge.id)
+
+
+# --[ Badges ]---------------------------------------------------------
+
+
+@job("low", timeout=3600)
+def render_badges(event, processes=None):
+    """Render the PDF with the badges of all the tickets of `event` (See
+    `Event.render_all_badges`), in a pool of processes out of the web
+    server. Returns its URL.
+    """
+    return event.render_all_badges(processes)
 
 
 # --[ Call for papers ]------------------------------------------------
@@ -83,19 +185,10 @@ def create_proposal_acknowledge(proposal):
     return mail
 
 
-@job
+@job("default", retry=RETRY)
 def send_proposal_acknowledge(proposal):
     msg = create_proposal_acknowledge(proposal)
-    sg = sendgrid.SendGridAPIClient(apikey=settings.SENDGRID_API_KEY)
-    response = sg.client.mail.send.post(request_body=msg.get())
-    if response.status_code >= 400:
-        error_msg = []
-        error_msg.append("STATUS CODE: {}".format(response.status_code))
-        error_msg.append("RESPONSE HEADERS: {}".format(response.headers))
-        error_msg.append("RESPONSE BODY: {}".format(response.body))
-        raise Exception(os.linesep.join(error_msg))
-    # ticket.send_at = timezone.now()
-    # ticket.save()
+    deliver_in_job(msg)
 
 
 def create_proposal_notification(proposal):
@@ -118,16 +211,7 @@ def create_proposal_notification(proposal):
     return mail
 
 
-@job
+@job("default", retry=RETRY)
 def send_proposal_notification(proposal):
     msg = create_proposal_notification(proposal)
-    sg = sendgrid.SendGridAPIClient(apikey=settings.SENDGRID_API_KEY)
-    response = sg.client.mail.send.post(request_body=msg.get())
-    if response.status_code >= 400:
-        error_msg = []
-        error_msg.append("STATUS CODE: {}".format(response.status_code))
-        error_msg.append("RESPONSE HEADERS: {}".format(response.headers))
-        error_msg.append("RESPONSE BODY: {}".format(response.body))
-        raise Exception(os.linesep.join(error_msg))
-    # ticket.send_at = timezone.now()
-    # ticket.save()
+    deliver_in_job(msg)
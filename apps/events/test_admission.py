@@ -0,0 +1,107 @@
+import datetime
+import uuid
+
+import django_rq
+import pytest
+import redis
+from django.utils import timezone
+
+from apps.tickets.models import Article, TicketCategory
+
+from . import views
+from .admission import Admission
+from .models import Event
+
+
+@pytest.fixture
+def admission(settings):
+    connection = django_rq.get_connection('default')
+    try:
+        connection.ping()
+    except redis.ConnectionError:
+        pytest.skip('Needs a Redis server')
+    settings.REDIS_PREFIX = f'test-{uuid.uuid4().hex}'
+    settings.TICKETS_ADMISSION_MAX_BUYERS = 2
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date.today() + datetime.timedelta(days=30),
+        default_slot_duration=datetime.timedelta(minutes=50),
+        opened_ticket_sales=True,
+        admission_control=True,
+    )
+    Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name='General', slug='general'),
+        price=10,
+        stock=10,
+        release_at=timezone.now() - datetime.timedelta(days=1),
+    )
+    admission = Admission(event)
+    yield admission
+    keys = connection.keys(f'{settings.REDIS_PREFIX}:*')
+    if keys:
+        connection.delete(*keys)
+
+
+@pytest.mark.django_db
+def test_buyers_are_admitted_in_order(admission):
+    positions = [admission.join() for _ in range(4)]
+    assert [admission.check(p) for p in positions] == [0, 0, 1, 2]
+    admission.release(positions[0])
+    assert [admission.check(p) for p in positions[1:]] == [0, 0, 1]
+    assert admission.has_slot(positions[2])
+    assert not admission.has_slot(positions[0])
+
+
+@pytest.mark.django_db
+def test_expired_slots_go_to_the_next_buyer(admission, settings):
+    settings.TICKETS_ADMISSION_SLOT_TIME = 0
+    first, second = admission.join(), admission.join()
+    assert admission.check(first) == 0
+    # Both were admitted at once, and their slots are already expired
+    assert admission.check(second) == -1
+    assert not admission.has_slot(first)
+
+
+@pytest.mark.django_db
+def test_capacity_is_limited_by_stock(admission, settings):
+    settings.TICKETS_ADMISSION_MAX_BUYERS = 50
+    assert admission.capacity() == 10
+
+
+@pytest.mark.django_db
+def test_capacity_of_the_articles_given(admission, settings):
+    settings.TICKETS_ADMISSION_MAX_BUYERS = 50
+    articles = list(admission.event.all_articles())
+    articles[0].stock = 3
+    assert admission.capacity(articles) == 3
+
+
+@pytest.mark.django_db
+def test_sold_out_events_have_no_queue(rf, monkeypatch):
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date.today() + datetime.timedelta(days=30),
+        default_slot_duration=datetime.timedelta(minutes=50),
+        opened_ticket_sales=True,
+        admission_control=True,
+    )
+    Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name='General', slug='general'),
+        price=10,
+        stock=0,
+        release_at=timezone.now() - datetime.timedelta(days=1),
+    )
+    monkeypatch.setattr(views, 'admission_queue', None)
+    monkeypatch.setattr(
+        views, 'no_available_articles', lambda *args: 'no articles'
+    )
+    response = views.buy_ticket(rf.get('/'), event.slug)
+    assert response == 'no articles'
+
+
+if __name__ == '__main__':
+    pytest.main()
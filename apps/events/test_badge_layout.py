@@ -0,0 +1,75 @@
+import pytest
+
+from .services.badge_layout import BACK, FRONT, BadgeLayout, fit
+
+# Badges of 96x137 mm at 100 DPI, 4 per A4 page
+BADGE = (380, 540)
+DPI = (100, 100)
+
+
+def overlap(a, b):
+    return (
+        a.x < b.x + b.width and b.x < a.x + a.width
+        and a.y < b.y + b.height and b.y < a.y + a.height
+    )
+
+
+def test_fit():
+    assert fit(100, 30, 0) == 3
+    assert fit(100, 30, 5) == 3
+    assert fit(100, 30, 10) == 2
+    assert fit(20, 30, 0) == 0
+
+
+def test_slots_are_inside_the_margins_and_dont_overlap():
+    layout = BadgeLayout((300, 200), DPI, margin=5, gap=2)
+    margin_x, margin_y = layout.margin
+    for i, slot in enumerate(layout.slots):
+        assert slot.x >= margin_x and slot.y >= margin_y
+        assert slot.x + slot.width <= layout.page[0] - margin_x
+        assert slot.y + slot.height <= layout.page[1] - margin_y
+        assert not any(overlap(slot, other) for other in layout.slots[i + 1:])
+
+
+def test_rotated_badges_fill_the_rest_of_the_page():
+    grid = BadgeLayout((300, 200), DPI, rotate=False)
+    packed = BadgeLayout((300, 200), DPI)
+    assert grid.per_page == 10
+    assert packed.per_page == 11
+    assert any(slot.rotated for slot in packed.slots)
+
+
+def test_plan_is_deterministic():
+    plan = BadgeLayout(BADGE, DPI).plan(10)
+    assert plan == BadgeLayout(BADGE, DPI).plan(10)
+    assert [len(page.placements) for page in plan] == [4, 4, 2]
+    assert [index for page in plan for index, _ in page.placements] == list(
+        range(10)
+    )
+
+
+def test_cut_marks_dont_touch_badges():
+    layout = BadgeLayout(BADGE, DPI, margin=10)
+    assert layout.marks
+    for x0, y0, x1, y1 in layout.marks:
+        for slot in layout.slots:
+            assert not (
+                slot.x <= x1 and x0 < slot.x + slot.width
+                and slot.y <= y1 and y0 < slot.y + slot.height
+            )
+    assert BadgeLayout(BADGE, DPI, cut_marks=False).marks == ()
+
+
+def test_duplex_backs_are_mirrored():
+    layout = BadgeLayout(BADGE, DPI, duplex=True)
+    front, back = layout.plan(3)
+    assert (front.side, back.side) == (FRONT, BACK)
+    assert back.marks == ()
+    for (i, slot), (j, mirrored) in zip(front.placements, back.placements):
+        assert i == j
+        assert mirrored.y == slot.y
+        assert mirrored.x + mirrored.width == layout.page[0] - slot.x
+
+
+if __name__ == '__main__':
+    pytest.main()
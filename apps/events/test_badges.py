@@ -0,0 +1,102 @@
+import datetime
+import os
+import re
+
+import pytest
+from PIL import Image
+
+from apps.tickets.models import Article, Ticket, TicketCategory
+
+from . import admin
+from .models import Badge, Event
+from .services import badge_engine
+
+
+@pytest.fixture
+def badge(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    os.makedirs(tmp_path / 'events' / 'badges')
+    Image.new('RGB', (300, 200), (0, 0, 128)).save(
+        tmp_path / 'events' / 'badges' / 'base.png', dpi=(100, 100)
+    )
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+    )
+    article = Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name='General', slug='general'),
+        price=10,
+        stock=100,
+    )
+    for i in range(12):
+        Ticket.objects.create(
+            article=article,
+            customer_email=f'attendee{i}@example.com',
+            customer_name='Attendee',
+            customer_surname=str(i),
+        )
+    return Badge.objects.create(
+        event=event,
+        base_image='events/badges/base.png',
+        name_coordinates='10,10',
+        number_coordinates='10,100',
+        category_coordinates='10,150',
+    )
+
+
+def num_pages(pdf_file):
+    with open(pdf_file, 'rb') as f:
+        return len(re.findall(rb'/Type /Page\b', f.read()))
+
+
+def test_fonts_are_loaded_once():
+    assert badge_engine.get_font(24) is badge_engine.get_font(24)
+
+
+@pytest.mark.django_db
+def test_render_all_badges(badge, tmp_path):
+    url = badge.event.render_all_badges(processes=2)
+    assert url.endswith('events/pyday/print.pdf')
+    pdf_file = tmp_path / 'events' / 'pyday' / 'print.pdf'
+    # 11 badges of 300x200 fit in an A4 page at 100 DPI
+    assert num_pages(pdf_file) == 2
+    # No intermediate images are left behind
+    assert os.listdir(tmp_path / 'events' / 'pyday') == ['print.pdf']
+
+
+@pytest.mark.django_db
+def test_admin_renders_badges_in_a_job(badge, rf, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(admin.render_badges, 'delay', jobs.append)
+    monkeypatch.setattr(admin.messages, 'add_message', lambda *args: None)
+    events = Event.objects.filter(pk=badge.event.pk)
+    admin.render_event_badges(None, rf.get('/admin/'), events)
+    assert jobs == [badge.event]
+
+
+@pytest.mark.django_db
+def test_render_all_badges_duplex(badge, tmp_path):
+    Image.new('RGB', (300, 200), (255, 255, 255)).save(
+        tmp_path / 'events' / 'badges' / 'back.png'
+    )
+    badge.back_image = 'events/badges/back.png'
+    badge.save()
+    badge.event.render_all_badges(processes=2)
+    assert num_pages(tmp_path / 'events' / 'pyday' / 'print.pdf') == 4
+
+
+@pytest.mark.django_db
+def test_render_single_badge(badge, tmp_path):
+    ticket = badge.event.all_tickets().order_by('number').last()
+    img = badge.render(ticket)
+    assert img.size == (300, 200)
+    assert os.path.exists(
+        tmp_path / 'events' / 'pyday' / f'badge_{ticket.number}.png'
+    )
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,136 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+from apps.locations.models import Location, Venue
+from apps.organizations.models import (
+    Membership,
+    Organization,
+    OrganizationCategory,
+    OrganizationRole,
+)
+from apps.schedule.models import Schedule, Slot, SlotCategory
+from apps.speakers.models import Speaker
+
+from .models import Event
+
+
+@pytest.fixture
+def event():
+    return Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+    )
+
+
+@pytest.fixture
+def schedule(event):
+    venue = Venue.objects.create(name='Venue', slug='venue')
+    start = timezone.make_aware(datetime.datetime(2030, 11, 16, 10, 0))
+    return Schedule.objects.create(
+        event=event,
+        location=Location.objects.create(venue=venue, name='Room'),
+        slot=Slot.objects.create(
+            name='Talk',
+            category=SlotCategory.objects.create(code='talk', name='Talk'),
+        ),
+        start=start,
+        end=start + datetime.timedelta(minutes=50),
+    )
+
+
+@pytest.mark.django_db
+def test_content_version_is_stable(event):
+    assert event.content_version() == event.content_version()
+
+
+@pytest.fixture
+def commit(django_capture_on_commit_callbacks):
+    """Run the block and the callbacks of its commit."""
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+@pytest.mark.django_db
+def test_content_version_changes_with_event(event, commit):
+    version = event.content_version()
+    with commit():
+        event.closed_schedule = True
+        event.save()
+    assert event.content_version() != version
+
+
+@pytest.mark.django_db
+def test_content_version_changes_on_commit(
+    event, django_capture_on_commit_callbacks
+):
+    version = event.content_version()
+    with django_capture_on_commit_callbacks() as callbacks:
+        event.closed_schedule = True
+        event.save()
+        assert event.content_version() == version
+    for callback in callbacks:
+        callback()
+    assert event.content_version() != version
+
+
+@pytest.mark.django_db
+def test_content_version_changes_with_schedule(event, schedule, commit):
+    version = event.content_version()
+    with commit():
+        schedule.language = Schedule.ENGLISH
+        schedule.save()
+    assert event.content_version() != version
+
+
+@pytest.mark.django_db
+def test_content_version_changes_with_slot_and_speakers(
+    event, schedule, commit
+):
+    version = event.content_version()
+    with commit():
+        schedule.slot.name = 'Another talk'
+        schedule.slot.save()
+    assert event.content_version() != version
+    version = event.content_version()
+    with commit():
+        speaker = Speaker.objects.create(
+            name='Ada', surname='L', slug='ada', bio=''
+        )
+        schedule.speakers.add(speaker)
+    assert event.content_version() != version
+    version = event.content_version()
+    with commit():
+        speaker.bio = 'Mathematician'
+        speaker.save()
+    assert event.content_version() != version
+    version = event.content_version()
+    with commit():
+        speaker.delete()
+    assert event.content_version() != version
+
+
+@pytest.mark.django_db
+def test_content_version_changes_with_sponsors(event, commit):
+    version = event.content_version()
+    role = OrganizationRole.objects.create(name='Sponsor', code='sponsor')
+    category = OrganizationCategory.objects.create(
+        name='Gold', code='gold', role=role
+    )
+    organization = Organization.objects.create(name='ACME')
+    with commit():
+        Membership.objects.create(
+            event=event, organization=organization, category=category
+        )
+    assert event.content_version() != version
+    version = event.content_version()
+    with commit():
+        organization.url = 'https://acme.example.com/'
+        organization.save()
+    assert event.content_version() != version
+
+
+if __name__ == '__main__':
+    pytest.main()
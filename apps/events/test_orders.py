@@ -0,0 +1,162 @@
+import datetime
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.tickets.models import Article, Order, SoldOut, TicketCategory
+
+from . import fake_stripe, tasks
+from .models import Event
+
+
+@pytest.fixture
+def stripe_api(settings):
+    settings.STRIPE_API = 'apps.events.fake_stripe'
+    fake_stripe.reset()
+
+
+@pytest.fixture
+def sent_tickets(stripe_api, monkeypatch):
+    sent = []
+    monkeypatch.setattr(tasks.charge_order, 'delay', tasks.charge_order)
+    monkeypatch.setattr(tasks.send_ticket, 'delay', sent.append)
+    return sent
+
+
+@pytest.fixture
+def article():
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date.today() + datetime.timedelta(days=30),
+        default_slot_duration=datetime.timedelta(minutes=50),
+    )
+    return Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name='General', slug='general'),
+        price=10,
+        stock=1,
+        release_at=timezone.now() - datetime.timedelta(days=1),
+    )
+
+
+def create_order(article, token='tok_visa'):
+    ticket = article.reserve_ticket(
+        customer_email='attendee@example.com',
+        customer_name='Ada',
+        customer_surname='Lovelace',
+    )
+    return Order.objects.create(
+        article=article, ticket=ticket, stripe_token=token
+    )
+
+
+@pytest.mark.django_db
+def test_charge_order_paid(article, sent_tickets):
+    order = create_order(article)
+    tasks.charge_order(order)
+    # Running it again doesn't charge twice
+    tasks.charge_order(order)
+    order.refresh_from_db()
+    assert order.status == Order.PAID
+    assert order.stripe_token == ''
+    assert order.ticket.payment_id == order.payment_id
+    assert sent_tickets == [order.ticket]
+    assert len(fake_stripe.Charge.created) == 1
+    charge, = fake_stripe.Charge.created.values()
+    assert charge.amount == 1000
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('token, status', [
+    (fake_stripe.DECLINED_TOKEN, Order.ERROR),
+    (fake_stripe.UNPAID_TOKEN, Order.DECLINED),
+])
+def test_charge_order_failed_releases_ticket(
+    article, sent_tickets, token, status
+):
+    order = create_order(article, token)
+    tasks.charge_order(order)
+    order.refresh_from_db()
+    assert order.status == status
+    assert order.message
+    assert order.ticket is None
+    assert article.tickets.count() == 0
+    assert sent_tickets == []
+
+
+@pytest.mark.django_db
+def test_charge_order_keeps_ticket_on_transient_errors(article, sent_tickets):
+    order = create_order(article, fake_stripe.UNREACHABLE_TOKEN)
+    with pytest.raises(fake_stripe.error.APIConnectionError):
+        tasks.charge_order(order)
+    order.refresh_from_db()
+    assert order.is_pending
+    assert order.ticket is not None
+
+
+def expire(order):
+    Order.objects.filter(pk=order.pk).update(
+        created_at=timezone.now() - Order.PENDING_TIMEOUT * 2
+    )
+
+
+@pytest.mark.django_db
+def test_expired_orders_release_their_tickets(article, stripe_api):
+    order = create_order(article)
+    with pytest.raises(SoldOut):
+        create_order(article)
+    expire(order)
+    create_order(article)
+    order.refresh_from_db()
+    assert order.status == Order.ERROR
+    assert order.ticket is None
+    assert article.tickets.count() == 1
+
+
+@pytest.mark.django_db
+def test_expired_orders_with_charges_are_kept(article, sent_tickets):
+    order = create_order(article)
+    # The job charged the order, but died before recording it
+    tasks.charge_order(order)
+    Order.objects.filter(pk=order.pk).update(status=Order.PENDING)
+    expire(order)
+    with pytest.raises(SoldOut):
+        create_order(article)
+    order.refresh_from_db()
+    assert order.status == Order.ERROR
+    assert order.ticket is not None
+    assert 'ch_fake' in order.message
+
+
+@pytest.mark.django_db
+def test_unknown_orders_are_not_found(client):
+    keycode = '00000000-0000-0000-0000-000000000000'
+    response = client.get(reverse('events:order_status', args=[keycode]))
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_purchase_flow(client, article, sent_tickets):
+    response = client.post(
+        reverse('events:ticket_purchase', args=[article.pk]),
+        {
+            'stripeEmail': 'attendee@example.com',
+            'stripeToken': 'tok_visa',
+            'name': 'Ada',
+            'surname': 'Lovelace',
+            'phone': '',
+        },
+    )
+    order = Order.objects.get()
+    order_url = reverse('events:order_detail', args=[order.keycode])
+    assert response.url == order_url
+    status_url = reverse('events:order_status', args=[order.keycode])
+    assert client.get(status_url).json() == {'status': Order.PAID}
+    response = client.get(order_url)
+    assert response.url == reverse('events:article_bought', args=[article.pk])
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -8,6 +8,8 @@ from unittest.mock import Mock
 import pytest
 from django.core.mail import EmailMessage
 
+from apps.commons.mail import DeliveryError, TransientDeliveryError
+
 from . import tasks
 
 
@@ -66,5 +68,41 @@ def test_send_ticket(test_ticket):
     tasks.send_ticket(test_ticket)
 
 
+def test_send_tickets_goes_on_after_errors(monkeypatch):
+    errors = {
+        1: TransientDeliveryError(503, 'Unavailable'),
+        2: DeliveryError(400, 'Bad request'),
+        3: ValueError('No PDF'),
+    }
+
+    def send(ticket, force=False):
+        if ticket.pk in errors:
+            raise errors[ticket.pk]
+
+    send_ticket = Mock(side_effect=send)
+    monkeypatch.setattr(tasks, 'send_ticket', send_ticket)
+    monkeypatch.setattr(tasks.pdf_cache, 'evict', Mock())
+    tickets = [Mock(pk=pk) for pk in range(5)]
+    tasks.send_tickets(tickets)
+    assert send_ticket.call_count == 5
+    # Only the transient error is sent again, in a job that is retried
+    send_ticket.delay.assert_called_once_with(tickets[1], False)
+
+
+@pytest.mark.parametrize('error, cancelled', [
+    (TransientDeliveryError(503, 'Unavailable'), []),
+    (DeliveryError(400, 'Bad request'), [True]),
+])
+def test_deliver_in_job_only_retries_transient_errors(
+    monkeypatch, error, cancelled
+):
+    calls = []
+    monkeypatch.setattr(tasks, 'deliver', Mock(side_effect=error))
+    monkeypatch.setattr(tasks, 'cancel_retries', lambda: calls.append(True))
+    with pytest.raises(DeliveryError):
+        tasks.deliver_in_job(Mock())
+    assert calls == cancelled
+
+
 if __name__ == '__main__':
     pytest.main()
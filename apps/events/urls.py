@@ -60,6 +60,16 @@ urlpatterns = [
         views.ticket_purchase,
         name='ticket_purchase',
     ),
+    path(
+        'ticket/order/<uuid:keycode>/',
+        views.order_detail,
+        name='order_detail',
+    ),
+    path(
+        'ticket/order/<uuid:keycode>/status/',
+        views.order_status,
+        name='order_status',
+    ),
     path(
         'ticket/purchase/<int:id_article>/nocc/',  # no credit card
         views.ticket_purchase_nocc,
@@ -1,22 +1,32 @@
 import datetime
 import logging
 
-import stripe
 from django.conf import settings
-from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-from django.shortcuts import redirect, render
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.safestring import mark_safe
 from apps.organizations.models import Organization
-from apps.tickets.models import Article, Gift, Raffle, Ticket
+from apps.tickets.models import Article, Gift, Order, Raffle, SoldOut
 
-from . import forms, links, stripe_utils
+from . import forms, links
+from .admission import Admission
 from .models import Event, Refund, WaitingList
-from .tasks import send_ticket, send_proposal_acknowledge, send_proposal_notification
+from .tasks import (
+    charge_order,
+    send_ticket,
+    send_proposal_acknowledge,
+    send_proposal_notification,
+)
 from .forms import ProposalForm
 
 logger = logging.getLogger(__name__)
 
+EVENT_BODY_CACHE_TIMEOUT = 86400  # 1 día
+
 
 def index(request):
     return redirect("events:next")
@@ -41,6 +51,21 @@ def next(request):
         return render(request, "events/list-events.html", {"events": events.all()})
 
 
+def render_event_body(request, context):
+    """Render the body of the event page, using the cache if possible.
+
+    The key includes the content version of the event, so any change in
+    the event, its schedule, speakers or sponsors discards the cached copy.
+    """
+    event = context["event"]
+    key = f"events.event.{event.pk}.body.{event.content_version()}"
+    body = cache.get(key)
+    if body is None:
+        body = render_to_string("events/includes/event-body.html", context, request)
+        cache.set(key, body, timeout=EVENT_BODY_CACHE_TIMEOUT)
+    return mark_safe(body)
+
+
 def detail_event(request, slug):
     event = Event.get_by_slug(slug)
     past_events = (
@@ -48,11 +73,10 @@ def detail_event(request, slug):
         .exclude(pk=event.id)
         .order_by("-start_date")[:3]
     )
-    return render(
-        request,
-        "events/event.html",
-        {"event": event, "past_events": past_events},
-    )
+    context = {"event": event, "past_events": past_events}
+    if request.user.is_anonymous:
+        context["event_body"] = render_event_body(request, context)
+    return render(request, "events/event.html", context)
 
 
 def call_for_papers(request, event):
@@ -195,28 +219,26 @@ def trade(request, slug, sell_code, buy_code):
     )
 
 
-def stripe_payment_declined(request, charge):
+def stripe_payment_declined(request, charge_id):
     organization = Organization.load_main_organization()
     return render(
         request,
         "events/payment-declined.html",
         {
             "email": organization.email,
-            "charge_id": charge.id,
+            "charge_id": charge_id,
         },
     )
 
 
-def stripe_payment_error(request, exception):
-    msg, extra_info = stripe_utils.get_description_from_exception(exception)
+def stripe_payment_error(request, msg, error):
     organization = Organization.load_main_organization()
     return render(
         request,
         "events/payment-error.html",
         {
             "msg": msg,
-            "extra_info": extra_info,
-            "error": str(exception),
+            "error": error,
             "email": organization.email,
         },
     )
@@ -237,14 +259,58 @@ def buy_ticket(request, slug):
     num_active_articles = len(active_articles)
     # num_active_articles = 1
     if num_active_articles == 0:
+        # Nobody would be admitted, so there is no queue to wait in
         return no_available_articles(request, event, all_articles)
-    elif num_active_articles == 1:
+    if event.admission_control:
+        waiting = admission_queue(request, event, active_articles)
+        if waiting:
+            return waiting
+    if num_active_articles == 1:
         article = active_articles[0]
         return redirect(links.ticket_purchase(article.pk))
     else:
         return select_article(request, event, all_articles, active_articles)
 
 
+def admission_queue(request, event, active_articles):
+    """Keep the buyer in the admission queue of the event, if needed.
+
+    Returns the page with the position in the queue while waiting, or
+    None when the buyer can go on with the purchase.
+    """
+    admission = Admission(event)
+    capacity = admission.capacity(active_articles)
+    position = request.session.get(admission.session_key)
+    ahead = admission.check(position, capacity) if position else -1
+    if ahead < 0:
+        position = admission.join()
+        request.session[admission.session_key] = position
+        ahead = admission.check(position, capacity)
+    if ahead == 0:
+        return None
+    return render(
+        request,
+        "events/admission-queue.html",
+        {
+            "event": event,
+            "ahead": ahead,
+        },
+    )
+
+
+def has_purchase_slot(request, event):
+    admission = Admission(event)
+    position = request.session.get(admission.session_key)
+    return bool(position) and admission.has_slot(position)
+
+
+def release_purchase_slot(request, event):
+    admission = Admission(event)
+    position = request.session.pop(admission.session_key, None)
+    if position:
+        admission.release(position)
+
+
 def no_available_articles(request, event, all_articles):
     organization = Organization.load_main_organization()
     return render(
@@ -270,57 +336,43 @@ def select_article(request, event, all_articles, active_articles):
 
 
 def ticket_purchase(request, id_article):
-    article = Article.objects.select_related("event").get(pk=id_article)
+    article = (
+        Article.objects.select_related("event")
+        .with_sold_tickets()
+        .get(pk=id_article)
+    )
     assert article.is_active(), "Este tipo de entrada no está ya disponible."
     event = article.event
+    if event.admission_control and not has_purchase_slot(request, event):
+        return redirect("events:buy_ticket", slug=event.slug)
     if request.method == "POST":
         email = request.POST["stripeEmail"]
         name = request.POST["name"]
         surname = request.POST["surname"]
         phone = request.POST.get("phone", None)
         token = request.POST["stripeToken"]
-        stripe.api_key = settings.STRIPE_SECRET_KEY
+        # The ticket is reserved now, so the stock can't be sold twice,
+        # and the card is charged in the background (See `charge_order`)
         try:
-            customer = stripe.Customer.create(
-                email=email,
-                source=token,
-                description="{}, {}".format(surname, name),
-            )
-            charge = stripe.Charge.create(
-                customer=customer.id,
-                amount=article.price_in_cents,
-                currency="EUR",
-                description="{}/{}, {}".format(
-                    event.hashtag,
-                    surname,
-                    name,
-                ),
+            ticket = article.reserve_ticket(
+                customer_name=name,
+                customer_surname=surname,
+                customer_email=email,
+                customer_phone=phone,
             )
-            if charge.paid:
-                ticket = Ticket(
-                    article=article,
-                    customer_name=name,
-                    customer_surname=surname,
-                    customer_email=email,
-                    customer_phone=phone,
-                    payment_id=charge.id,
-                )
-                ticket.save()
-                send_ticket.delay(ticket)
-                return redirect(links.article_bought(article.pk))
-            else:
-                return stripe_payment_declined(request, charge)
-        except stripe.error.StripeError as err:
-            logger.error("Error de stripe")
-            logger.error(str(err))
-            return stripe_payment_error(request, err)
-        except Exception as err:
-            logger.error("Error en el pago por stripe")
-            logger.error(str(err))
-            messages.add_message(request, messages.ERROR, "Hello world.")
-            from django.http import HttpResponse
-
-            return HttpResponse("Something goes wrong\n{}".format(err))
+        except SoldOut:
+            if event.admission_control:
+                release_purchase_slot(request, event)
+            return no_available_articles(request, event, [article])
+        order = Order.objects.create(
+            article=article,
+            ticket=ticket,
+            stripe_token=token,
+        )
+        charge_order.delay(order)
+        if event.admission_control:
+            release_purchase_slot(request, event)
+        return redirect(links.order_detail(order.keycode))
     else:
         return render(
             request,
@@ -333,8 +385,38 @@ def ticket_purchase(request, id_article):
         )
 
 
+def order_detail(request, keycode):
+    """Wait for the payment of an order, polling `order_status`."""
+    order = get_object_or_404(
+        Order.objects.select_related("article__event"), keycode=keycode
+    )
+    if order.status == Order.PAID:
+        return redirect(links.article_bought(order.article.pk))
+    if order.status == Order.DECLINED:
+        return stripe_payment_declined(request, order.payment_id)
+    if order.status == Order.ERROR:
+        return stripe_payment_error(request, order.message, order.error)
+    return render(
+        request,
+        "events/order-pending.html",
+        {
+            "event": order.article.event,
+            "order": order,
+        },
+    )
+
+
+def order_status(request, keycode):
+    order = get_object_or_404(Order.objects.only("status"), keycode=keycode)
+    return JsonResponse({"status": order.status})
+
+
 def ticket_purchase_nocc(request, id_article):
-    article = Article.objects.select_related("event").get(pk=id_article)
+    article = (
+        Article.objects.select_related("event")
+        .with_sold_tickets()
+        .get(pk=id_article)
+    )
     assert article.is_active(), "Este tipo de entrada no está ya disponible."
 
     template = "events/ticket-purchase-nocc.html"
@@ -342,7 +424,11 @@ def ticket_purchase_nocc(request, id_article):
 
 
 def article_bought(request, id_article):
-    article = Article.objects.select_related("event").get(pk=id_article)
+    article = (
+        Article.objects.select_related("event")
+        .with_sold_tickets()
+        .get(pk=id_article)
+    )
     assert article.is_active(), "Este tipo de entrada no está ya disponible."
     event = article.event
     organization = Organization.load_main_organization()
@@ -4,6 +4,7 @@ from django.contrib import admin
 from django.utils.safestring import mark_safe
 
 from .models import Client, Concept, Invoice
+from .tasks import schedule_render
 
 
 @admin.register(Client)
@@ -20,25 +21,43 @@ class ConceptInline(admin.StackedInline):
 
 
 def set_active(modeladmin, request, queryset):
-    queryset.update(active=True)
+    # Saved one by one, so their PDF is rendered again
+    for invoice in queryset.filter(active=False):
+        invoice.active = True
+        invoice.save()
 
 
 set_active.short_description = 'Activate selected invoices.'
 
 
 def set_inactive(modeladmin, request, queryset):
-    queryset.update(active=False)
+    for invoice in queryset.filter(active=True):
+        invoice.active = False
+        invoice.save()
 
 
 set_inactive.short_description = 'Deactivate selected invoices.'
 
 
+def render_pdf(modeladmin, request, queryset):
+    queryset.update(pdf_digest='')
+    for invoice in queryset:
+        schedule_render(invoice, force=True)
+    modeladmin.message_user(
+        request, f'Rendering the PDF of {len(queryset)} invoices.'
+    )
+
+
+render_pdf.short_description = 'Render the PDF of selected invoices again.'
+
+
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
     inlines = [
         ConceptInline,
     ]
     list_filter = ('date', 'organization', 'event', 'active')
+    list_select_related = ('organization', 'event')
     list_display = (
         '__str__',
         'date',
@@ -58,11 +77,13 @@ class InvoiceAdmin(admin.ModelAdmin):
     readonly_fields = ('invoice_number', )
     ordering = ('-date', )
 
-    actions = [set_active, set_inactive]
+    actions = [set_active, set_inactive, render_pdf]
 
     def invoice_pdf(self, invoice):
+        if not invoice.is_rendered:
+            return 'Rendering…'
         if not os.path.isfile(invoice.path):
-            invoice.render()
+            return '-'
         url = invoice.filename_url()
         return mark_safe('<a href="{}" download>Download</a>'.format(url))
 
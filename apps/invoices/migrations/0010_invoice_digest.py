@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0009_auto_20220510_2236'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='digest',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_digest',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:13
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def compute_concepts_total(apps, schema_editor):
+    Invoice = apps.get_model('invoices', 'Invoice')
+    output_field = DecimalField(max_digits=12, decimal_places=2)
+    invoices = Invoice.objects.annotate(
+        total=Coalesce(
+            Sum(
+                F('concept__amount') * F('concept__quantity'),
+                output_field=output_field,
+            ),
+            Value(Decimal('0')),
+            output_field=output_field,
+        )
+    )
+    for invoice in invoices:
+        Invoice.objects.filter(pk=invoice.pk).update(
+            _concepts_total=invoice.total
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0010_invoice_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='_concepts_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(compute_concepts_total, migrations.RunPython.noop),
+    ]
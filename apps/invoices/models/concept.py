@@ -1,4 +1,16 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, pre_delete
+
+from ..services.invoice_maker import invoice_digest
+from .invoice import Invoice, concepts_sum
+
+# Invoices being deleted right now: their concepts are deleted with them,
+# and there is nothing to update
+_deleting_invoices = set()
 
 
 class Concept(models.Model):
@@ -16,3 +28,57 @@ class Concept(models.Model):
 
     def __str__(self):
         return self.description
+
+
+def update_invoice(sender, instance, **kwargs):
+    """Update the total and the digest of the invoice of a deleted
+    concept, without saving the whole invoice, and render its PDF again.
+
+    Nothing is done when the concept is deleted with its invoice.
+    """
+    from ..tasks import schedule_render
+
+    if instance.invoice_id in _deleting_invoices:
+        return
+    invoices = Invoice.objects.filter(pk=instance.invoice_id)
+    invoice = invoices.first()
+    if invoice is None:
+        return
+    total = (
+        Concept.objects.filter(invoice=OuterRef('pk'))
+        .values('invoice')
+        .annotate(total=concepts_sum())
+        .values('total')
+    )
+    invoice.digest = invoice_digest(invoice)
+    invoices.update(
+        _concepts_total=Coalesce(Subquery(total), Value(Decimal('0'))),
+        digest=invoice.digest,
+    )
+    if not invoice.is_rendered:
+        transaction.on_commit(lambda: schedule_render(invoice))
+
+
+def start_invoice_delete(sender, instance, **kwargs):
+    _deleting_invoices.add(instance.pk)
+
+
+def end_invoice_delete(sender, instance, **kwargs):
+    _deleting_invoices.discard(instance.pk)
+
+
+post_delete.connect(
+    update_invoice,
+    sender=Concept,
+    dispatch_uid='invoices.concept.update_invoice',
+)
+pre_delete.connect(
+    start_invoice_delete,
+    sender=Invoice,
+    dispatch_uid='invoices.concept.start_invoice_delete',
+)
+post_delete.connect(
+    end_invoice_delete,
+    sender=Invoice,
+    dispatch_uid='invoices.concept.end_invoice_delete',
+)
@@ -3,13 +3,31 @@ from datetime import date
 from decimal import Decimal
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.commons.files import atomic_output
 
 from ..constants import RETENTION_CHOICES, RETENTION_MULTIPLIER, TAX_CHOICES, TAX_MULTIPLIER
-from ..services.invoice_maker import InvoiceMaker
+from ..services.invoice_maker import InvoiceMaker, invoice_digest
+
+
+def concepts_sum(prefix=''):
+    """Sum of the amounts of the concepts (`prefix` is the lookup to the
+    concepts), computed by the database."""
+    output_field = DecimalField(max_digits=12, decimal_places=2)
+    return Coalesce(
+        Sum(
+            F(f'{prefix}amount') * F(f'{prefix}quantity'),
+            output_field=output_field,
+        ),
+        Value(Decimal('0')),
+        output_field=output_field,
+    )
 
 
-class InvoiceManager(models.Manager):
+class InvoiceQuerySet(models.QuerySet):
 
     def for_year(self, year):
         first_day = date(year, 1, 1)
@@ -22,6 +40,12 @@ class InvoiceManager(models.Manager):
     def for_organization(self, organization):
         return self.filter(organization=organization)
 
+    def with_concepts_total(self):
+        """Annotate `concepts_sum`, the total of the concepts computed now
+        by the database, instead of the one stored when the invoice was
+        saved."""
+        return self.annotate(concepts_sum=concepts_sum('concept__'))
+
 
 class Invoice(models.Model):
     date = models.DateField()
@@ -34,7 +58,18 @@ class Invoice(models.Model):
 
     active = models.BooleanField(default=True)
 
-    objects = InvoiceManager()
+    # Digest of the content (See `invoice_digest`) when it was last saved,
+    # and the one of the PDF rendered (See `tasks.render_invoice`)
+    digest = models.CharField(max_length=16, blank=True, editable=False)
+    pdf_digest = models.CharField(max_length=16, blank=True, editable=False)
+
+    # Total of the concepts, updated every time the invoice or one of its
+    # concepts are saved (See `Concept`)
+    _concepts_total = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, editable=False
+    )
+
+    objects = InvoiceQuerySet.as_manager()
 
     @property
     def concepts_total(self):
@@ -43,13 +78,17 @@ class Invoice(models.Model):
         :return: total amount for invoice
         :rtype: Decimal
         """
-        return sum([concept.amount * concept.quantity for concept in self.concept_set.all()]).quantize(Decimal('0.01'))
+        if hasattr(self, 'concepts_sum'):
+            # Annotated by `InvoiceQuerySet.with_concepts_total`
+            return self.concepts_sum.quantize(Decimal('0.01'))
+        return Decimal(self._concepts_total).quantize(Decimal('0.01'))
 
     @property
     def total(self):
-        total = self.concepts_total
-        total -= self.concepts_total * RETENTION_MULTIPLIER[self.retention] / 100
-        total += self.concepts_total * TAX_MULTIPLIER[self.taxes] / 100
+        subtotal = self.concepts_total
+        total = subtotal
+        total -= subtotal * RETENTION_MULTIPLIER[self.retention] / 100
+        total += subtotal * TAX_MULTIPLIER[self.taxes] / 100
 
         return total.quantize(Decimal('0.01'))
 
@@ -67,11 +106,26 @@ class Invoice(models.Model):
         filename = self.filename
         return '/'.join([media_root, invoices_uri, filename]).replace('//', '/')
 
+    @property
+    def is_rendered(self):
+        """The PDF is up to date with the last saved content."""
+        return self.pdf_digest == self.digest
+
     def save(self, *args, **kwargs):
+        from ..tasks import schedule_render
+
         if not self.invoice_number:
             self.invoice_number = self.next_invoice_number()
-        self.render()
-        return super(Invoice, self).save(*args, **kwargs)
+        if self.pk:
+            self._concepts_total = self.concept_set.aggregate(
+                total=concepts_sum()
+            )['total']
+        self.digest = invoice_digest(self)
+        result = super(Invoice, self).save(*args, **kwargs)
+        # The PDF is rendered by a worker, with the data committed
+        if not self.is_rendered:
+            transaction.on_commit(lambda: schedule_render(self))
+        return result
 
     def next_invoice_number(self):
         year = self.date.year
@@ -83,7 +137,11 @@ class Invoice(models.Model):
         return '{}{:06d}'.format(str(self.date.year)[-2:], self.invoice_number)
 
     def render(self):
-        invoice_rendered = InvoiceMaker(self)
+        """Render the PDF now. Usually this is done by a worker, after
+        saving (See `tasks.render_invoice`)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with atomic_output(self.path) as tmp_name:
+            invoice_rendered = InvoiceMaker(self, tmp_name)
         return invoice_rendered
 
     def __str__(self):
@@ -1,3 +1,5 @@
+import functools
+import hashlib
 import os
 import subprocess
 import sys
@@ -20,15 +22,70 @@ from reportlab.platypus import (
 
 from apps.organizations.models import Organization
 
+FONTS_PATH = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), 'resources', 'fonts'
+)
+
+ORGANIZATION_FIELDS = (
+    'name', 'address', 'rest_address', 'postal_code', 'city', 'cif',
+)
+MAIN_ORGANIZATION_FIELDS = ORGANIZATION_FIELDS + ('iban', 'email', 'url')
+
+
+def invoice_digest(invoice):
+    """Digest of everything drawn in the PDF of `invoice`.
+
+    Two invoices with the same digest render exactly the same PDF, so it
+    is rendered again only if the digest changes.
+    """
+    main_organization = Organization.load_main_organization()
+    organization = invoice.organization
+    concepts = (
+        invoice.concept_set.order_by('-amount', 'pk') if invoice.pk else []
+    )
+    content = (
+        invoice.date.isoformat(),
+        invoice.invoice_number,
+        invoice.taxes,
+        invoice.retention,
+        invoice.active,
+        [getattr(main_organization, f) for f in MAIN_ORGANIZATION_FIELDS],
+        organization
+        and [getattr(organization, f) for f in ORGANIZATION_FIELDS],
+        [(c.description, c.quantity, str(c.amount)) for c in concepts],
+    )
+    return hashlib.sha256(repr(content).encode('utf-8')).hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=None)
+def register_fonts(font):
+    """Parse and register the family of `font`, only once per process."""
+    italic = '{}It'.format(font)
+    bold = '{}Bd'.format(font)
+    bold_italic = '{}BdIt'.format(font)
+    for name, filename in (
+        (font, 'DejaVuSans.ttf'),
+        (italic, 'DejaVuCondensedSansOblique.ttf'),
+        (bold, 'DejaVuSansBold.ttf'),
+        (bold_italic, 'DejaVuSansBoldOblique.ttf'),
+    ):
+        pdfmetrics.registerFont(
+            TTFont(name, os.path.join(FONTS_PATH, filename))
+        )
+    registerFontFamily(
+        font, normal=font, bold=bold, italic=italic, boldItalic=bold_italic
+    )
+
 
 class InvoiceMaker(object):
     PAGE_HEIGHT = A4[1]
     PAGE_WIDTH = A4[0]
 
-    def __init__(self, invoice):
+    def __init__(self, invoice, filename=None):
         self.python_canarias = Organization.load_main_organization()
 
         self.invoice = invoice
+        self.filename = filename or invoice.path
 
         self._configure_fonts('DejaVu')
         self._set_style()
@@ -63,12 +120,12 @@ class InvoiceMaker(object):
         )
 
         # check if target directory exists
-        dirname = os.path.dirname(self.invoice.path)
+        dirname = os.path.dirname(self.filename)
         if not os.path.exists(dirname):
             os.mkdir(dirname)
 
         self.sheet_style = BaseDocTemplate(
-            self.invoice.path,
+            self.filename,
             pagesize=A4,
             pageTemplates=[self.first_page],
             showBoundary=0,
@@ -125,36 +182,7 @@ class InvoiceMaker(object):
         self.bold = '{}Bd'.format(self.normal)
         self.bold_italic = '{}BdIt'.format(self.normal)
 
-        fonts_path = os.path.join(
-            os.path.dirname(os.path.realpath(__file__)), 'resources', 'fonts'
-        )
-
-        pdfmetrics.registerFont(
-            TTFont(self.normal, os.path.join(fonts_path, 'DejaVuSans.ttf'))
-        )
-        pdfmetrics.registerFont(
-            TTFont(
-                self.italic,
-                os.path.join(fonts_path, 'DejaVuCondensedSansOblique.ttf'),
-            )
-        )
-        pdfmetrics.registerFont(
-            TTFont(self.bold, os.path.join(fonts_path, 'DejaVuSansBold.ttf'))
-        )
-        pdfmetrics.registerFont(
-            TTFont(
-                self.bold_italic,
-                os.path.join(fonts_path, 'DejaVuSansBoldOblique.ttf'),
-            )
-        )
-
-        registerFontFamily(
-            self.normal,
-            normal=self.normal,
-            bold=self.bold,
-            italic=self.italic,
-            boldItalic=self.bold_italic,
-        )
+        register_fonts(self.normal)
 
     @staticmethod
     def _open_file(filename):
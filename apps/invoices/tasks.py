@@ -0,0 +1,61 @@
+from django_rq import get_connection, job
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+
+from .models import Invoice
+from .services.invoice_maker import invoice_digest
+
+PENDING = (
+    JobStatus.QUEUED,
+    JobStatus.STARTED,
+    JobStatus.DEFERRED,
+    JobStatus.SCHEDULED,
+)
+
+
+@job('low')
+def render_invoice(invoice_id, force=False):
+    """Render the PDF of an invoice, unless it is already up to date with
+    its current content.
+    """
+    invoice = (
+        Invoice.objects.select_related('organization')
+        .filter(pk=invoice_id)
+        .first()
+    )
+    if invoice is None:
+        return
+    # The content may have changed since the job was enqueued
+    digest = invoice_digest(invoice)
+    if not force and invoice.pdf_digest == digest:
+        return
+    invoice.render()
+    # Not with `save`, that would enqueue the job again
+    Invoice.objects.filter(pk=invoice.pk).update(
+        digest=digest, pdf_digest=digest
+    )
+
+
+def render_job_id(invoice):
+    return f'invoice-pdf-{invoice.pk}-{invoice.digest}'
+
+
+def pending_job(job_id):
+    try:
+        current_job = Job.fetch(job_id, connection=get_connection('low'))
+    except NoSuchJobError:
+        return None
+    return current_job if current_job.get_status() in PENDING else None
+
+
+def schedule_render(invoice, force=False):
+    """Enqueue the rendering of the PDF of `invoice`, once for every
+    version of its content: if a job for the same content is waiting,
+    that one is returned.
+    """
+    job_id = render_job_id(invoice)
+    if force:
+        job_id = f'{job_id}-force'
+    return pending_job(job_id) or render_invoice.delay(
+        invoice.pk, force=force, job_id=job_id
+    )
@@ -0,0 +1,125 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from apps.events.models import Event
+from apps.organizations.admin import MembershipAdmin
+from apps.organizations.models import (
+    Membership,
+    Organization,
+    OrganizationCategory,
+    OrganizationRole,
+)
+
+from .admin import InvoiceAdmin
+from .constants import IGIC_7, RETENTION_6
+from .models import Concept, Invoice
+
+
+@pytest.fixture
+def event():
+    cache.clear()
+    Organization.objects.create(name='Python Canarias')
+    return Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+    )
+
+
+def create_invoice(event, name, *amounts):
+    organization = Organization.objects.create(name=name)
+    invoice = Invoice.objects.create(
+        date=datetime.date(2030, 1, 1),
+        event=event,
+        organization=organization,
+        taxes=IGIC_7,
+        retention=RETENTION_6,
+    )
+    for amount in amounts:
+        Concept.objects.create(
+            invoice=invoice,
+            description='Patrocinio',
+            quantity=2,
+            amount=Decimal(amount),
+        )
+    return invoice
+
+
+def admin_rows(model_admin, fields):
+    request = RequestFactory().get('/')
+    queryset = model_admin.get_queryset(request).select_related(
+        *model_admin.list_select_related
+    )
+    return [
+        [str(getattr(obj, field)) for field in fields] for obj in queryset
+    ]
+
+
+@pytest.mark.django_db
+def test_concepts_total_is_updated(event):
+    invoice = create_invoice(event, 'ACME', '100.50', '20')
+    assert invoice.concepts_total == Decimal('241.00')
+    assert invoice.total == Decimal('243.41')
+    invoice.concept_set.first().delete()
+    invoice.refresh_from_db()
+    assert invoice.concepts_total == Decimal('40.00')
+    annotated = Invoice.objects.with_concepts_total().get()
+    assert annotated.concepts_sum == Decimal('40.00')
+
+
+@pytest.mark.django_db
+def test_deleting_the_last_concept(event):
+    invoice = create_invoice(event, 'ACME', '100.50')
+    invoice.concept_set.get().delete()
+    invoice.refresh_from_db()
+    assert invoice.concepts_total == Decimal('0.00')
+
+
+@pytest.mark.django_db
+def test_deleting_an_invoice_doesnt_render_it(
+    event, django_capture_on_commit_callbacks
+):
+    invoice = create_invoice(event, 'ACME', '100.50', '20')
+    with django_capture_on_commit_callbacks() as callbacks:
+        invoice.concept_set.first().delete()
+    assert len(callbacks) == 1
+    with django_capture_on_commit_callbacks() as callbacks:
+        invoice.delete()
+    assert callbacks == []
+    assert not Concept.objects.exists()
+
+
+@pytest.mark.django_db
+def test_listings_take_constant_queries(event, django_assert_num_queries):
+    role = OrganizationRole.objects.create(name='Sponsor', code='sponsor')
+    category = OrganizationCategory.objects.create(
+        name='Gold', code='gold', role=role
+    )
+    for i in range(3):
+        invoice = create_invoice(event, f'Sponsor {i}', '500')
+        Membership.objects.create(
+            event=event,
+            organization=invoice.organization,
+            category=category,
+        )
+    with django_assert_num_queries(1):
+        rows = admin_rows(
+            InvoiceAdmin(Invoice, site), ('organization', 'event', 'total')
+        )
+    assert rows[0] == ['Sponsor 0', 'PyDay', '1010.00']
+    with django_assert_num_queries(1):
+        rows = admin_rows(
+            MembershipAdmin(Membership, site),
+            ('organization', 'category', 'amount'),
+        )
+    assert rows[0] == ['Sponsor 0', 'Gold', '1000.00']
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,71 @@
+import datetime
+import os
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+
+from apps.organizations.models import Organization
+
+from . import tasks
+from .admin import InvoiceAdmin
+from .models import Concept, Invoice
+
+
+@pytest.fixture
+def scheduled(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+    cache.clear()
+    jobs = []
+
+    def delay(invoice_id, force=False, job_id=None):
+        jobs.append(job_id)
+
+    monkeypatch.setattr(tasks.render_invoice, 'delay', delay)
+    monkeypatch.setattr(tasks, 'pending_job', lambda job_id: None)
+    return jobs
+
+
+def create_organization(name, cif):
+    return Organization.objects.create(
+        name=name,
+        cif=cif,
+        address='Calle Mayor 1',
+        postal_code='38001',
+        city='Santa Cruz de Tenerife',
+        iban='ES00 0000 0000 0000 0000 0000',
+    )
+
+
+@pytest.fixture
+def invoice():
+    create_organization('Python Canarias', 'G00000000')
+    client = create_organization('ACME', 'B00000000')
+    return Invoice.objects.create(
+        date=datetime.date(2024, 5, 1), organization=client
+    )
+
+
+@pytest.mark.django_db
+def test_save_schedules_render(
+    scheduled, invoice, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        Concept.objects.create(
+            invoice=invoice, description='Patrocinio', amount=Decimal('500')
+        )
+    assert scheduled == [tasks.render_job_id(invoice)]
+    assert not invoice.is_rendered
+    assert InvoiceAdmin.invoice_pdf(None, invoice) == 'Rendering…'
+    tasks.render_invoice(invoice.pk)
+    invoice.refresh_from_db()
+    assert invoice.is_rendered
+    assert os.path.isfile(invoice.path)
+    # Saving with the same content doesn't render it again
+    with django_capture_on_commit_callbacks(execute=True):
+        invoice.save()
+    assert len(scheduled) == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -3,6 +3,23 @@ from django.contrib import admin
 from .models import Member, Position, Membership
 
 
+class ActiveListFilter(admin.SimpleListFilter):
+    """Filter by the `active()` method of the queryset of the model."""
+
+    title = 'active'
+    parameter_name = 'active'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Yes'), ('no', 'No'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.active()
+        if self.value() == 'no':
+            return queryset.exclude(pk__in=queryset.active().values('pk'))
+        return queryset
+
+
 class MembershipInline(admin.StackedInline):
     model = Membership
     extra = 0
@@ -11,13 +28,19 @@ class MembershipInline(admin.StackedInline):
 
 @admin.register(Member)
 class MemberAdmin(admin.ModelAdmin):
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related('user').with_active()
+
     def active(self, obj):
         return obj.active
     active.boolean = True
+    active.admin_order_field = 'is_active'
 
     raw_id_fields = ['user']
     list_display = ('full_name', 'user', 'email', 'member_id', 'active',
                     'is_founder')
+    list_filter = (ActiveListFilter, 'is_founder')
     search_fields = ('id', 'user__first_name', 'user__last_name',
                      'user__email')
     inlines = (MembershipInline, )
@@ -31,7 +54,8 @@ class PositionAdmin(admin.ModelAdmin):
 
     raw_id_fields = ['member']
     list_display = ('member', 'position', 'since', 'until', 'active')
-    list_filter = ('since', 'until')
+    list_select_related = ('member__user',)
+    list_filter = (ActiveListFilter, 'since', 'until')
     search_fields = ('member__user__first_name', 'member__user__last_name',
                      'member__user__username', 'member__user__email')
 
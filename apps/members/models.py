@@ -2,6 +2,14 @@ import datetime
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import (
+    BooleanField,
+    Exists,
+    ExpressionWrapper,
+    OuterRef,
+    Q,
+    Subquery,
+)
 
 from .constants import (
     DEFAULT_MEMBERSHIP_PERIOD,
@@ -12,8 +20,39 @@ from .constants import (
 )
 
 
+class MemberQuerySet(models.QuerySet):
+
+    def with_active(self):
+        """Annotate `is_active`, the same as `Member.active`, computed by
+        the database: the member has some membership, and the last one
+        (the one that started last) has not expired.
+        """
+        last_membership = Membership.objects.filter(
+            member=OuterRef('pk')
+        ).order_by('-valid_from', '-pk')
+        return self.annotate(
+            has_membership=Exists(last_membership),
+            last_valid_until=Subquery(
+                last_membership.values('valid_until')[:1]
+            ),
+        ).annotate(
+            is_active=ExpressionWrapper(
+                Q(has_membership=True) & (
+                    Q(last_valid_until__isnull=True)
+                    | Q(last_valid_until__gte=datetime.date.today())
+                ),
+                output_field=BooleanField(),
+            )
+        )
+
+    def active(self):
+        return self.with_active().filter(is_active=True)
+
+
 class Member(models.Model):
 
+    objects = MemberQuerySet.as_manager()
+
     class Meta:
         ordering = ('id', 'user__first_name', 'user__last_name')
         verbose_name = 'Socio'
@@ -56,6 +95,9 @@ class Member(models.Model):
 
     @property
     def active(self):
+        if hasattr(self, 'is_active'):
+            # Annotated by `MemberQuerySet.with_active`
+            return self.is_active
         last_membership = self.membership_set.last()
         if last_membership is None:
             return False
@@ -63,7 +105,18 @@ class Member(models.Model):
         return valid_until is None or datetime.date.today() <= valid_until
 
 
+class PositionQuerySet(models.QuerySet):
+
+    def active(self):
+        """Positions not expired, the same as `Position.active`."""
+        return self.filter(
+            Q(until__isnull=True) | Q(until__gte=datetime.date.today())
+        )
+
+
 class Position(models.Model):
+    objects = PositionQuerySet.as_manager()
+
     member = models.ForeignKey(Member, on_delete=models.PROTECT)
     position = models.CharField(max_length=3, choices=MEMBER_POSITION.CHOICES)
     since = models.DateField()
@@ -122,4 +175,4 @@ class Membership(models.Model):
             self.valid_until = self.valid_from + datetime.timedelta(
                 days=DEFAULT_MEMBERSHIP_PERIOD
             )
-        super().save(args, kwargs)
+        super().save(*args, **kwargs)
@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+from django.contrib.auth.models import User
+
+from .models import Member, Membership, Position
+
+TODAY = datetime.date.today()
+DAY = datetime.timedelta(days=1)
+
+
+def create_member(username, *valid_untils):
+    member = Member.objects.create(
+        user=User.objects.create(username=username),
+        email=f'{username}@example.com',
+    )
+    for i, valid_until in enumerate(valid_untils):
+        Membership.objects.create(
+            member=member,
+            valid_from=TODAY - (100 - i) * DAY,
+            valid_until=valid_until,
+        )
+    return member
+
+
+@pytest.fixture
+def members():
+    return {
+        'without_membership': create_member('a'),
+        'expired': create_member('b', TODAY - DAY),
+        'current': create_member('c', TODAY),
+        'renewed': create_member('d', TODAY - DAY, TODAY + DAY),
+        'last_expired': create_member('e', TODAY + DAY, TODAY - DAY),
+    }
+
+
+@pytest.mark.django_db
+def test_active_members(members):
+    active = set(Member.objects.active())
+    assert active == {members['current'], members['renewed']}
+
+
+@pytest.mark.django_db
+def test_annotation_matches_property(members, django_assert_num_queries):
+    expected = {m.pk: m.active for m in members.values()}
+    with django_assert_num_queries(1):
+        annotated = {m.pk: m.active for m in Member.objects.with_active()}
+    assert annotated == expected
+
+
+@pytest.mark.django_db
+def test_active_positions(members):
+    member = members['current']
+    old = Position.objects.create(
+        member=member, position='PRE', since=TODAY - 10 * DAY, until=TODAY - DAY
+    )
+    current = Position.objects.create(
+        member=member, position='SEC', since=TODAY - 10 * DAY
+    )
+    assert list(Position.objects.active()) == [current]
+    assert not old.active and current.active
+
+
+if __name__ == '__main__':
+    pytest.main()
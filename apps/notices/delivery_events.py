@@ -0,0 +1,76 @@
+"""Status of the notices from the delivery events of the mail provider.
+
+SendGrid accepts a message long before it is delivered, or bounced, so
+`tasks.send_notice` only records the id of the message. SendGrid posts
+then its events to the webhook (See `views.delivery_events`), in batches
+of many events, and all the notices of a batch are updated with a single
+query.
+"""
+
+import datetime
+
+from django.db.models import Case, CharField, DateTimeField, F, Value, When
+from django.utils import timezone
+
+from .models import Notice
+
+DELIVERED = 'delivered'
+REJECTED = ('bounce', 'dropped')
+
+REJECT_MESSAGE_LENGTH = Notice._meta.get_field('reject_message').max_length
+
+
+def message_id(event):
+    """Id of the message, as returned when it was sent. The id of the
+    event (`sg_message_id`) adds to it a suffix after a dot.
+    """
+    return event.get('sg_message_id', '').split('.', 1)[0]
+
+
+def last_states(events):
+    """The last state of every message in `events`, as a mapping from the
+    message id to a tuple (delivered at, rejected at, reject message).
+    The events that don't change the status of a notice are ignored.
+    """
+    last = {}
+    for event in events:
+        kind = event.get('event')
+        if kind != DELIVERED and kind not in REJECTED:
+            continue
+        key = message_id(event)
+        timestamp = int(event.get('timestamp', 0))
+        if not key or timestamp < last.get(key, (0,))[0]:
+            continue
+        at = datetime.datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        if kind == DELIVERED:
+            state = (at, None, None)
+        else:
+            reason = event.get('reason') or event.get('type') or kind
+            state = (None, at, str(reason)[:REJECT_MESSAGE_LENGTH])
+        last[key] = (timestamp, state)
+    return {key: state for key, (_, state) in last.items()}
+
+
+def update_notices(events):
+    """Apply the delivery `events` (As posted by SendGrid) to the notices,
+    with one UPDATE. Returns the number of notices updated.
+    """
+    states = last_states(events)
+    if not states:
+        return 0
+
+    def column(index, field, output_field):
+        return Case(
+            *[
+                When(message_id=key, then=Value(state[index]))
+                for key, state in states.items()
+            ],
+            default=F(field),
+            output_field=output_field,
+        )
+
+    return Notice.objects.filter(message_id__in=states).update(
+        delivered_at=column(0, 'delivered_at', DateTimeField()),
+        rejected_at=column(1, 'rejected_at', DateTimeField()),
+        reject_message=column(2, 'reject_message', CharField()),
+    )
@@ -1,18 +1,25 @@
+import time
 from inspect import getmembers, isfunction
 
 from django.core.management.base import BaseCommand
 
+from apps.commons.iterables import chunks
 from apps.notices import repository
 from apps.notices.models import Notice, NoticeKind
 from apps.notices.tasks import (
+    SEND_CHUNK_SIZE,
     create_notice_body,
     create_notice_message,
-    task_send_notice,
+    send_notices,
 )
 from utils.console import as_table, cyan, green, red, yes_no
 
 NOTICE_KIND = dict(getmembers(repository, isfunction))
 
+# Candidates of a notice kind checked and queued at a time, so the memory
+# used doesn't depend on the number of members
+RUN_BATCH_SIZE = 1000
+
 
 class Command(BaseCommand):
 
@@ -117,27 +124,50 @@ class Command(BaseCommand):
         is_verbose = options.get('verbose')
         is_check = options.get('check')
         body = []
+        report = []
         for kind in NoticeKind.objects.filter(enabled=True).all():
             code = NOTICE_KIND.get(kind.code)
-            if not code:
+            if not callable(code):
                 print(red(f"ERROR: No existe {kind.code}"))
                 continue
-            if callable(code):
-                for ref_date, member in code(days=kind.days):
-                    notice = kind.notice_has_been_send(member, ref_date)
-                    if notice:
-                        status = green("[Skipped]")
-                    else:
-                        if is_check:
-                            status = green("[Notice would be queued]")
+            start = time.perf_counter()
+            num_candidates = num_queued = 0
+            for candidates in chunks(code(days=kind.days), RUN_BATCH_SIZE):
+                notices = kind.missing_notices(candidates)
+                if is_check:
+                    status = green("[Notice would be queued]")
+                else:
+                    status = cyan("[Notice queued]")
+                    notices = kind.create_notices(notices)
+                    for chunk in chunks(notices, SEND_CHUNK_SIZE):
+                        send_notices.delay([notice.pk for notice in chunk])
+                num_candidates += len(candidates)
+                num_queued += len(notices)
+                if is_verbose:
+                    new = {(n.member_id, n.reference_date) for n in notices}
+                    for ref_date, member in candidates:
+                        if (member.pk, ref_date) in new:
+                            body.append((member, kind, ref_date, status))
                         else:
-                            notice = kind.send_notice(member, ref_date)
-                            task_send_notice.delay(notice)
-                            status = cyan("[Notice queued]")
-                    body.append((member, notice.kind, ref_date, status))
-        if is_verbose or is_check:
+                            body.append(
+                                (member, kind, ref_date, green("[Skipped]"))
+                            )
+            elapsed = time.perf_counter() - start
+            report.append(
+                (
+                    kind.code,
+                    num_candidates,
+                    num_candidates - num_queued,
+                    num_queued,
+                    f'{elapsed:.3f}',
+                )
+            )
+        if is_verbose and body:
             headers = ['Member', 'Notice', 'Ref. date', 'Status']
             print(as_table(headers, body))
+        if is_verbose or is_check:
+            headers = ['Notice', 'Members', 'Skipped', 'Queued', 'Seconds']
+            print(as_table(headers, report))
 
     def handle(self, *args, **options):
         subcommand = options.get('subcommand')
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notices', '0009_auto_20220510_2236'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notice',
+            name='message_id',
+            field=models.CharField(blank=True, db_index=True, default=None, max_length=64, null=True),
+        ),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import connection, models
+from django.db.models.signals import post_delete, post_save
 
 from apps.members.models import Member
 
+from . import template_cache
+
 
 class NoticeKind(models.Model):
     class Meta:
@@ -34,6 +37,45 @@ class NoticeKind(models.Model):
         notice.save()
         return notice
 
+    def missing_notices(self, candidates):
+        """Unsaved notices for the pairs (reference date, member) of
+        `candidates` that were not sent before, nor repeated. Members can
+        be any objects with their primary key in `pk` (See `repository`).
+
+        The notices already sent are loaded in a single query.
+        """
+        candidates = list(candidates)
+        member_ids = {member.pk for _, member in candidates}
+        reference_dates = {ref_date for ref_date, _ in candidates}
+        sent = set(
+            self.notice_set.filter(
+                member_id__in=member_ids,
+                reference_date__in=reference_dates,
+            ).values_list('member_id', 'reference_date')
+        )
+        notices = []
+        for ref_date, member in candidates:
+            key = (member.pk, ref_date)
+            if key not in sent:
+                sent.add(key)
+                notices.append(
+                    Notice(
+                        kind=self,
+                        member_id=member.pk,
+                        reference_date=ref_date,
+                    )
+                )
+        return notices
+
+    def create_notices(self, notices, batch_size=500):
+        """Save `notices` with as few queries as possible."""
+        if connection.features.can_return_rows_from_bulk_insert:
+            return Notice.objects.bulk_create(notices, batch_size=batch_size)
+        # The pk of every notice is needed to send it
+        for notice in notices:
+            notice.save()
+        return notices
+
     def notice_has_been_send(self, member, reference_date):
         return (
             self.notice_set.filter(member=member)
@@ -62,6 +104,15 @@ class Notice(models.Model):
         null=True,
         default=None,
     )
+    # Id of the message in the mail provider, to match its delivery
+    # events (See `delivery_events`)
+    message_id = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        default=None,
+        db_index=True,
+    )
 
     def __str__(self):
         return f"Notice {self.pk}"
@@ -81,3 +132,15 @@ class Notice(models.Model):
 
     def is_delivered(self):
         return self.delivered_at is not None
+
+
+post_save.connect(
+    template_cache.forget,
+    sender=NoticeKind,
+    dispatch_uid='notices.template_cache.forget.save',
+)
+post_delete.connect(
+    template_cache.forget,
+    sender=NoticeKind,
+    dispatch_uid='notices.template_cache.forget.delete',
+)
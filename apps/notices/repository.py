@@ -7,6 +7,12 @@ en la base de datos.
 Cada función debe ser un generador que devuelva una tupla con dos elementos:
 - Fecha de referencia del aviso.
 - Miembro al que notificar.
+
+El miembro puede ser cualquier objeto con su clave primaria en `pk`. Para
+no cargar todos los socios en memoria, las funciones devuelven filas
+ligeras (`rows.MemberRow`), leídas de la base de datos por bloques con
+`rows.member_rows`. Ojo: toda función definida o importada en este fichero
+se toma por un tipo de aviso.
 '''
 import datetime
 import logging
@@ -16,6 +22,8 @@ from django.utils import timezone
 
 from apps.members.models import Member
 
+from . import rows
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,8 +31,8 @@ def autotest(days=0):
     logger.info("autotest starts")
     DEVELOPERS = ['sdelquin', 'euribates']  # ToDo: Put this info in database
     hoy = timezone.now().date()
-    for username in DEVELOPERS:
-        member = Member.load_from_username(username)
+    qs = Member.objects.filter(user__username__in=DEVELOPERS)
+    for member in rows.member_rows(qs):
         yield hoy, member
 
 
@@ -43,20 +51,18 @@ def members_nearly_expired(days=0):
         .filter(max_valid_until__gte=from_date)
         .filter(max_valid_until__lt=to_date)
     )
-    for m in qs:
-        yield m.max_valid_until, m
+    yield from rows.member_rows(qs, 'max_valid_until')
 
 
 def all_members(days=0):
     logger.info('all_members starts')
     today = timezone.now().date()
-    for member in Member.objects.all():
+    for member in rows.member_rows(Member.objects.all()):
         yield today, member
 
 
 def active_members(days=0):
     logger.info('active_members starts')
     today = timezone.now().date()
-    for member in Member.objects.all():
-        if member.active:
-            yield today, member
+    for member in rows.member_rows(Member.objects.active()):
+        yield today, member
@@ -0,0 +1,39 @@
+"""Lightweight members for the notice generators (See `repository`).
+
+A notice run may go through every member, so the generators don't load
+`Member` instances: they stream rows with only the fields needed to
+decide and create the notices, read from the database in chunks.
+"""
+
+from typing import NamedTuple
+
+# Rows read from the database at a time
+CHUNK_SIZE = 2000
+
+ROW_FIELDS = ('pk', 'email', 'user__first_name', 'user__last_name')
+
+
+class MemberRow(NamedTuple):
+    pk: int
+    email: str
+    first_name: str
+    last_name: str
+
+    @property
+    def full_name(self):
+        return self.first_name + ' ' + self.last_name
+
+    def __str__(self):
+        return self.full_name
+
+
+def member_rows(queryset, *extra, chunk_size=CHUNK_SIZE):
+    """Stream the members of `queryset` as `MemberRow`.
+
+    With `extra` fields (or annotations) of the queryset, yields tuples
+    with their values followed by the row.
+    """
+    values = queryset.values_list(*extra, *ROW_FIELDS)
+    for item in values.iterator(chunk_size=chunk_size):
+        row = MemberRow(*item[len(extra):])
+        yield (*item[:len(extra)], row) if extra else row
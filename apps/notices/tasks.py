@@ -1,17 +1,30 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import sendgrid
+import logging
+
 from django.conf import settings
-from django.template import Context, Template
+from django.template import Context
 from django.utils import timezone
 from django_rq import job
-from python_http_client.exceptions import HTTPError
 from sendgrid.helpers.mail import Content, Email, Mail
 
-from apps.commons.filters import as_markdown
+from apps.commons.mail import (
+    RETRY,
+    DeliveryError,
+    TransientDeliveryError,
+    deliver,
+)
 from apps.organizations.models import Organization
 
+from . import template_cache
+from .models import Notice
+
+logger = logging.getLogger(__name__)
+
+# Notices sent by every `send_notices` job
+SEND_CHUNK_SIZE = 100
+
 
 def create_notice_body(notice):
     kind = notice.kind
@@ -23,8 +36,7 @@ def create_notice_body(notice):
             'user': notice.member.user,
         }
     )
-    template = Template(kind.template)
-    return template.render(context)
+    return template_cache.get_template(kind).render(context)
 
 
 def create_notice_message(notice):
@@ -36,36 +48,82 @@ def create_notice_message(notice):
         from_email=Email(organization.email, organization.name),
         subject=subject,
         to_email=Email(member.email),
-        content=Content('text/html', as_markdown(body)),
+        content=Content('text/html', template_cache.render_html(body)),
     )
     return msg
 
 
-@job
-def task_send_notice(notice):
+def send_notice(notice):
+    """Deliver a notice and record the result. Raises
+    `TransientDeliveryError` if it should be tried again later.
+    """
     # Preconditions
     if not notice.member.email:
         print("El usuario no tiene asignado email")
         return
     msg = create_notice_message(notice)
-    sg = sendgrid.SendGridAPIClient(apikey=settings.SENDGRID_API_KEY)
     try:
-        response = sg.client.mail.send.post(request_body=msg.get())
-        notice.send_at = timezone.now()
-        notice.reply_code = response.status_code
-        if response.status_code >= 400:
-            notice.rejected_at = timezone.now()
-            notice.delivered_at = None
-            notice.reject_message = response.body
-        else:
-            notice.rejected_at = None
-            notice.delivered_at = timezone.now()
-            notice.reject_message = None
-        notice.save()
-    except HTTPError as err:
+        result = deliver(msg)
+    except TransientDeliveryError:
+        raise
+    except DeliveryError as err:
         print("[ERROR]")
+        notice.send_at = timezone.now()
         notice.reply_code = err.status_code
         notice.rejected_at = timezone.now()
-        notice.reject_message = str(err)
+        notice.reject_message = str(err.body)
         notice.delivered_at = None
         notice.save()
+    else:
+        notice.send_at = timezone.now()
+        notice.reply_code = result.status_code
+        notice.rejected_at = None
+        notice.reject_message = None
+        notice.message_id = result.message_id
+        if result.message_id and settings.SENDGRID_WEBHOOK_TOKEN:
+            # The delivery is confirmed later by the events posted by
+            # the provider to the webhook (See `delivery_events`)
+            notice.delivered_at = None
+        else:
+            notice.delivered_at = timezone.now()
+        notice.save()
+
+
+@job('default', retry=RETRY)
+def task_send_notice(notice):
+    # If the delivery fails temporarily, the job will be retried
+    send_notice(notice)
+
+
+@job('default', timeout=3600)
+def send_notices(notice_ids):
+    """Send many notices in a single job, so they share the compiled
+    templates of their kinds (See `template_cache`) and the connection
+    to the mail service. The notices, with their kinds and members, are
+    loaded in a single query. The notices that can't be delivered now
+    are sent again in their own `task_send_notice` job, which is retried;
+    any other error is recorded in its notice, and the job goes on with
+    the next one.
+    """
+    notices = Notice.objects.filter(pk__in=notice_ids).select_related(
+        'kind', 'member__user'
+    )
+    for notice in notices:
+        try:
+            send_notice(notice)
+        except TransientDeliveryError:
+            task_send_notice.delay(notice)
+        except Exception as err:
+            logger.exception("Can't send the notice %s", notice.pk)
+            record_error(notice, err)
+
+
+def record_error(notice, err):
+    max_length = Notice._meta.get_field('reject_message').max_length
+    now = timezone.now()
+    Notice.objects.filter(pk=notice.pk).update(
+        send_at=now,
+        rejected_at=now,
+        delivered_at=None,
+        reject_message=str(err)[:max_length],
+    )
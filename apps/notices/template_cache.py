@@ -0,0 +1,52 @@
+"""Compiled templates of the notice kinds.
+
+Every process keeps the compiled template of every kind, keyed by the pk
+of the kind and a digest of its source, so a template is parsed only once
+per process and a kind edited in another process is never rendered with
+its old template. Saving or deleting a kind drops its entry in the
+process that does it.
+
+RQ workers run every job in a forked process, so the templates are shared
+by all the notices sent in the same job (See `tasks.send_notices`).
+"""
+
+import functools
+import hashlib
+
+from django.template import Template
+
+from apps.commons.filters import as_markdown
+
+# pk of the kind -> (digest of the source, compiled template)
+_templates = {}
+
+
+def source_digest(source):
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def get_template(kind):
+    digest = source_digest(kind.template)
+    cached = _templates.get(kind.pk)
+    if cached is None or cached[0] != digest:
+        cached = (digest, Template(kind.template))
+        if kind.pk is not None:
+            _templates[kind.pk] = cached
+    return cached[1]
+
+
+def forget(sender, instance, **kwargs):
+    _templates.pop(instance.pk, None)
+
+
+def clear():
+    _templates.clear()
+    render_html.cache_clear()
+
+
+@functools.lru_cache(maxsize=256)
+def render_html(body):
+    """HTML of a notice body. Notices that don't depend on the member,
+    like announcements to all of them, are converted only once.
+    """
+    return as_markdown(body)
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.members.models import Member
+
+from .models import Notice, NoticeKind
+
+URL = reverse('notices:delivery_events')
+
+
+@pytest.fixture
+def notices(settings):
+    settings.SENDGRID_WEBHOOK_TOKEN = 'secret'
+    kind = NoticeKind.objects.create(code='autotest', description='Aviso')
+    notices = []
+    for i in range(3):
+        member = Member.objects.create(
+            user=User.objects.create(username=f'user{i}'),
+            email=f'user{i}@example.com',
+        )
+        notice = kind.send_notice(member, timezone.now().date())
+        notice.send_at = timezone.now()
+        notice.message_id = f'msg{i}'
+        notice.save()
+        notices.append(notice)
+    return notices
+
+
+def post_events(client, events, token='secret'):
+    return client.post(
+        f'{URL}?token={token}',
+        json.dumps(events),
+        content_type='application/json',
+    )
+
+
+@pytest.mark.django_db
+def test_events_update_notices(client, notices, django_assert_num_queries):
+    events = [
+        {'event': 'processed', 'sg_message_id': 'msg0.a', 'timestamp': 10},
+        {'event': 'delivered', 'sg_message_id': 'msg0.a', 'timestamp': 20},
+        {'event': 'deferred', 'sg_message_id': 'msg1.b', 'timestamp': 10},
+        {
+            'event': 'bounce',
+            'sg_message_id': 'msg1.b',
+            'timestamp': 30,
+            'reason': '550 Unknown user',
+        },
+        {'event': 'delivered', 'sg_message_id': 'unknown.c', 'timestamp': 5},
+    ]
+    with django_assert_num_queries(1):
+        response = post_events(client, events)
+    assert response.json() == {'updated': 2}
+    delivered, rejected, sending = (
+        Notice.objects.get(pk=n.pk) for n in notices
+    )
+    assert delivered.status() == 'Delivered'
+    assert delivered.delivered_at.timestamp() == 20
+    assert rejected.status() == 'Rejected: 550 Unknown user'
+    assert sending.status() == 'Sending'
+
+
+@pytest.mark.django_db
+def test_events_need_token(client, notices):
+    assert post_events(client, [], token='wrong').status_code == 403
+    assert post_events(client, {'event': 'delivered'}).status_code == 400
+    response = client.post(
+        f'{URL}?token=secret', 'not json', content_type='application/json'
+    )
+    assert response.status_code == 400
+
+
+if __name__ == '__main__':
+    pytest.main()
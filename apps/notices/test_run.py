@@ -0,0 +1,88 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.members.models import Member
+from apps.notices import repository
+from apps.notices.management.commands import notices as notices_command
+
+from .models import Notice, NoticeKind
+from .rows import MemberRow
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    jobs = []
+    monkeypatch.setattr(notices_command, 'SEND_CHUNK_SIZE', 2)
+    monkeypatch.setattr(notices_command.send_notices, 'delay', jobs.append)
+    return jobs
+
+
+@pytest.fixture
+def kind():
+    kind = NoticeKind.objects.create(
+        code='all_members',
+        description='Aviso',
+        template='Hola {{ member }}',
+    )
+    members = [
+        Member.objects.create(
+            user=User.objects.create(username=f'user{i}'),
+            email=f'user{i}@example.com',
+        )
+        for i in range(5)
+    ]
+    kind.send_notice(members[0], timezone.now().date())
+    return kind
+
+
+@pytest.mark.django_db
+def test_run_creates_missing_notices(kind, queued):
+    call_command('notices', 'run')
+    assert kind.notice_set.count() == 5
+    assert [len(chunk) for chunk in queued] == [2, 2]
+    notice_ids = [pk for chunk in queued for pk in chunk]
+    assert Notice.objects.filter(pk__in=notice_ids).count() == 4
+    # Nothing is sent twice
+    call_command('notices', 'run')
+    assert kind.notice_set.count() == 5
+    assert len(queued) == 2
+
+
+@pytest.mark.django_db
+def test_run_check_creates_nothing(kind, queued, capsys):
+    call_command('notices', 'run', '--check')
+    assert Notice.objects.count() == 1
+    assert queued == []
+    assert 'all_members' in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_run_in_batches(kind, queued, monkeypatch):
+    monkeypatch.setattr(notices_command, 'RUN_BATCH_SIZE', 2)
+    call_command('notices', 'run', '--check')
+    call_command('notices', 'run')
+    assert kind.notice_set.count() == 5
+    assert sum(len(chunk) for chunk in queued) == 4
+
+
+@pytest.mark.django_db
+def test_repository_yields_rows(kind):
+    rows = list(repository.all_members())
+    assert len(rows) == 5
+    _, row = rows[0]
+    assert isinstance(row, MemberRow)
+    assert row == (Member.objects.first().pk, 'user0@example.com', '', '')
+
+
+@pytest.mark.django_db
+def test_missing_notices_are_not_repeated(kind):
+    member = Member.objects.last()
+    today = timezone.now().date()
+    notices = kind.missing_notices([(today, member), (today, member)])
+    assert len(notices) == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from sendgrid.helpers.mail import Email, Mail
+
+from apps.commons.mail import DeliveryResult
+from apps.members.models import Member
+from apps.organizations.models import Organization
+
+from . import tasks
+from .models import NoticeKind
+
+
+class MessageIdBackend:
+    """Accept every message, giving it an id as SendGrid does."""
+
+    def send(self, payload):
+        return DeliveryResult(202, message_id='msg0')
+
+
+@pytest.fixture
+def notice(settings):
+    settings.MAIL_DELIVERY_BACKEND = 'apps.notices.test_tasks.MessageIdBackend'
+    Organization.objects.create(name='Python Canarias')
+    kind = NoticeKind.objects.create(
+        code='autotest',
+        description='Aviso',
+        template='Hola {{ member }}',
+    )
+    member = Member.objects.create(
+        user=User.objects.create(username='user0'),
+        email='user0@example.com',
+    )
+    return kind.send_notice(member, timezone.now().date())
+
+
+@pytest.mark.django_db
+def test_send_notice_waits_for_delivery_events(settings, notice):
+    settings.SENDGRID_WEBHOOK_TOKEN = 'secret'
+    tasks.send_notice(notice)
+    notice.refresh_from_db()
+    assert notice.message_id == 'msg0'
+    assert notice.status() == 'Sending'
+
+
+@pytest.mark.django_db
+def test_send_notice_without_webhook_is_delivered(settings, notice):
+    settings.SENDGRID_WEBHOOK_TOKEN = ''
+    tasks.send_notice(notice)
+    notice.refresh_from_db()
+    assert notice.message_id == 'msg0'
+    assert notice.status() == 'Delivered'
+
+
+@pytest.mark.django_db
+def test_send_notices_records_errors(monkeypatch, notice):
+    member = Member.objects.create(
+        user=User.objects.create(username='user1'),
+        email='user1@example.com',
+    )
+    other = notice.kind.send_notice(member, timezone.now().date())
+
+    def create_notice_message(notice):
+        if notice.pk == other.pk:
+            raise ValueError('Bad template')
+        return Mail(to_email=Email(notice.member.email))
+
+    monkeypatch.setattr(tasks, 'create_notice_message', create_notice_message)
+    tasks.send_notices([notice.pk, other.pk])
+    notice.refresh_from_db()
+    other.refresh_from_db()
+    assert notice.status() == 'Delivered'
+    assert other.status() == 'Rejected: Bad template'
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,52 @@
+import pytest
+from django.template import Context
+
+from . import template_cache
+from .models import NoticeKind
+
+
+@pytest.fixture
+def kind():
+    template_cache.clear()
+    return NoticeKind.objects.create(
+        code='all_members',
+        description='Aviso',
+        template='Hola {{ member }}',
+    )
+
+
+@pytest.mark.django_db
+def test_template_is_compiled_once(kind):
+    template = template_cache.get_template(kind)
+    assert template_cache.get_template(kind) is template
+
+
+@pytest.mark.django_db
+def test_template_is_forgotten_when_kind_is_saved(kind):
+    template = template_cache.get_template(kind)
+    kind.template = 'Adiós {{ member }}'
+    kind.save()
+    assert kind.pk not in template_cache._templates
+    assert template_cache.get_template(kind) is not template
+
+
+@pytest.mark.django_db
+def test_template_changed_in_other_process(kind):
+    template = template_cache.get_template(kind)
+    # The source changed, but this process didn't see the save
+    NoticeKind.objects.filter(pk=kind.pk).update(template='Adiós')
+    kind.refresh_from_db()
+    new_template = template_cache.get_template(kind)
+    assert new_template is not template
+    assert new_template.render(Context()) == 'Adiós'
+
+
+def test_render_html_is_cached():
+    template_cache.clear()
+    html = template_cache.render_html('**Hola**')
+    assert html.strip() == '<p><strong>Hola</strong></p>'
+    assert template_cache.render_html.cache_info().currsize == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'notices'
+
+urlpatterns = [
+    path(
+        'delivery-events/',
+        views.delivery_events,
+        name='delivery_events',
+    ),
+]
@@ -0,0 +1,34 @@
+import hmac
+import json
+
+from django.conf import settings
+from django.http import (
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+)
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .delivery_events import update_notices
+
+
+@csrf_exempt
+@require_POST
+def delivery_events(request):
+    """Event webhook of SendGrid, set up with the URL of this view and
+    `?token=` the value of the setting `SENDGRID_WEBHOOK_TOKEN`.
+    """
+    token = request.GET.get('token', '')
+    expected = settings.SENDGRID_WEBHOOK_TOKEN
+    if not expected or not hmac.compare_digest(token, expected):
+        return HttpResponseForbidden()
+    try:
+        events = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid JSON')
+    if not isinstance(events, list) or not all(
+        isinstance(event, dict) for event in events
+    ):
+        return HttpResponseBadRequest('Expected a list of events')
+    return JsonResponse({'updated': update_notices(events)})
@@ -46,9 +46,13 @@ class OrganizationCategoryAdmin(admin.ModelAdmin):
 class MembershipAdmin(admin.ModelAdmin):
     list_display = ('event', 'organization', 'category', 'amount', 'order')
     list_filter = ('category__name', 'event')
+    list_select_related = ('event', 'organization', 'category')
     search_fields = ['organization__name']
     autocomplete_fields = ['organization', 'joint_organization']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_invoice_total()
+
     def download_emails(self, request, queryset):
         content = ','.join([m.get_email() for m in queryset])
         filename = 'emails.txt'
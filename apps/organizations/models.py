@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 
+from decimal import Decimal
+
+from django.apps import apps
 from django.conf import settings
 from django.core.cache import cache
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.db.models.signals import post_save
 
 from apps.commons.constants import PRIORITY
@@ -136,7 +140,27 @@ class OrganizationCategory(models.Model):
         return [m.organization for m in memberships]
 
 
+class MembershipQuerySet(models.QuerySet):
+
+    def with_invoice_total(self):
+        """Annotate `invoice_total`, the total of the concepts of the invoice
+        of the organization for the event (None if there is none), so
+        `Membership.amount` doesn't need more queries.
+        """
+        Invoice = apps.get_model('invoices', 'Invoice')
+        invoices = Invoice.objects.filter(
+            event=OuterRef('event'),
+            organization=OuterRef('organization'),
+        ).order_by('pk')
+        return self.annotate(
+            invoice_total=Subquery(invoices.values('_concepts_total')[:1])
+        )
+
+
 class Membership(models.Model):
+
+    objects = MembershipQuerySet.as_manager()
+
     event = models.ForeignKey(
         'events.Event',
         on_delete=models.PROTECT,
@@ -178,11 +202,19 @@ class Membership(models.Model):
         :return: How much has the organization funded.
         :rtype: Decimal
         """
-        invoices = self.event.invoices.for_organization(self.organization)
-
-        if not invoices:
+        if hasattr(self, 'invoice_total'):
+            # Annotated by `MembershipQuerySet.with_invoice_total`
+            invoice_total = self.invoice_total
+        else:
+            invoice = (
+                self.event.invoices.for_organization(self.organization)
+                .order_by('pk')
+                .first()
+            )
+            invoice_total = invoice and invoice.concepts_total
+        if invoice_total is None:
             return self._amount
-        return invoices.get().concepts_total
+        return Decimal(invoice_total).quantize(Decimal('0.01'))
 
     def __str__(self):
         return "{} {} {}".format(self.organization, self.category, self.amount)
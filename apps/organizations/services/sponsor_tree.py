@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+
+def membership_order(membership):
+    return (
+        -membership._amount,
+        membership.order,
+        membership.organization.name,
+    )
+
+
+def load_memberships(event):
+    """All the memberships of an event, joint organizations included, in
+    one query and in display order (role, category, amount, order, name).
+    """
+    return list(
+        event.memberships.select_related(
+            'organization',
+            'category__role',
+        ).order_by(
+            'category__role__order',
+            'category__role__name',
+            'category__order',
+            'category__name',
+            '-_amount',
+            'order',
+            'organization__name',
+        )
+    )
+
+
+def sponsor_tree(memberships):
+    """Group memberships as a dictionary role -> category -> organizations.
+
+    Memberships with a joint organization are not shown in their own
+    category; instead, the organization is placed next to the organization
+    it is joint with.
+    """
+    joints = defaultdict(list)
+    for membership in memberships:
+        if membership.joint_organization_id:
+            joints[membership.joint_organization_id].append(membership)
+    for joint_memberships in joints.values():
+        joint_memberships.sort(key=membership_order)
+
+    def with_joint_organizations(organization, seen):
+        yield organization
+        for membership in joints.get(organization.pk, []):
+            if membership.organization_id not in seen:
+                seen.add(membership.organization_id)
+                yield from with_joint_organizations(
+                    membership.organization, seen
+                )
+
+    result = {}
+    for membership in memberships:
+        if membership.joint_organization_id:
+            continue
+        category = membership.category
+        organizations = result.setdefault(category.role, {}).setdefault(
+            category, []
+        )
+        organizations.extend(
+            with_joint_organizations(
+                membership.organization, {membership.organization_id}
+            )
+        )
+    return result
+
+
+def build_sponsor_tree(event):
+    return sponsor_tree(load_memberships(event))
@@ -0,0 +1,147 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.events.models import Event
+
+from .models import Membership, Organization, OrganizationCategory, OrganizationRole
+from .services.sponsor_tree import build_sponsor_tree
+
+
+def create_event(hashtag):
+    return Event.objects.create(
+        name=hashtag,
+        hashtag=hashtag,
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+    )
+
+
+@pytest.fixture
+def event():
+    return create_event('pyday')
+
+
+@pytest.fixture
+def categories():
+    sponsor = OrganizationRole.objects.create(name='Sponsor', code='sponsor', order=10)
+    organizer = OrganizationRole.objects.create(
+        name='Organizer', code='organizer', order=50
+    )
+    return {
+        'gold': OrganizationCategory.objects.create(
+            name='Gold', code='gold', role=sponsor, order=10
+        ),
+        'silver': OrganizationCategory.objects.create(
+            name='Silver', code='silver', role=sponsor, order=50
+        ),
+        'organizer': OrganizationCategory.objects.create(
+            name='Organizer', code='organizer', role=organizer
+        ),
+    }
+
+
+def join(event, name, category, amount=0, joint_organization=None):
+    organization = Organization.objects.create(name=name)
+    Membership.objects.create(
+        event=event,
+        organization=organization,
+        category=category,
+        _amount=Decimal(amount),
+        joint_organization=joint_organization,
+    )
+    return organization
+
+
+def as_names(tree):
+    return {
+        role.code: {
+            category.code: [org.name for org in orgs]
+            for category, orgs in categories.items()
+        }
+        for role, categories in tree.items()
+    }
+
+
+@pytest.mark.django_db
+def test_sponsor_tree_ordering(event, categories):
+    join(event, 'Python Canarias', categories['organizer'])
+    join(event, 'Beta', categories['silver'], amount=100)
+    join(event, 'Alpha', categories['silver'], amount=100)
+    join(event, 'Big', categories['silver'], amount=500)
+    join(event, 'Gold', categories['gold'], amount=1000)
+    tree = build_sponsor_tree(event)
+    assert list(as_names(tree)) == ['sponsor', 'organizer']
+    assert as_names(tree) == {
+        'sponsor': {'gold': ['Gold'], 'silver': ['Big', 'Alpha', 'Beta']},
+        'organizer': {'organizer': ['Python Canarias']},
+    }
+
+
+@pytest.mark.django_db
+def test_sponsor_tree_joint_organizations(event, categories):
+    acme = join(event, 'ACME', categories['gold'], amount=1000)
+    join(event, 'Zeta', categories['gold'], amount=500)
+    join(event, 'Joint B', categories['silver'], joint_organization=acme)
+    join(event, 'Joint A', categories['silver'], joint_organization=acme)
+    tree = build_sponsor_tree(event)
+    # Joint organizations go right after their reference, not in their
+    # own category (here, silver is left empty)
+    assert as_names(tree) == {
+        'sponsor': {'gold': ['ACME', 'Joint A', 'Joint B', 'Zeta']},
+    }
+
+
+@pytest.mark.django_db
+def test_sponsor_tree_ignores_joint_organizations_of_other_events(
+    event, categories
+):
+    acme = join(event, 'ACME', categories['gold'])
+    other_event = create_event('other')
+    Membership.objects.create(
+        event=other_event,
+        organization=acme,
+        category=categories['gold'],
+    )
+    join(other_event, 'Joint', categories['gold'], joint_organization=acme)
+    assert as_names(build_sponsor_tree(event)) == {
+        'sponsor': {'gold': ['ACME']},
+    }
+
+
+@pytest.mark.django_db
+def test_sponsor_tree_num_queries(event, categories):
+    acme = join(event, 'ACME', categories['gold'])
+    for i in range(10):
+        join(event, f'Sponsor {i}', categories['silver'])
+        join(event, f'Joint {i}', categories['silver'], joint_organization=acme)
+    with CaptureQueriesContext(connection) as queries:
+        build_sponsor_tree(event)
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_memberships_for_display_is_cached(
+    event, categories, django_capture_on_commit_callbacks
+):
+    cache.clear()
+    join(event, 'ACME', categories['gold'])
+    assert as_names(event.memberships_for_display()) == {
+        'sponsor': {'gold': ['ACME']},
+    }
+    with CaptureQueriesContext(connection) as queries:
+        event.memberships_for_display()
+    assert len(queries) == 0
+    with django_capture_on_commit_callbacks(execute=True):
+        join(event, 'Zeta', categories['gold'])
+    assert as_names(event.memberships_for_display()) == {
+        'sponsor': {'gold': ['ACME', 'Zeta']},
+    }
+
+
+if __name__ == '__main__':
+    pytest.main()
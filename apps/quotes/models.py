@@ -39,5 +39,5 @@ class Quote(models.Model):
     def get_random_quote(cls):
         """Get a random quote, or an empty dict in none available.
         """
-        quotes = cls.objects.all()
+        quotes = cls.objects.select_related('author')
         return random.choice(quotes) if quotes else {}
@@ -0,0 +1,85 @@
+import bisect
+
+
+class ScheduleGrid:
+    """Builds the schedule of an event as rows of tracks and plenaries.
+
+    All the scheduled items of the event are loaded in one query (plus the
+    prefetch of speakers and tags), so the number of queries does not depend
+    on the number of tracks or plenary sessions. The rows are computed in
+    memory, sweeping over the start times of the items of each track.
+    """
+
+    def __init__(self, event):
+        self.event = event
+        self.items = list(
+            event.schedule.select_related(
+                'slot__category',
+                'slot__level',
+                'location',
+                'track',
+            )
+            .prefetch_related('speakers', 'slot__tags')
+            .order_by('start')
+        )
+        self.plenaries = [i for i in self.items if i.track_id is None]
+        tracks = {i.track_id: i.track for i in self.items if i.track_id}
+        self.tracks = sorted(tracks.values(), key=lambda t: (t.order, t.name))
+        self._by_track = {}
+        for item in self.items:
+            if item.track_id:
+                items, starts = self._by_track.setdefault(
+                    item.track_id, ([], [])
+                )
+                items.append(item)
+                starts.append(item.start)
+
+    def start_datetime(self):
+        return self.items[0].start if self.items else None
+
+    def schedule_in_range(self, track, start=None, end=None):
+        """Items of a track that start after `start` and end before `end`.
+
+        Equivalent to `Track.schedule_in_range` but using the items already
+        loaded in memory.
+        """
+        items, starts = self._by_track.get(track.pk, ([], []))
+        lo = bisect.bisect_left(starts, start) if start else 0
+        result = []
+        for item in items[lo:]:
+            if end is not None and item.start > end:
+                break
+            if end is None or item.end <= end:
+                result.append(item)
+        return result
+
+    def _scheduled_items_for_display(self, start=None, end=None):
+        result = {'type': 'scheduled_items', 'tracks': []}
+        exist_scheduled_item = False
+        for track in self.tracks:
+            scheduled_items = self.schedule_in_range(track, start, end)
+            if scheduled_items:
+                exist_scheduled_item = True
+            result['tracks'].append(
+                {'track': track, 'scheduled_items': scheduled_items}
+            )
+        return result if exist_scheduled_item else None
+
+    def rows(self):
+        result = []
+        if self.tracks:
+            if len(self.tracks) > 1:
+                result.append({'type': 'tracks', 'tracks': self.tracks})
+            start, end = self.start_datetime(), None
+            for psi in self.plenaries:
+                end = psi.start
+                scheduled_items = self._scheduled_items_for_display(start, end)
+                if scheduled_items:
+                    result.append(scheduled_items)
+                result.append({'type': 'plenary_scheduled_item', 'schedule': psi})
+                start, end = psi.end, None
+
+            scheduled_items = self._scheduled_items_for_display(start, end)
+            if scheduled_items:
+                result.append(scheduled_items)
+        return result
@@ -0,0 +1,124 @@
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.events.models import Event
+from apps.locations.models import Location, Venue
+from apps.schedule.models import Schedule, Slot, SlotCategory, Track
+from apps.speakers.models import Speaker
+
+
+def at(hour, minute=0):
+    return timezone.make_aware(datetime.datetime(2030, 11, 16, hour, minute))
+
+
+def create_event(num_tracks, num_slots, hashtag='pyday'):
+    """Event with `num_tracks` tracks of `num_slots` talks each, and a
+    plenary session (lunch) in the middle of the day.
+    """
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag=hashtag,
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+    )
+    venue = Venue.objects.create(name='Venue', slug=f'venue-{hashtag}')
+    location = Location.objects.create(venue=venue, name='Room')
+    talk, _ = SlotCategory.objects.get_or_create(code='talk', name='Talk')
+    meal, _ = SlotCategory.objects.get_or_create(code='meal', name='Meal')
+    lunch = Slot.objects.create(name='Lunch', category=meal)
+    Schedule.objects.create(
+        event=event, location=location, slot=lunch, start=at(13), end=at(14)
+    )
+    for t in range(num_tracks):
+        track = Track.objects.create(name=f'Track {t}', order=t)
+        for s in range(num_slots):
+            slot = Slot.objects.create(name=f'Talk {t}.{s}', category=talk)
+            hour = 9 + s if s < num_slots // 2 else 14 + s
+            item = Schedule.objects.create(
+                event=event,
+                location=location,
+                track=track,
+                slot=slot,
+                start=at(hour),
+                end=at(hour, 50),
+            )
+            speaker = Speaker.objects.create(
+                name='Speaker',
+                surname=f'{hashtag} {t}.{s}',
+                slug=f'speaker-{hashtag}-{t}-{s}',
+                bio='',
+            )
+            item.speakers.add(speaker)
+    return event
+
+
+def render_schedule(event):
+    """Walk the rows touching everything the templates read."""
+    for row in event.schedule_for_display():
+        if row['type'] == 'plenary_scheduled_item':
+            items = [row['schedule']]
+        elif row['type'] == 'scheduled_items':
+            items = [i for t in row['tracks'] for i in t['scheduled_items']]
+        else:
+            items = []
+        for item in items:
+            item.slot.category.code
+            item.slot.get_level()
+            item.location.name
+            item.size_for_display
+            list(item.speakers.all())
+            list(item.slot.tags.all())
+
+
+@pytest.mark.django_db
+def test_schedule_for_display_rows():
+    event = create_event(num_tracks=2, num_slots=4)
+    rows = event.schedule_for_display()
+    assert [r['type'] for r in rows] == [
+        'tracks',
+        'scheduled_items',
+        'plenary_scheduled_item',
+        'scheduled_items',
+    ]
+    assert [t.name for t in rows[0]['tracks']] == ['Track 0', 'Track 1']
+    assert rows[2]['schedule'].slot.name == 'Lunch'
+    morning = rows[1]['tracks'][0]['scheduled_items']
+    afternoon = rows[3]['tracks'][1]['scheduled_items']
+    assert [i.slot.name for i in morning] == ['Talk 0.0', 'Talk 0.1']
+    assert [i.slot.name for i in afternoon] == ['Talk 1.2', 'Talk 1.3']
+
+
+@pytest.mark.django_db
+def test_schedule_for_display_single_track_has_no_tracks_row():
+    event = create_event(num_tracks=1, num_slots=2)
+    rows = event.schedule_for_display()
+    assert [r['type'] for r in rows] == [
+        'scheduled_items',
+        'plenary_scheduled_item',
+        'scheduled_items',
+    ]
+
+
+@pytest.mark.django_db
+def test_schedule_for_display_without_tracks_is_empty():
+    event = create_event(num_tracks=0, num_slots=0)
+    assert event.schedule_for_display() == []
+
+
+@pytest.mark.django_db
+def test_schedule_for_display_num_queries_is_constant():
+    small = create_event(num_tracks=1, num_slots=2, hashtag='small')
+    big = create_event(num_tracks=4, num_slots=8, hashtag='big')
+    with CaptureQueriesContext(connection) as small_queries:
+        render_schedule(small)
+    with CaptureQueriesContext(connection) as big_queries:
+        render_schedule(big)
+    assert len(small_queries) == len(big_queries) == 3
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -1,10 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.http import HttpResponse
 from django.utils.html import format_html
 from import_export.admin import ImportExportActionModelAdmin
 
-from apps.certificates.utils import create_certificate
-from apps.events.tasks import send_ticket
+from apps.certificates.tasks import generate_certificates, ticket_certificates
+from apps.events.tasks import send_tickets
 
 from .admin_inlines import ArticleInline, GiftInline
 from .models import Article, Gift, Raffle, Ticket, TicketCategory
@@ -27,6 +27,10 @@ class ArticleAdmin(admin.ModelAdmin):
         'release_at', 'is_active',
         )
 
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related('event', 'category').with_sold_tickets()
+
     def sold_vs_available(self, obj):
         return "{}/{}".format(
             obj.num_sold_tickets,
@@ -62,14 +66,18 @@ class TicketAdmin(ImportExportActionModelAdmin):
     is_mail_send.boolean = True
 
     def resend_ticket_force(self, request, queryset):
-        for ticket in queryset:
-            send_ticket.delay(ticket, force=True)
+        tickets = queryset.select_related(
+            'article__event__venue', 'article__category'
+        )
+        send_tickets.delay(list(tickets), force=True)
 
     resend_ticket_force.short_description = "Recreate and send ticket"
 
     def resend_ticket(self, request, queryset):
-        for ticket in queryset:
-            send_ticket.delay(ticket)
+        tickets = queryset.select_related(
+            'article__event__venue', 'article__category'
+        )
+        send_tickets.delay(list(tickets))
 
     resend_ticket.short_description = "Resend ticket"
 
@@ -86,12 +94,13 @@ class TicketAdmin(ImportExportActionModelAdmin):
     download_emails.short_description = "Download customers' emails"
 
     def gen_certificate(self, request, queryset):
-        for ticket in queryset:
-            create_certificate(
-                'attendance',
-                output_name=ticket.keycode,
-                name=ticket.customer_full_name,
-                )
+        certificates = ticket_certificates(queryset)
+        rq_job = generate_certificates.delay(certificates)
+        messages.add_message(
+            request,
+            messages.INFO,
+            f'Generando {len(certificates)} certificados (Tarea {rq_job.id})',
+        )
 
     gen_certificate.short_description = 'Generar certificado de asistencia'
 
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.events.models import Event
+from apps.tickets.services.ticket_maker import (
+    TicketBatchMaker,
+    TicketMaker,
+    get_image,
+    get_styles,
+    register_fonts,
+)
+from utils.console import as_table, cyan
+
+
+class Command(BaseCommand):
+
+    help = 'Mide la velocidad de generación de los PDF de las entradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event', help='Hashtag del evento')
+        parser.add_argument(
+            '-n',
+            '--num_tickets',
+            type=int,
+            default=50,
+            help='Número máximo de entradas a generar',
+        )
+
+    def measure(self, render, tickets):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            render(output_dir, tickets)
+            elapsed = time.perf_counter() - start
+        return elapsed, len(tickets) / elapsed if elapsed else 0
+
+    def one_by_one(self, output_dir, tickets):
+        # As `Ticket.as_pdf` did, one maker per ticket, loading again the
+        # fonts, styles and images for every one of them
+        for ticket in tickets:
+            register_fonts.cache_clear()
+            get_styles.cache_clear()
+            get_image.cache_clear()
+            full_name = os.path.join(output_dir, f'ticket-{ticket.keycode}.pdf')
+            TicketMaker(full_name, ticket).create()
+
+    def batch_files(self, output_dir, tickets):
+        for _ in TicketBatchMaker(tickets).create_files(output_dir):
+            pass
+
+    def batch_combined(self, output_dir, tickets):
+        full_name = os.path.join(output_dir, 'tickets.pdf')
+        TicketBatchMaker(tickets).create_combined(full_name)
+
+    def handle(self, *args, **options):
+        event = Event.get_by_slug(options['event'])
+        num_tickets = options['num_tickets']
+        tickets = list(event.tickets_for_rendering()[:num_tickets])
+        if not tickets:
+            print(cyan(f'El evento {event} no tiene entradas'))
+            return
+        body = []
+        for name, render in (
+            ('one by one, no caches', self.one_by_one),
+            ('batch, files', self.batch_files),
+            ('batch, combined', self.batch_combined),
+        ):
+            elapsed, speed = self.measure(render, tickets)
+            body.append((name, len(tickets), f'{elapsed:.2f}', f'{speed:.1f}'))
+        headers = ['Mode', 'Tickets', 'Seconds', 'Tickets/s']
+        print(as_table(headers, body))
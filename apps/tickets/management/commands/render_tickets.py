@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from apps.events.models import Event
+from apps.tickets.services.bulk_render import render_tickets
+from utils.console import cyan, green, red
+
+
+class Command(BaseCommand):
+
+    help = 'Genera los PDF de todas las entradas de un evento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event', help='Hashtag del evento')
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=int,
+            default=None,
+            help='Número de procesos (por defecto, uno por CPU)',
+        )
+        parser.add_argument(
+            '--chunk_size',
+            type=int,
+            default=10,
+            help='Entradas que se envían a cada proceso de una vez',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Generar también los PDF que están al día',
+        )
+
+    def handle(self, *args, **options):
+        event = Event.get_by_slug(options['event'])
+        report = render_tickets(
+            list(event.tickets_for_rendering()),
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            force=options['force'],
+        )
+        for pk, error in report.failed.items():
+            print(red(f'ERROR: Ticket {pk}'))
+            print(error)
+        print(green(f'Rendered: {len(report.rendered)}'))
+        print(cyan(f'Skipped (up to date): {len(report.skipped)}'))
+        if report.failed:
+            print(red(f'Failed: {len(report.failed)}'))
+        if report.rendered:
+            print(
+                f'{report.elapsed:.2f}s, '
+                f'{report.speed:.1f} tickets/s'
+            )
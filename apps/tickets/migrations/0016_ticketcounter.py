@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0019_auto_20220516_1802'),
+        ('tickets', '0015_auto_20220510_2236'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketCounter',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ticket_counter', serialize=False, to='events.event')),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
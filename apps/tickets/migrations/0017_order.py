@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0016_ticketcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keycode', models.UUIDField(default=uuid.uuid4, unique=True)),
+                ('stripe_token', models.CharField(blank=True, max_length=128)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid'), ('DECLINED', 'Declined'), ('ERROR', 'Error')], default='PENDING', max_length=8)),
+                ('payment_id', models.CharField(blank=True, max_length=128)),
+                ('message', models.CharField(blank=True, max_length=256)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='tickets.article')),
+                ('ticket', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order', to='tickets.ticket')),
+            ],
+        ),
+    ]
@@ -1,3 +1,4 @@
+import datetime
 import io
 import os
 import random
@@ -6,12 +7,14 @@ from decimal import Decimal
 
 import pyqrcode
 from django.conf import settings
-from django.db import models
-from django.db.models import Max
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Q
 from django.urls import reverse
 from django.utils import timezone as dj_timezone
 
-from apps.tickets.services.ticket_maker import TicketMaker
+from apps.commons.files import atomic_output
+from apps.tickets.services import pdf_cache
+from apps.tickets.services.ticket_maker import TicketMaker, ticket_digest
 
 from . import links
 from .constants import PAYMENT_METHOD
@@ -38,6 +41,25 @@ class TicketCategory(models.Model):
         }
 
 
+class SoldOut(Exception):
+    """There are no tickets left of an article."""
+
+
+class ArticleQuerySet(models.QuerySet):
+
+    def with_sold_tickets(self):
+        """Annotate the number of sold (and not refunded) tickets, so
+        `num_sold_tickets`, `num_available_tickets` and `status` don't
+        need a query for every article.
+        """
+        return self.annotate(
+            sold_tickets_count=Count(
+                'tickets',
+                filter=Q(tickets__refunded_at__isnull=True),
+            )
+        )
+
+
 class Article(models.Model):
 
     SOLDOUT = 'SOLDOUT'
@@ -63,11 +85,15 @@ class Article(models.Model):
         help_text=('Indicates if people with this article can be awarded in a '
                    'potential raffle at event'))
 
+    objects = ArticleQuerySet.as_manager()
+
     def __str__(self):
         return '{} [{}]'.format(self.category, self.event)
 
     @property
     def num_sold_tickets(self):
+        if hasattr(self, 'sold_tickets_count'):
+            return self.sold_tickets_count
         return self.tickets.exclude(refunded_at__isnull=False).count()
 
     @property
@@ -83,6 +109,31 @@ class Article(models.Model):
         current_number = data.get('number__max', 0) or 0
         return current_number + 1
 
+    def reserve_ticket(self, **fields):
+        """Create a ticket of the article, if there is stock left.
+
+        The row of the article is locked until the ticket is created, so
+        concurrent purchases can't sell more tickets than the stock.
+        If there is none, the tickets of orders left pending for too long
+        are released (See `Order.release_expired`) and it is tried again.
+        Raises `SoldOut` otherwise.
+        """
+        ticket = self.create_ticket_in_stock(fields)
+        if ticket is None and Order.release_expired(self.orders.all()):
+            ticket = self.create_ticket_in_stock(fields)
+        if ticket is None:
+            raise SoldOut(str(self))
+        return ticket
+
+    def create_ticket_in_stock(self, fields):
+        """Create a ticket with `fields`, or return None if sold out."""
+        with transaction.atomic():
+            Article.objects.select_for_update().filter(pk=self.pk).exists()
+            sold = self.tickets.filter(refunded_at__isnull=True).count()
+            if sold >= self.stock:
+                return None
+            return Ticket.objects.create(article=self, **fields)
+
     def is_active(self):
         return self.status() == Article.SALEABLE
     is_active.boolean = True
@@ -141,9 +192,10 @@ class Ticket(models.Model):
         return '{} {}'.format(self.customer_name, self.customer_surname)
 
     def save(self, *args, **kwargs):
-        if not self.number:
-            self.number = self.event.next_ticket_number()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.number:
+                self.number = self.event.next_ticket_number()
+            super().save(*args, **kwargs)
 
     def get_qrcode_url(self):
         return links.qr_code(self.pk)
@@ -164,16 +216,197 @@ class Ticket(models.Model):
             os.makedirs(_dir)
         return _dir
 
+    def pdf_digest(self, event_start=None):
+        return ticket_digest(self, event_start or self.event.start_datetime())
+
+    def get_pdf_path(self, event_start=None):
+        """Path of the PDF of the ticket with its current content.
+
+        See `apps.tickets.services.pdf_cache`.
+        """
+        return os.path.join(
+            Ticket.get_tickets_dir(),
+            pdf_cache.pdf_filename(self.keycode, self.pdf_digest(event_start)),
+        )
+
+    def pdf_is_fresh(self, event_start=None):
+        """There is a PDF of the ticket with its current content."""
+        return os.path.exists(self.get_pdf_path(event_start))
+
     def as_pdf(self, force=False):
-        output_dir = Ticket.get_tickets_dir()
-        pdf_file = f'ticket-{self.keycode}.pdf'
-        full_name = os.path.join(output_dir, pdf_file)
+        event_start = self.event.start_datetime()
+        full_name = self.get_pdf_path(event_start)
         if not os.path.exists(full_name) or force:
-            tm = TicketMaker(full_name, self)
-            tm.create()
+            with atomic_output(full_name) as tmp_name:
+                tm = TicketMaker(tmp_name, self, event_start=event_start)
+                tm.create()
+            pdf_cache.remove_stale(full_name, self.keycode)
+        else:
+            pdf_cache.touch(full_name)
         return full_name
 
 
+class Order(models.Model):
+    """Purchase of a ticket paid with Stripe, charged in the background.
+
+    The ticket is reserved when the order is created, and deleted if
+    the payment doesn't succeed (See `apps.events.tasks.charge_order`).
+    """
+
+    # Time after which a pending order is given up, and its ticket
+    # released, if the job that charges it never finished
+    PENDING_TIMEOUT = datetime.timedelta(hours=1)
+
+    PENDING = 'PENDING'
+    PAID = 'PAID'
+    DECLINED = 'DECLINED'
+    ERROR = 'ERROR'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (PAID, 'Paid'),
+        (DECLINED, 'Declined'),
+        (ERROR, 'Error'),
+    )
+
+    keycode = models.UUIDField(default=uuid.uuid4, unique=True)
+    article = models.ForeignKey(
+        Article,
+        on_delete=models.PROTECT,
+        related_name='orders',
+    )
+    ticket = models.OneToOneField(
+        Ticket,
+        on_delete=models.SET_NULL,
+        related_name='order',
+        null=True,
+        blank=True,
+    )
+    stripe_token = models.CharField(max_length=128, blank=True)
+    status = models.CharField(
+        max_length=8,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    payment_id = models.CharField(max_length=128, blank=True)
+    message = models.CharField(max_length=256, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '{} [{}]'.format(self.keycode, self.status)
+
+    @property
+    def is_pending(self):
+        return self.status == Order.PENDING
+
+    def paid(self, payment_id):
+        with transaction.atomic():
+            self.ticket.payment_id = payment_id
+            self.ticket.save(update_fields=['payment_id'])
+            self.status = Order.PAID
+            self.payment_id = payment_id
+            self.stripe_token = ''
+            self.save()
+
+    def failed(self, status, message, error='', payment_id=''):
+        """Record the failure and release the ticket reserved."""
+        with transaction.atomic():
+            if self.ticket:
+                self.ticket.delete()
+                self.ticket = None
+            self.status = status
+            self.payment_id = payment_id
+            self.message = message
+            self.error = error
+            self.stripe_token = ''
+            self.save()
+
+    def needs_review(self, message):
+        """Record an error that has to be solved by hand, keeping the
+        ticket reserved.
+        """
+        max_length = Order._meta.get_field('message').max_length
+        self.status = Order.ERROR
+        self.message = message[:max_length]
+        self.save()
+
+    @classmethod
+    def release_expired(cls, queryset=None):
+        """Fail the orders of `queryset` (All of them by default) pending
+        for longer than `PENDING_TIMEOUT`. Returns the number of tickets
+        released.
+
+        Stripe is asked first for the charges of every order: the job may
+        have died after charging it. Only the tickets of orders without
+        charges are released; the others are left for manual review, and
+        those that can't be checked now stay pending.
+        """
+        from apps.events.stripe_utils import find_charges, get_stripe
+
+        queryset = cls.objects.all() if queryset is None else queryset
+        expired = queryset.filter(
+            status=Order.PENDING,
+            created_at__lt=dj_timezone.now() - cls.PENDING_TIMEOUT,
+        ).select_related('ticket')
+        stripe = get_stripe()
+        released = 0
+        for order in expired:
+            try:
+                charges = find_charges(stripe, order)
+            except stripe.error.StripeError:
+                continue
+            if charges:
+                order.needs_review(
+                    'El pago ha caducado, pero hay cargos en Stripe: '
+                    + ', '.join(charge.id for charge in charges)
+                )
+                continue
+            released += order.ticket is not None
+            order.failed(Order.ERROR, 'El pago ha caducado')
+        return released
+
+
+class TicketCounter(models.Model):
+    """Last number given to a ticket of an event."""
+
+    event = models.OneToOneField(
+        'events.Event',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ticket_counter',
+    )
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '{}: {}'.format(self.event, self.last_number)
+
+    @classmethod
+    def next_number(cls, event):
+        """Increment the counter of the event and return its new value.
+
+        The UPDATE locks the row of the counter until the end of the
+        transaction, so two tickets never get the same number, and there
+        is no need to scan the tickets of the event.
+        """
+        with transaction.atomic():
+            counters = cls.objects.filter(event=event)
+            if not counters.update(last_number=F('last_number') + 1):
+                # The first time, go on from the tickets already sold
+                data = Ticket.objects.filter(
+                    article__event=event
+                ).aggregate(Max('number'))
+                current_number = data.get('number__max', 0) or 0
+                _, created = cls.objects.get_or_create(
+                    event=event,
+                    defaults={'last_number': current_number + 1},
+                )
+                if not created:
+                    # Created by another purchase in the meantime
+                    counters.update(last_number=F('last_number') + 1)
+            return counters.values_list('last_number', flat=True).get()
+
+
 class Raffle(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     event = models.OneToOneField('events.Event',
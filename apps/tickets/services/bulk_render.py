@@ -0,0 +1,92 @@
+"""Render the PDF of many tickets in parallel.
+
+Every worker process registers the fonts once (See
+`ticket_maker.register_fonts`) and receives the tickets already loaded,
+together with the start of the events, so workers never touch the
+database.
+"""
+
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from apps.commons.db import close_connections_before_fork
+from apps.commons.iterables import chunks
+from apps.tickets.models import Ticket
+
+from . import pdf_cache
+from .ticket_maker import TicketBatchMaker, register_fonts
+
+
+def render_chunk(tickets, event_starts):
+    """Render a chunk of tickets in their usual path.
+
+    Returns a list of tuples (ticket pk, path of the PDF, error), where
+    error is None if the PDF was rendered.
+    """
+    maker = TicketBatchMaker(tickets, event_starts=event_starts)
+    results = []
+    for ticket in tickets:
+        full_name = ticket.get_pdf_path(maker.event_start(ticket))
+        try:
+            maker.create_file(ticket, full_name)
+            results.append((ticket.pk, full_name, None))
+        except Exception:
+            results.append((ticket.pk, full_name, traceback.format_exc()))
+    return results
+
+
+class BulkRenderReport:
+
+    def __init__(self):
+        self.rendered = []
+        self.skipped = []
+        self.failed = {}
+        self.elapsed = 0.0
+
+    @property
+    def speed(self):
+        return len(self.rendered) / self.elapsed if self.elapsed else 0.0
+
+
+def render_tickets(tickets, workers=None, chunk_size=10, force=False):
+    """Render the PDF of `tickets` using a pool of `workers` processes.
+
+    Tickets that already have a PDF with their current content are
+    skipped, unless `force` is True (See `pdf_cache`).
+    """
+    report = BulkRenderReport()
+    event_starts = {}
+    pending = []
+    for ticket in tickets:
+        event = ticket.event
+        if event.pk not in event_starts:
+            event_starts[event.pk] = event.start_datetime()
+        if not force and ticket.pdf_is_fresh(event_starts[event.pk]):
+            report.skipped.append(ticket.pk)
+        else:
+            pending.append(ticket)
+    if not pending:
+        return report
+    # Create the output directory before forking the workers
+    tickets_dir = Ticket.get_tickets_dir()
+    close_connections_before_fork()
+    keycodes = {ticket.pk: ticket.keycode for ticket in pending}
+    rendered_files = set()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=register_fonts) as pool:
+        futures = [
+            pool.submit(render_chunk, chunk, event_starts)
+            for chunk in chunks(pending, chunk_size)
+        ]
+        for future in as_completed(futures):
+            for pk, full_name, error in future.result():
+                if error:
+                    report.failed[pk] = error
+                else:
+                    report.rendered.append(pk)
+                    rendered_files.add(full_name)
+                    pdf_cache.remove_stale(full_name, keycodes[pk])
+    report.elapsed = time.perf_counter() - start
+    pdf_cache.evict(tickets_dir, keep=rendered_files)
+    return report
@@ -0,0 +1,64 @@
+"""Cache of the PDF of the tickets, in `Ticket.get_tickets_dir()`.
+
+The name of every PDF includes the digest of what is drawn on it (See
+`ticket_maker.ticket_digest`), so a PDF is never stale: when the name of
+the attendee, the venue, the event date, etc. change, the ticket just
+points to another file. Old versions of the PDF of a ticket are removed
+when a new one is generated. Batch jobs and commands, which render many
+tickets, call `evict` when they finish to remove the least recently used
+files if the directory grows over `TICKETS_PDF_CACHE_MAX_SIZE` bytes (It
+scans the whole directory, too slow to run for every ticket).
+"""
+
+import glob
+import os
+
+from django.conf import settings
+
+
+def pdf_filename(keycode, digest):
+    return f'ticket-{keycode}-{digest}.pdf'
+
+
+def touch(full_name):
+    """Mark the PDF as recently used."""
+    os.utime(full_name, None)
+
+
+def remove_stale(full_name, keycode):
+    """Remove every other PDF of the ticket, including the ones named
+    after the keycode only, used before the digest was included.
+    """
+    directory = os.path.dirname(full_name)
+    candidates = glob.glob(os.path.join(directory, f'ticket-{keycode}-*.pdf'))
+    candidates.append(os.path.join(directory, f'ticket-{keycode}.pdf'))
+    for candidate in candidates:
+        if candidate != full_name and os.path.exists(candidate):
+            os.remove(candidate)
+
+
+def evict(directory, max_size=None, keep=()):
+    """Remove the least recently used PDFs until the size of `directory`
+    is under `max_size` bytes. The files in `keep` are never removed.
+
+    Returns the list of removed files.
+    """
+    if max_size is None:
+        max_size = settings.TICKETS_PDF_CACHE_MAX_SIZE
+    files = []
+    total_size = 0
+    for entry in os.scandir(directory):
+        if entry.name.startswith('ticket-') and entry.name.endswith('.pdf'):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+    removed = []
+    for _, size, path in sorted(files):
+        if total_size <= max_size:
+            break
+        if path in keep:
+            continue
+        os.remove(path)
+        total_size -= size
+        removed.append(path)
+    return removed
@@ -1,3 +1,5 @@
+import functools
+import hashlib
 import os
 
 from django.utils import timezone
@@ -7,49 +9,139 @@ from reportlab.graphics.shapes import Drawing
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import cm, mm
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+from reportlab.platypus import (
+    PageBreak,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+)
+
+from apps.commons.files import atomic_output
+
+RESOURCES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'resources')
+FONTS_PATH = os.path.join(RESOURCES_PATH, 'fonts')
+IMAGES_PATH = os.path.join(RESOURCES_PATH, 'images')
+
+FONTS = {
+    'light': 'Existence-Light.ttf',
+    'bold': 'Amaranth-Bold.ttf',
+    'title': 'AirAmerica-Regular.ttf',
+    'far': 'Font Awesome-5-Free-Regular-400.ttf',
+    'fab': 'Font-Awesome-5-Brands-Regular-400.ttf',
+    'fas': 'Font-Awesome-5-Free-Solid-900.ttf',
+    'fira': 'FiraCode-Light.ttf'
+}
+
+
+@functools.lru_cache(maxsize=None)
+def register_fonts():
+    """Parse and register the fonts, only once per process."""
+    for font_alias, font_filename in FONTS.items():
+        font_path = os.path.join(FONTS_PATH, font_filename)
+        pdfmetrics.registerFont(TTFont(font_alias, font_path))
+
+
+@functools.lru_cache(maxsize=None)
+def get_styles():
+    return getSampleStyleSheet()
+
+
+@functools.lru_cache(maxsize=None)
+def get_image(filename):
+    """Image from the resources, read from disk only once per process."""
+    return ImageReader(os.path.join(IMAGES_PATH, filename))
+
+
+def ticket_document(pdf_file):
+    return SimpleDocTemplate(
+        pdf_file,
+        pagesize=A4,
+        rightMargin=3 * cm,
+        leftMargin=2 * cm,
+        topMargin=4 * cm,
+        bottomMargin=3 * cm)
+
+
+def ticket_features(ticket, event_start):
+    """Rows of the table of features of the ticket: (icon, label, value)."""
+    start = timezone.localtime(event_start)
+    event_date = start.strftime('%d/%m/%Y')
+    if start.hour == 0:
+        event_hour = 'Aún sin definir'
+    else:
+        event_hour = start.strftime('%H:%Mh')
+    return (
+        ('\uf554', 'asistente', ticket.customer_full_name),
+        ('\uf0e0', 'email', ticket.customer_email),
+        ('\uf784', 'fecha del evento', event_date),
+        ('\uf017', 'hora de comienzo', event_hour),
+        ('\uf292', 'número de entrada', ticket.number),
+        ('\uf810', 'tipo de entrada', ticket.article.category.name),
+        ('\uf4c0', 'precio de la entrada', f'{ticket.article.price}€'),
+        ('\uf788', 'método de pago',
+            ticket.get_payment_method_display() or 'Free'),
+        ('\uf07a', 'fecha de compra',
+            ticket.sold_at.strftime('%d/%m/%y @ %H:%Mh')),
+        ('\uf3c5', 'ubicación', ticket.event.venue.name),
+        ('\uf14e', 'dirección', ticket.event.venue.address),
+    )
+
+
+PARAGRAPH_FEATURES = {'ubicación', 'dirección'}
+
+# Change it when the layout of the ticket changes, to discard the PDFs
+# already generated
+LAYOUT_VERSION = 1
+
+
+def ticket_digest(ticket, event_start):
+    """Digest of everything drawn on the PDF of the ticket.
+
+    Two tickets with the same digest render exactly the same PDF, so it
+    is used as the key of the PDFs already generated (See
+    `apps.tickets.services.pdf_cache`).
+    """
+    content = [
+        LAYOUT_VERSION,
+        str(ticket.event),
+        ticket.event.qualified_hashtag,
+        str(ticket.keycode),
+        *(str(value) for _, _, value in ticket_features(ticket, event_start)),
+    ]
+    return hashlib.sha256(repr(content).encode('utf-8')).hexdigest()[:16]
 
 
 class BaseReport:
-    FONTS = {
-        'light': 'Existence-Light.ttf',
-        'bold': 'Amaranth-Bold.ttf',
-        'title': 'AirAmerica-Regular.ttf',
-        'far': 'Font Awesome-5-Free-Regular-400.ttf',
-        'fab': 'Font-Awesome-5-Brands-Regular-400.ttf',
-        'fas': 'Font-Awesome-5-Free-Solid-900.ttf',
-        'fira': 'FiraCode-Light.ttf'
-    }
+    FONTS = FONTS
 
     def __init__(self, ticket, width, height):
         self.ticket = ticket
         self.width = width
         self.height = height
-        self.styles = getSampleStyleSheet()
+        self.styles = get_styles()
         self.configure_paths()
         self.configure_fonts()
 
     def configure_paths(self):
-        self.resources_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), 'resources')
-        self.fonts_path = os.path.join(self.resources_path, 'fonts')
-        self.images_path = os.path.join(self.resources_path, 'images')
+        self.resources_path = RESOURCES_PATH
+        self.fonts_path = FONTS_PATH
+        self.images_path = IMAGES_PATH
 
     def configure_fonts(self):
-        self.fonts = {}
-        for font_alias, font_filename in BaseReport.FONTS.items():
-            font_path = os.path.join(self.fonts_path, font_filename)
-            pdfmetrics.registerFont(TTFont(font_alias, font_path))
+        register_fonts()
 
     def coord(self, x, y, unit=mm):
         x, y = x * unit, self.height - y * unit
         return x, y
 
-    def insert_image(self, image_path, x, y, width, anchor='sw'):
+    def insert_image(self, image, x, y, width, anchor='sw'):
         self.canvas.drawImage(
-            image_path,
+            image,
             x,
             y,
             width=width,
@@ -73,9 +165,8 @@ class Header(BaseReport):
     def draw(self):
         self.canvas.saveState()
 
-        logo_path = os.path.join(self.images_path, 'logo-python-canarias.png')
         self.insert_image(
-            logo_path,
+            get_image('logo-python-canarias.png'),
             self.x,
             self.y,
             45 * mm,
@@ -112,7 +203,7 @@ class Footer(BaseReport):
         start_x += 5 * mm
         self.canvas.setFont('bold', 10)
         self.canvas.drawString(start_x, start_y,
-                               f'Comparte el evento con:')
+                               'Comparte el evento con:')
         # hashtag
         start_x += 38 * mm
         self.canvas.setFont('fira', 9)
@@ -163,15 +254,11 @@ class QRCode(BaseReport):
 
 class TicketMaker(BaseReport):
 
-    def __init__(self, pdf_file, ticket, width=A4[0], height=A4[1]):
+    def __init__(self, pdf_file, ticket, width=A4[0], height=A4[1],
+                 event_start=None):
         super().__init__(ticket, width, height)
-        self.doc = SimpleDocTemplate(
-            pdf_file,
-            pagesize=A4,
-            rightMargin=3 * cm,
-            leftMargin=2 * cm,
-            topMargin=4 * cm,
-            bottomMargin=3 * cm)
+        self.event_start = event_start or ticket.event.start_datetime()
+        self.doc = ticket_document(pdf_file)
         self.elements = []
 
     def create_title(self):
@@ -183,33 +270,13 @@ class TicketMaker(BaseReport):
         self.elements.append(s)
 
     def create_features(self):
-        start = timezone.localtime(self.ticket.event.start_datetime())
-        event_date = start.strftime('%d/%m/%Y')
-        if start.hour == 0:
-            event_hour = 'Aún sin definir'
-        else:
-            event_hour = start.strftime('%H:%Mh')
-        data = (
-            ('\uf554', 'asistente', self.ticket.customer_full_name),
-            ('\uf0e0', 'email', self.ticket.customer_email),
-            ('\uf784', 'fecha del evento', event_date),
-            ('\uf017', 'hora de comienzo', event_hour),
-            ('\uf292', 'número de entrada', self.ticket.number),
-            ('\uf810', 'tipo de entrada', self.ticket.article.category.name),
-            ('\uf4c0', 'precio de la entrada',
-                f'{self.ticket.article.price}€'),
-            ('\uf788', 'método de pago',
-                self.ticket.get_payment_method_display() or 'Free'),
-            ('\uf07a', 'fecha de compra',
-                self.ticket.sold_at.strftime('%d/%m/%y @ %H:%Mh')),
-            ('\uf3c5', 'ubicación',
-             self.paragraph(f'''
-                <font name=bold>{ self.ticket.event.venue.name }</font>''')),
-            ('\uf14e', 'dirección',
-             self.paragraph(f'''
-                <font name=bold>{ self.ticket.event.venue.address }</font>
-            '''))
-        )
+        data = []
+        for icon, label, value in ticket_features(
+                self.ticket, self.event_start):
+            if label in PARAGRAPH_FEATURES:
+                value = self.paragraph(f'''
+                    <font name=bold>{ value }</font>''')
+            data.append((icon, label, value))
 
         tblstyle = ([('FONT', (0, 0), (0, -1), 'fas'),
                      ('FONT', (1, 0), (1, -1), 'light'),
@@ -250,3 +317,69 @@ class TicketMaker(BaseReport):
     def create(self):
         self.draw_flowables()
         self.save()
+
+
+class TicketBatchMaker:
+    """Render the tickets of an event in one pass.
+
+    Fonts, styles and images are shared by all the tickets (See
+    `register_fonts`, `get_styles` and `get_image`), and the start of
+    every event is calculated only once. The tickets can be rendered to
+    individual files (`create_files`) or to a single PDF with one page
+    per ticket (`create_combined`).
+    """
+
+    def __init__(self, tickets, event_starts=None):
+        self.tickets = tickets
+        self.event_starts = dict(event_starts or {})
+
+    def event_start(self, ticket):
+        event = ticket.event
+        if event.pk not in self.event_starts:
+            self.event_starts[event.pk] = event.start_datetime()
+        return self.event_starts[event.pk]
+
+    def maker(self, pdf_file, ticket):
+        return TicketMaker(
+            pdf_file, ticket, event_start=self.event_start(ticket))
+
+    def create_file(self, ticket, full_name):
+        with atomic_output(full_name) as tmp_name:
+            self.maker(tmp_name, ticket).create()
+        return full_name
+
+    def create_files(self, output_dir, filename=None):
+        """Render every ticket in its own file inside `output_dir`.
+
+        Yields a tuple (ticket, full path of the PDF) as soon as every
+        ticket is rendered.
+        """
+        filename = filename or (lambda ticket: f'ticket-{ticket.keycode}.pdf')
+        for ticket in self.tickets:
+            full_name = os.path.join(output_dir, filename(ticket))
+            yield ticket, self.create_file(ticket, full_name)
+
+    def create_combined(self, pdf_file):
+        """Render all the tickets in `pdf_file`, one ticket per page.
+
+        Every ticket fits in a page, so the page number tells which
+        ticket the header, footer and QR code belong to.
+        """
+        makers = []
+        elements = []
+        for ticket in self.tickets:
+            maker = self.maker(None, ticket)
+            maker.draw_flowables()
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(maker.elements)
+            makers.append(maker)
+        if not makers:
+            return pdf_file
+
+        def draw_fixed(canvas, doc):
+            makers[canvas.getPageNumber() - 1].draw_fixed(canvas, doc)
+
+        doc = ticket_document(pdf_file)
+        doc.build(elements, onFirstPage=draw_fixed, onLaterPages=draw_fixed)
+        return pdf_file
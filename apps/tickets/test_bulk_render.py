@@ -0,0 +1,73 @@
+import datetime
+import os
+
+import pytest
+from django.core.management import call_command
+
+from apps.events.models import Event
+from apps.locations.models import Venue
+
+from .models import Article, Ticket, TicketCategory
+from .services.bulk_render import render_tickets
+
+
+@pytest.fixture
+def tickets(settings, tmp_path):
+    settings.BASE_DIR = str(tmp_path)
+    venue = Venue.objects.create(name='Venue', slug='venue', address='Street')
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+        venue=venue,
+    )
+    article = Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name='General', slug='general'),
+        price=10,
+        stock=100,
+    )
+    for i in range(5):
+        Ticket.objects.create(
+            article=article,
+            customer_email=f'attendee{i}@example.com',
+            customer_name='Attendee',
+            customer_surname=str(i),
+        )
+    return list(event.tickets_for_rendering())
+
+
+@pytest.mark.django_db
+def test_render_tickets(tickets):
+    report = render_tickets(tickets, workers=2, chunk_size=2)
+    assert sorted(report.rendered) == sorted(t.pk for t in tickets)
+    assert not report.failed
+    for ticket in tickets:
+        assert ticket.pdf_is_fresh()
+    tickets_dir = os.path.dirname(tickets[0].get_pdf_path())
+    assert len(os.listdir(tickets_dir)) == len(tickets)
+
+
+@pytest.mark.django_db
+def test_render_tickets_skips_fresh_pdfs(tickets):
+    render_tickets(tickets[:2], workers=1)
+    changed = Ticket.objects.get(pk=tickets[0].pk)
+    changed.customer_name = 'Another'
+    changed.save()
+    tickets[0] = changed
+    report = render_tickets(tickets, workers=1)
+    assert report.skipped == [tickets[1].pk]
+    assert len(report.rendered) == len(tickets) - 1
+    report = render_tickets(tickets, workers=1, force=True)
+    assert len(report.rendered) == len(tickets)
+
+
+@pytest.mark.django_db
+def test_render_tickets_command(tickets, capsys):
+    call_command('render_tickets', 'pyday', workers=1)
+    assert 'Rendered: 5' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,70 @@
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.events.models import Event
+
+from .models import Article, Ticket, TicketCategory
+
+
+@pytest.fixture
+def event():
+    return Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date.today() + datetime.timedelta(days=30),
+        default_slot_duration=datetime.timedelta(minutes=50),
+    )
+
+
+def create_article(event, name, stock, sold=0, refunded=0):
+    article = Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name=name, slug=name),
+        price=10,
+        stock=stock,
+        release_at=timezone.now() - datetime.timedelta(days=1),
+    )
+    for i in range(sold + refunded):
+        Ticket.objects.create(
+            article=article,
+            customer_email=f'{name}{i}@example.com',
+            refunded_at=timezone.now() if i < refunded else None,
+        )
+    return article
+
+
+@pytest.mark.django_db
+def test_with_sold_tickets(event):
+    create_article(event, 'general', stock=10, sold=3, refunded=2)
+    create_article(event, 'student', stock=2, sold=2)
+    create_article(event, 'vip', stock=5)
+    with CaptureQueriesContext(connection) as queries:
+        articles = list(event.all_articles())
+        summary = [
+            (a.category.slug, a.num_sold_tickets, a.num_available_tickets,
+             a.status())
+            for a in articles
+        ]
+    assert len(queries) == 1
+    assert summary == [
+        ('general', 3, 7, Article.SALEABLE),
+        ('student', 2, 0, Article.SOLDOUT),
+        ('vip', 0, 5, Article.SALEABLE),
+    ]
+
+
+@pytest.mark.django_db
+def test_num_sold_tickets_without_annotation(event):
+    article = create_article(event, 'general', stock=10, sold=3, refunded=1)
+    article = Article.objects.get(pk=article.pk)
+    assert article.num_sold_tickets == 3
+    assert event.num_sold_tickets() == 3
+    assert event.num_available_tickets() == 7
+
+
+if __name__ == '__main__':
+    pytest.main()
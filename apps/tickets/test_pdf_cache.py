@@ -0,0 +1,79 @@
+import datetime
+import os
+
+import pytest
+
+from apps.events.models import Event
+from apps.locations.models import Venue
+
+from .models import Article, Ticket, TicketCategory
+from .services import pdf_cache
+
+
+@pytest.fixture
+def ticket(settings, tmp_path):
+    settings.BASE_DIR = str(tmp_path)
+    venue = Venue.objects.create(name='Venue', slug='venue', address='Street')
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+        venue=venue,
+    )
+    article = Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name='General', slug='general'),
+        price=10,
+        stock=100,
+    )
+    return Ticket.objects.create(
+        article=article,
+        customer_email='attendee@example.com',
+        customer_name='Attendee',
+    )
+
+
+@pytest.mark.django_db
+def test_as_pdf_reuses_pdf(ticket):
+    full_name = ticket.as_pdf()
+    mtime = os.path.getmtime(full_name)
+    os.utime(full_name, (mtime - 60, mtime - 60))
+    assert ticket.as_pdf() == full_name
+    # Marked as recently used, not generated again
+    assert os.path.getmtime(full_name) > mtime - 60
+
+
+@pytest.mark.django_db
+def test_as_pdf_changes_with_content(ticket):
+    full_name = ticket.as_pdf()
+    ticket.send_at = datetime.datetime(2030, 11, 1, 10, 0)
+    assert ticket.as_pdf() == full_name
+    venue = ticket.event.venue
+    venue.address = 'Another street'
+    venue.save()
+    new_name = ticket.as_pdf()
+    assert new_name != full_name
+    assert not os.path.exists(full_name)
+    assert os.listdir(os.path.dirname(new_name)) == [os.path.basename(new_name)]
+
+
+def test_evict_least_recently_used(tmp_path):
+    for i in range(4):
+        path = tmp_path / f'ticket-{i}.pdf'
+        path.write_bytes(b'x' * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    (tmp_path / '.ticket-4.pdf.tmp').write_bytes(b'x' * 100)
+    keep = str(tmp_path / 'ticket-0.pdf')
+    removed = pdf_cache.evict(str(tmp_path), max_size=250, keep={keep})
+    assert removed == [
+        str(tmp_path / 'ticket-1.pdf'),
+        str(tmp_path / 'ticket-2.pdf'),
+    ]
+    assert sorted(os.listdir(tmp_path)) == [
+        '.ticket-4.pdf.tmp', 'ticket-0.pdf', 'ticket-3.pdf'
+    ]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,91 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection, connections
+from django.utils import timezone
+
+from apps.events.models import Event
+
+from .models import Article, SoldOut, Ticket, TicketCategory, TicketCounter
+
+
+def create_article(stock, hashtag='pyday'):
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag=hashtag,
+        start_date=datetime.date.today() + datetime.timedelta(days=30),
+        default_slot_duration=datetime.timedelta(minutes=50),
+    )
+    return Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name=hashtag, slug=hashtag),
+        price=10,
+        stock=stock,
+        release_at=timezone.now() - datetime.timedelta(days=1),
+    )
+
+
+def buy(article, i):
+    return article.reserve_ticket(customer_email=f'attendee{i}@example.com')
+
+
+@pytest.mark.django_db
+def test_ticket_numbers():
+    article = create_article(stock=10)
+    other = create_article(stock=10, hashtag='other')
+    assert [buy(article, i).number for i in range(3)] == [1, 2, 3]
+    assert buy(other, 0).number == 1
+    assert TicketCounter.objects.get(event=article.event).last_number == 3
+
+
+@pytest.mark.django_db
+def test_ticket_numbers_go_on_from_existing_tickets():
+    article = create_article(stock=10)
+    Ticket.objects.create(article=article, customer_email='a@example.com')
+    Ticket.objects.create(
+        article=article, customer_email='b@example.com', number=41
+    )
+    TicketCounter.objects.all().delete()
+    assert buy(article, 0).number == 42
+
+
+@pytest.mark.django_db
+def test_reserve_ticket_sold_out():
+    article = create_article(stock=2)
+    buy(article, 0)
+    refunded = buy(article, 1)
+    with pytest.raises(SoldOut):
+        buy(article, 2)
+    refunded.refunded_at = timezone.now()
+    refunded.save()
+    assert buy(article, 3).number == 3
+
+
+@pytest.mark.slow
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='Needs a database with row locks and concurrent transactions',
+)
+def test_concurrent_purchases():
+    stock, buyers = 20, 60
+    article = create_article(stock=stock)
+
+    def purchase(i):
+        try:
+            return buy(article, i).number
+        except SoldOut:
+            return None
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        numbers = list(pool.map(purchase, range(buyers)))
+    sold = [n for n in numbers if n is not None]
+    assert sorted(sold) == list(range(1, stock + 1))
+    assert article.tickets.count() == stock
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,64 @@
+import datetime
+import os
+import re
+
+import pytest
+
+from apps.events.models import Event
+from apps.locations.models import Venue
+
+from .models import Article, Ticket, TicketCategory
+from .services.ticket_maker import TicketBatchMaker, register_fonts
+
+
+@pytest.fixture
+def event():
+    venue = Venue.objects.create(name='Venue', slug='venue', address='Street')
+    event = Event.objects.create(
+        name='PyDay',
+        hashtag='pyday',
+        start_date=datetime.date(2030, 11, 16),
+        default_slot_duration=datetime.timedelta(minutes=50),
+        venue=venue,
+    )
+    article = Article.objects.create(
+        event=event,
+        category=TicketCategory.objects.create(name='General', slug='general'),
+        price=10,
+        stock=100,
+    )
+    for i in range(3):
+        Ticket.objects.create(
+            article=article,
+            customer_email=f'attendee{i}@example.com',
+            customer_name='Attendee',
+            customer_surname=str(i),
+        )
+    return event
+
+
+def num_pages(pdf_file):
+    with open(pdf_file, 'rb') as f:
+        return len(re.findall(rb'/Type /Page\b', f.read()))
+
+
+@pytest.mark.django_db
+def test_create_files(event, tmp_path):
+    tickets = list(event.tickets_for_rendering())
+    rendered = list(TicketBatchMaker(tickets).create_files(tmp_path))
+    assert [ticket for ticket, _ in rendered] == tickets
+    for ticket, full_name in rendered:
+        assert full_name == os.path.join(tmp_path, f'ticket-{ticket.keycode}.pdf')
+        assert num_pages(full_name) == 1
+    assert register_fonts.cache_info().misses == 1
+
+
+@pytest.mark.django_db
+def test_create_combined(event, tmp_path):
+    pdf_file = str(tmp_path / 'tickets.pdf')
+    TicketBatchMaker(event.tickets_for_rendering()).create_combined(pdf_file)
+    assert num_pages(pdf_file) == 3
+
+
+if __name__ == '__main__':
+    pytest.main()
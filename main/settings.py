@@ -229,8 +229,20 @@ STRIPE_SECRET_KEY = config(
     default='Set your Stripe api secret key in .env file',
 )
 
+# Module with the Stripe API: 'stripe' or 'apps.events.fake_stripe'
+STRIPE_API = config('STRIPE_API', default='stripe')
+
 SENDGRID_API_KEY = config('SENDGRID_API_KEY', default='<sengrid api key>')
 
+# Token of the URL of the SendGrid event webhook (See apps/notices/views.py).
+# The webhook is disabled if empty
+SENDGRID_WEBHOOK_TOKEN = config('SENDGRID_WEBHOOK_TOKEN', default='')
+
+# See apps/commons/mail.py
+MAIL_DELIVERY_BACKEND = config(
+    'MAIL_DELIVERY_BACKEND', default='apps.commons.mail.SendGridBackend'
+)
+
 LOGFILE_NAME = os.path.join(BASE_DIR, 'web.log')
 LOGFILE_SIZE = 1 * 1024 * 1024
 LOGFILE_COUNT = 3
@@ -351,6 +363,19 @@ RANDOM_QUOTE_INTERVAL = config(
     'RANDOM_QUOTE_INTERVAL', default=10, cast=lambda i: 1000 * int(i)
 )
 
+# Admission control for the sale of tickets (See apps/events/admission.py)
+TICKETS_ADMISSION_MAX_BUYERS = config(
+    'TICKETS_ADMISSION_MAX_BUYERS', default=50, cast=int
+)
+TICKETS_ADMISSION_SLOT_TIME = config(
+    'TICKETS_ADMISSION_SLOT_TIME', default=600, cast=int  # seconds
+)
+
+# Maximum size in bytes of the PDFs of the tickets kept in temporal/tickets
+TICKETS_PDF_CACHE_MAX_SIZE = config(
+    'TICKETS_PDF_CACHE_MAX_SIZE', default=256 * 1024 * 1024, cast=int
+)
+
 if DEBUG:
     MESSAGE_LEVEL = message_constants.DEBUG
 
@@ -18,6 +18,7 @@ urlpatterns = [
     path('members/', include('apps.members.urls', namespace='members')),
     path('jobs/', include('apps.jobs.urls', namespace='jobs')),
     path('learn/', include('apps.learn.urls', namespace='learn')),
+    path('notices/', include('apps.notices.urls', namespace='notices')),
 ]
 
 if settings.DEBUG: